@@ -0,0 +1,120 @@
+import os
+from collections import defaultdict
+
+# ===============================
+# CONFIG
+# ===============================
+# ≥ 50% ONU 1 PON berubah bersamaan → 1 pesan ringkasan per PON
+AGG_THRESHOLD = float(os.environ.get("ALERT_AGG_THRESHOLD", 0.5))
+# ... dan minimal sekian ONU (PON kecil tetap alert per ONU)
+AGG_MIN_COUNT = int(os.environ.get("ALERT_AGG_MIN_COUNT", 4))
+# contoh nama ONU yang ditampilkan di ringkasan
+AGG_SAMPLE = 5
+
+
+def problem_kind(onu):
+    """
+    Jenis event ONU bermasalah:
+      attenuation → masih ONLINE tapi diagnosis redaman / RX
+      down        → status selain ONLINE (mati / fiber / offline)
+    """
+    if (onu.get("status") or "").upper() == "ONLINE":
+        return "attenuation"
+    return "down"
+
+
+def group_events(events, pon_totals,
+                 threshold=AGG_THRESHOLD, min_count=AGG_MIN_COUNT):
+    """
+    Kelompokkan event (down / attenuation / recovery) per PON dalam 1 sync.
+
+    events     : list dict {kind, pon, onu_id, onu, alert, transition}
+                 transition = status / diagnosis berubah (bukan RX saja)
+    pon_totals : {pon: jumlah ONU di PON}
+
+    return: (groups, singles)
+      groups  → [(kind, pon, [event])] = kejadian massal (1 pesan)
+      singles → [event] = ONU terisolasi (pesan per ONU)
+    """
+    by_key = defaultdict(list)
+    singles = []
+
+    for ev in events:
+        # RX bergeser tanpa perubahan status / diagnosis bukan kejadian massal
+        if ev.get("transition", True):
+            by_key[(ev["kind"], ev["pon"])].append(ev)
+        else:
+            singles.append(ev)
+
+    groups = []
+
+    for (kind, pon), evs in by_key.items():
+        total = pon_totals.get(pon) or len(evs)
+
+        if len(evs) >= min_count and len(evs) / total >= threshold:
+            groups.append((kind, pon, evs))
+        else:
+            singles.extend(evs)
+
+    groups.sort(key=lambda g: (g[0], str(g[1])))
+    return groups, singles
+
+
+def _sample_names(events):
+    names = [
+        ev["onu"].get("name") or f"ONU {ev['onu_id']}"
+        for ev in events[:AGG_SAMPLE]
+    ]
+    more = len(events) - len(names)
+    return ", ".join(names) + (f" (+{more})" if more > 0 else "")
+
+
+def _breakdown(events):
+    count = defaultdict(int)
+    for ev in events:
+        count[ev["onu"].get("diagnosis") or "-"] += 1
+    return "\n".join(
+        f"  • {diag}: {n}"
+        for diag, n in sorted(count.items(), key=lambda x: -x[1])
+    )
+
+
+def _worst_rx(events):
+    rx = [ev["onu"].get("rx_power") for ev in events]
+    rx = [v for v in rx if v is not None]
+    return f"{min(rx):.2f} dBm" if rx else "-"
+
+
+def outage_message(olt, kind, pon, events, total):
+    if kind == "attenuation":
+        return (
+            "⚠️ <b>PON REDAMAN TINGGI</b>\n\n"
+            f"<b>OLT</b>       : {olt['name']}\n"
+            f"<b>PON {pon}</b>     : {len(events)}/{total} ONU redaman tinggi\n"
+            f"<b>RX terburuk</b>: {_worst_rx(events)}\n"
+            f"<b>Diagnosis</b> :\n{_breakdown(events)}\n"
+            f"<b>ONU</b>       : {_sample_names(events)}"
+        )
+
+    return (
+        "🚨 <b>PON BERMASALAH</b>\n\n"
+        f"<b>OLT</b>       : {olt['name']}\n"
+        f"<b>PON {pon}</b>     : {len(events)}/{total} ONU down\n"
+        f"<b>Diagnosis</b> :\n{_breakdown(events)}\n"
+        f"<b>ONU</b>       : {_sample_names(events)}"
+    )
+
+
+def restore_message(olt, pon, events, total):
+    return (
+        "✅ <b>PON RECOVERY</b>\n\n"
+        f"<b>OLT</b>       : {olt['name']}\n"
+        f"<b>PON {pon}</b>     : {len(events)}/{total} ONU kembali normal\n"
+        f"<b>ONU</b>       : {_sample_names(events)}"
+    )
+
+
+def group_message(olt, kind, pon, events, total):
+    if kind == "recovery":
+        return restore_message(olt, pon, events, total)
+    return outage_message(olt, kind, pon, events, total)
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+import os
+import sys
+import time
+import threading
+
+# ===============================
+# PROJECT ROOT PATH
+# ===============================
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from alerts import outbox
+from alerts import telegram
+from db.db import SYNC_DB
+
+# ===============================
+# CONFIG
+# ===============================
+BATCH_SIZE = int(os.environ.get("ALERT_BATCH_SIZE", 20))
+POLL_INTERVAL = float(os.environ.get("ALERT_POLL_INTERVAL", 2))
+MAX_ATTEMPTS = int(os.environ.get("ALERT_MAX_ATTEMPTS", 8))
+# jeda antar pesan ke 1 chat (limit Telegram ±1 pesan/detik, grup 20/menit)
+SEND_INTERVAL = float(os.environ.get("ALERT_SEND_INTERVAL", 1.0))
+# baris 'sending' yang ditinggal worker mati dianggap pending lagi
+# (klaim diperbarui tiap sebelum kirim, jadi batch lama tidak ikut kadaluarsa)
+CLAIM_TIMEOUT = 120
+
+# siapa yang mengirim outbox — HARUS 1 proses, throttle / pause
+# rate limit Telegram disimpan di memori dispatcher:
+#   service     → python alerts/dispatcher.py (service alert-dispatcher,
+#                 profile compose "alert-dispatcher", butuh SYNC_DB=postgres)
+#   sync_runner → sync_runner drain setelah tiap pass (setup sqlite / cron)
+#   dashboard   → thread di dashboard (hanya gunicorn 1 worker)
+ALERT_DISPATCHER = os.environ.get(
+    "ALERT_DISPATCHER",
+    "service" if SYNC_DB == "postgres" else "sync_runner"
+)
+
+
+def backoff(attempts):
+    return min(5 * 2 ** attempts, 900)
+
+
+# ===============================
+# CLAIM BATCH
+# ===============================
+def claim_batch(conn, limit=BATCH_SIZE):
+    """
+    Ambil & kunci batch pesan jatuh tempo (aman untuk >1 dispatcher)
+    return: (rows, token) — token = claimed_at milik klaim ini
+    """
+    now = time.time()
+    cur = conn.cursor()
+
+    # COMMIT / ROLLBACK eksplisit: koneksi postgres autocommit
+    # → conn.commit() tidak menutup BEGIN manual
+    cur.execute(outbox.BEGIN_SQL)
+    try:
+        cur.execute(f"""
+            SELECT id, message, attempts, status
+            FROM alert_outbox
+            WHERE (status='pending' AND next_attempt_at <= ?)
+               OR (status='sending' AND claimed_at < ?)
+            ORDER BY id
+            LIMIT ?
+            {outbox.CLAIM_LOCK}
+        """, (now, now - CLAIM_TIMEOUT, limit))
+        rows = [dict(r) for r in cur.fetchall()]
+
+        # klaim kadaluarsa = dispatcher mati di tengah kirim → dihitung
+        # 1 percobaan (pesan yang bikin crash tidak diulang selamanya)
+        dead = []
+        for r in rows:
+            if r["status"] == "sending":
+                r["attempts"] += 1
+                if r["attempts"] >= MAX_ATTEMPTS:
+                    dead.append(r)
+
+        cur.executemany("""
+            UPDATE alert_outbox
+            SET status='failed', attempts=?, last_error='claim timeout'
+            WHERE id=?
+        """, [(r["attempts"], r["id"]) for r in dead])
+
+        dead_ids = {r["id"] for r in dead}
+        rows = [r for r in rows if r["id"] not in dead_ids]
+        cur.executemany("""
+            UPDATE alert_outbox
+            SET status='sending', claimed_at=?, attempts=?
+            WHERE id=?
+        """, [(now, r["attempts"], r["id"]) for r in rows])
+
+        cur.execute("COMMIT")
+    except Exception:
+        cur.execute("ROLLBACK")
+        raise
+
+    return rows, now
+
+
+def renew_claim(conn, row_id, token):
+    """
+    Perbarui klaim tepat sebelum kirim.
+    return: token baru, None kalau baris sudah diklaim dispatcher lain
+    """
+    now = time.time()
+    cur = conn.execute("""
+        UPDATE alert_outbox
+        SET claimed_at=?
+        WHERE id=? AND status='sending' AND claimed_at=?
+    """, (now, row_id, token))
+    return now if cur.rowcount == 1 else None
+
+
+def mark_sent(conn, row_id):
+    conn.execute("""
+        UPDATE alert_outbox
+        SET status='sent', sent_at=CURRENT_TIMESTAMP, last_error=NULL
+        WHERE id=?
+    """, (row_id,))
+
+
+def mark_retry(conn, row, error, delay=None):
+    attempts = row["attempts"] + 1
+
+    if attempts >= MAX_ATTEMPTS:
+        conn.execute("""
+            UPDATE alert_outbox
+            SET status='failed', attempts=?, last_error=?
+            WHERE id=?
+        """, (attempts, error, row["id"]))
+        return
+
+    conn.execute("""
+        UPDATE alert_outbox
+        SET status='pending', attempts=?, last_error=?, next_attempt_at=?
+        WHERE id=?
+    """, (attempts, error, time.time() + (delay or backoff(attempts)), row["id"]))
+
+
+def release(conn, rows, status="pending", error=None, delay=0):
+    conn.executemany("""
+        UPDATE alert_outbox
+        SET status=?, last_error=?, next_attempt_at=?
+        WHERE id=?
+    """, [(status, error, time.time() + delay, r["id"]) for r in rows])
+
+
+# ===============================
+# DISPATCHER
+# ===============================
+class Dispatcher:
+    def __init__(self):
+        self.paused_until = 0
+        self.last_send = 0
+
+    def _throttle(self):
+        wait = max(
+            self.paused_until - time.monotonic(),
+            self.last_send + SEND_INTERVAL - time.monotonic()
+        )
+        if wait > 0:
+            time.sleep(wait)
+
+    def run_once(self, conn):
+        """
+        Kirim 1 batch
+        return: jumlah pesan yang diproses
+        """
+        rows, token = claim_batch(conn)
+        if not rows:
+            return 0
+
+        cfg = telegram.get_config()
+        err = telegram.check_config(cfg)
+        if err:
+            # telegram mati / belum diset → jangan ditumpuk lalu dibanjirkan
+            release(conn, rows, status="dropped", error=err)
+            return len(rows)
+
+        for i, row in enumerate(rows):
+            self._throttle()
+
+            # batch lama (throttle / timeout HTTP) → klaim bisa lewat
+            # CLAIM_TIMEOUT; diambil alih dispatcher lain → jangan kirim ganda
+            if renew_claim(conn, row["id"], token) is None:
+                continue
+
+            # session bersama alerts.telegram → koneksi HTTPS dipakai ulang
+            ok, info, retry_after = telegram.post_message(cfg, row["message"])
+            self.last_send = time.monotonic()
+
+            if ok:
+                mark_sent(conn, row["id"])
+                continue
+
+            if retry_after:
+                # rate limit berlaku per chat → tahan semua pesan
+                self.paused_until = time.monotonic() + retry_after
+                mark_retry(conn, row, info, delay=retry_after)
+                release(conn, rows[i + 1:], delay=retry_after)
+                break
+
+            mark_retry(conn, row, info)
+
+        return len(rows)
+
+    def drain(self, conn, timeout=60):
+        """
+        Kirim semua pesan yang jatuh tempo (maks `timeout` detik)
+        """
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if not self.run_once(conn):
+                break
+
+    def run_forever(self, poll=POLL_INTERVAL):
+        conn = outbox.connect()
+        outbox.ensure_schema(conn)
+
+        while True:
+            try:
+                if not self.run_once(conn):
+                    time.sleep(poll)
+            except Exception as e:
+                print(f"[ALERT] dispatcher error: {e}")
+                time.sleep(poll)
+
+
+def start_thread():
+    """
+    Dispatcher di thread proses ini, hanya kalau ALERT_DISPATCHER=dashboard
+    """
+    if ALERT_DISPATCHER != "dashboard":
+        return None
+
+    t = threading.Thread(
+        target=Dispatcher().run_forever,
+        name="alert-dispatcher",
+        daemon=True
+    )
+    t.start()
+    return t
+
+
+def drain(timeout=60):
+    conn = outbox.connect()
+    try:
+        outbox.ensure_schema(conn)
+        Dispatcher().drain(conn, timeout=timeout)
+    finally:
+        conn.close()
+
+
+def main():
+    """
+    Entry point service alert-dispatcher
+    mode lain sudah punya pengirim (sync_runner / dashboard) → jangan kirim
+    ganda, cukup diam; service butuh SYNC_DB=postgres (outbox sqlite ada di
+    file lokal proses sync, tidak terlihat dari container ini)
+    """
+    if ALERT_DISPATCHER != "service":
+        reason = f"ALERT_DISPATCHER={ALERT_DISPATCHER}, pengirim = {ALERT_DISPATCHER}"
+    elif SYNC_DB != "postgres":
+        reason = f"ALERT_DISPATCHER=service butuh SYNC_DB=postgres (sekarang {SYNC_DB})"
+    else:
+        Dispatcher().run_forever()
+        return
+
+    # idle, bukan exit → restart: unless-stopped tidak jadi loop restart
+    print(f"[ALERT] dispatcher tidak aktif: {reason}", flush=True)
+    while True:
+        time.sleep(3600)
+
+
+if __name__ == "__main__":
+    main()
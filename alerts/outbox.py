@@ -0,0 +1,66 @@
+import os
+import time
+import sqlite3
+
+from db.db import SYNC_DB, get_db
+
+# ===============================
+# PATH & DB (sama dengan sync_core)
+# ===============================
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_PATH = os.path.join(BASE_DIR, "data", "dashboard.db")
+
+# status: pending → sending → sent / failed / dropped
+OUTBOX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS alert_outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    olt_id INTEGER,
+    message TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL DEFAULT 0,
+    claimed_at REAL,
+    last_error TEXT,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    sent_at DATETIME
+);
+
+CREATE INDEX IF NOT EXISTS idx_alert_outbox_status
+    ON alert_outbox (status, next_attempt_at);
+"""
+
+
+# postgres: tabel dibuat db/init.sql, klaim batch pakai row lock
+# (dispatcher di beberapa worker tidak saling tunggu / kirim ganda)
+if SYNC_DB == "postgres":
+    BEGIN_SQL = "BEGIN"
+    CLAIM_LOCK = "FOR UPDATE SKIP LOCKED"
+else:
+    BEGIN_SQL = "BEGIN IMMEDIATE"
+    CLAIM_LOCK = ""
+
+
+def connect():
+    if SYNC_DB == "postgres":
+        return get_db()
+
+    conn = sqlite3.connect(DB_PATH, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA busy_timeout=30000;")
+    return conn
+
+
+def ensure_schema(conn):
+    if SYNC_DB != "postgres":
+        conn.executescript(OUTBOX_SCHEMA)
+
+
+def enqueue(cur, messages, olt_id=None):
+    """
+    Simpan pesan ke outbox (ikut transaksi cur, TANPA kirim HTTP)
+    """
+    if messages:
+        cur.executemany("""
+            INSERT INTO alert_outbox (olt_id, message, next_attempt_at)
+            VALUES (?, ?, ?)
+        """, [(olt_id, m, time.time()) for m in messages])
@@ -1,7 +1,22 @@
+import os
+import time
+import threading
+
 import requests
 from db.db import get_db
 
-def get_config():
+# config di-cache per proses, dibaca ulang setelah TTL
+# atau saat invalidate_config() (simpan /settings/telegram)
+CONFIG_TTL = float(os.environ.get("TELEGRAM_CONFIG_TTL", 60))
+
+_config_lock = threading.Lock()
+_config_cache = {"value": None, "expires": 0}
+
+# 1 session untuk semua request ke api.telegram.org (keep-alive)
+_session = requests.Session()
+
+
+def load_config():
     conn = get_db()
     cfg = conn.execute("""
         SELECT enabled, bot_token, chat_id
@@ -9,21 +24,49 @@ def get_config():
         WHERE id=1
     """).fetchone()
     conn.close()
-    return cfg
+    return dict(cfg) if cfg else None
 
 
-def send(message: str):
-    cfg = get_config()
+def get_config():
+    now = time.monotonic()
+
+    with _config_lock:
+        if now < _config_cache["expires"]:
+            return _config_cache["value"]
+
+        cfg = load_config()
+        _config_cache["value"] = cfg
+        _config_cache["expires"] = now + CONFIG_TTL
+        return cfg
+
+
+def invalidate_config():
+    with _config_lock:
+        _config_cache["expires"] = 0
 
+
+def check_config(cfg):
+    """
+    return: None kalau config siap kirim, selain itu alasan (str)
+    """
     if not cfg:
-        return False, "Config not found"
+        return "Config not found"
 
     if not cfg["enabled"]:
-        return False, "Telegram disabled"
+        return "Telegram disabled"
 
     if not cfg["bot_token"] or not cfg["chat_id"]:
-        return False, "Token / Chat ID kosong"
+        return "Token / Chat ID kosong"
+
+    return None
+
 
+def post_message(cfg, message: str, session=None):
+    """
+    Kirim 1 pesan dengan config yang sudah dicek
+    return: (ok, info, retry_after)
+    retry_after = detik dari Telegram kalau kena rate limit (429)
+    """
     url = f"https://api.telegram.org/bot{cfg['bot_token']}/sendMessage"
     payload = {
         "chat_id": cfg["chat_id"],
@@ -31,11 +74,32 @@ def send(message: str):
         "parse_mode": "HTML"
     }
 
+    http = session or _session
+
     try:
-        r = requests.post(url, data=payload, timeout=5)
-        if r.status_code == 200:
-            return True, "Message sent"
-        else:
-            return False, r.text
+        r = http.post(url, data=payload, timeout=5)
     except Exception as e:
-        return False, str(e)
+        return False, str(e), None
+
+    if r.status_code == 200:
+        return True, "Message sent", None
+
+    retry_after = None
+    if r.status_code == 429:
+        try:
+            retry_after = int(r.json()["parameters"]["retry_after"])
+        except Exception:
+            retry_after = 5
+
+    return False, r.text, retry_after
+
+
+def send(message: str, session=None):
+    cfg = get_config()
+
+    err = check_config(cfg)
+    if err:
+        return False, err
+
+    ok, info, _ = post_message(cfg, message, session=session)
+    return ok, info
@@ -0,0 +1,281 @@
+import os
+import re
+import time
+import errno
+import select
+import socket
+import struct
+import platform
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+# ===============================
+# BATCH ICMP ECHO (1 SOCKET, BANYAK HOST)
+# ===============================
+# Semua echo request dikirim dari 1 socket, balasan dikumpulkan
+# async (select) dan dicocokkan per (ip, seq) → 1 batch ratusan host
+# selesai dalam 1 jendela timeout, tanpa fork `ping` per host.
+#
+# Urutan socket:
+#   1. SOCK_DGRAM + IPPROTO_ICMP  (unprivileged, Linux: net.ipv4.ping_group_range)
+#   2. SOCK_RAW                   (root / CAP_NET_RAW)
+#   3. fallback subprocess `ping` paralel (kalau dua-duanya ditolak)
+
+ICMP_ECHO_REPLY = 0
+ICMP_ECHO_REQUEST = 8
+
+TIMEOUT = float(os.environ.get("ICMP_TIMEOUT", 1.5))
+# jeda antar paket (detik) → hindari burst ke switch / rate limit ICMP
+SEND_INTERVAL = float(os.environ.get("ICMP_SEND_INTERVAL", 0.0005))
+FALLBACK_WORKERS = int(os.environ.get("ICMP_FALLBACK_WORKERS", 32))
+
+PAYLOAD = b"fams-icmp-probe\x00" * 2
+
+RTT_RE = re.compile(r"time[=<]\s*([\d.]+)\s*ms")
+
+
+def host_ip(host):
+    # support ip atau ip:port
+    return host.split(":")[0]
+
+
+def checksum(data):
+    if len(data) % 2:
+        data += b"\x00"
+    total = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+
+def build_echo(ident, seq, payload=PAYLOAD):
+    header = struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, 0, ident, seq)
+    csum = checksum(header + payload)
+    return struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, csum, ident, seq) + payload
+
+
+def open_socket():
+    """
+    return: (socket, raw) — raw=True kalau paket balasan berisi header IP
+    raise PermissionError kalau ICMP socket tidak diizinkan
+    """
+    try:
+        return socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_ICMP), False
+    except OSError:
+        pass
+
+    try:
+        return socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_ICMP), True
+    except OSError as e:
+        raise PermissionError(f"ICMP socket tidak diizinkan: {e}") from e
+
+
+def _parse_reply(packet, raw):
+    """
+    return: (ident, seq) atau None kalau bukan echo reply
+    """
+    if raw:
+        packet = packet[(packet[0] & 0x0F) * 4:]
+    if len(packet) < 8:
+        return None
+
+    icmp_type, _, _, ident, seq = struct.unpack("!BBHHH", packet[:8])
+    if icmp_type != ICMP_ECHO_REPLY:
+        return None
+    return ident, seq
+
+
+def _resolve(hosts):
+    """
+    return: {host: ip / None}
+    """
+    resolved = {}
+    for host in hosts:
+        try:
+            resolved[host] = socket.gethostbyname(host_ip(host))
+        except OSError:
+            resolved[host] = None
+    return resolved
+
+
+def _summary(sent, rtts):
+    recv = len(rtts)
+    return {
+        "sent": sent,
+        "recv": recv,
+        "loss": 1.0 - recv / sent if sent else 1.0,
+        "rtt_min": min(rtts) if rtts else None,
+        "rtt_avg": sum(rtts) / recv if rtts else None,
+        "rtt_max": max(rtts) if rtts else None,
+    }
+
+
+# ===============================
+# PROBE (SOCKET)
+# ===============================
+def probe_socket(hosts, count=1, timeout=TIMEOUT, send_interval=SEND_INTERVAL):
+    """
+    Kirim `count` echo ke semua host dari 1 socket.
+
+    return: {host: {sent, recv, loss, rtt_min, rtt_avg, rtt_max}} (rtt dalam ms)
+    """
+    hosts = list(dict.fromkeys(hosts))
+    resolved = _resolve(hosts)
+    sock, raw = open_socket()
+
+    # DGRAM: kernel mengganti ident dengan port socket & memfilter balasan
+    # RAW  : semua ICMP masuk → filter pakai ident proses
+    ident = os.getpid() & 0xFFFF
+
+    pending = {}   # (ip, seq) → (host, waktu kirim)
+    rtts = {host: [] for host in hosts}
+    sent = {host: 0 for host in hosts}
+    seq = 0
+
+    def drain():
+        # baca semua balasan yang sudah masuk (non-blocking)
+        while True:
+            try:
+                packet, addr = sock.recvfrom(2048)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError as e:
+                if e.errno == errno.EAGAIN:
+                    return
+                raise
+
+            parsed = _parse_reply(packet, raw)
+            if not parsed:
+                continue
+            reply_ident, reply_seq = parsed
+            if raw and reply_ident != ident:
+                continue
+
+            item = pending.pop((addr[0], reply_seq), None)
+            if item:
+                host, t0 = item
+                rtts[host].append((time.monotonic() - t0) * 1000)
+
+    try:
+        sock.setblocking(False)
+
+        for _ in range(count):
+            for host in hosts:
+                ip = resolved[host]
+                if not ip:
+                    sent[host] += 1
+                    continue
+
+                seq = (seq + 1) & 0xFFFF
+                sent[host] += 1
+                try:
+                    sock.sendto(build_echo(ident, seq), (ip, 0))
+                except BlockingIOError:
+                    # buffer kirim penuh → tunggu sebentar, coba sekali lagi
+                    select.select([], [sock], [], timeout)
+                    try:
+                        sock.sendto(build_echo(ident, seq), (ip, 0))
+                    except OSError:
+                        continue
+                except OSError:
+                    # host unreachable / network down → dihitung loss
+                    continue
+
+                pending[(ip, seq)] = (host, time.monotonic())
+
+                # balasan dibaca sambil kirim → RTT tidak ikut waktu kirim batch
+                drain()
+                if send_interval:
+                    time.sleep(send_interval)
+
+        deadline = time.monotonic() + timeout
+        while pending:
+            wait = deadline - time.monotonic()
+            if wait <= 0:
+                break
+
+            ready, _, _ = select.select([sock], [], [], wait)
+            if not ready:
+                break
+            drain()
+    finally:
+        sock.close()
+
+    return {host: _summary(sent[host], rtts[host]) for host in hosts}
+
+
+# ===============================
+# FALLBACK: SUBPROCESS PING
+# ===============================
+def ping_once(host, timeout=TIMEOUT):
+    """
+    1x `ping` (proses terpisah)
+    return: RTT (ms) atau None kalau tidak reply
+    """
+    windows = platform.system().lower() == "windows"
+    cmd = ["ping", "-n" if windows else "-c", "1", host_ip(host)]
+
+    try:
+        res = subprocess.run(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            timeout=timeout + 1
+        )
+    except Exception:
+        return None
+
+    if res.returncode != 0:
+        return None
+
+    m = RTT_RE.search(res.stdout)
+    return float(m.group(1)) if m else 0.0
+
+
+def probe_subprocess(hosts, count=1, timeout=TIMEOUT, workers=FALLBACK_WORKERS):
+    hosts = list(dict.fromkeys(hosts))
+    if not hosts:
+        return {}
+
+    def run(host):
+        rtts = [ping_once(host, timeout) for _ in range(count)]
+        return _summary(count, [r for r in rtts if r is not None])
+
+    with ThreadPoolExecutor(max_workers=min(workers, len(hosts))) as pool:
+        return dict(zip(hosts, pool.map(run, hosts)))
+
+
+# ===============================
+# API
+# ===============================
+_socket_denied = {"value": False}
+
+
+def probe(hosts, count=1, timeout=TIMEOUT):
+    """
+    return: {host: {sent, recv, loss, rtt_min, rtt_avg, rtt_max}}
+    Pakai socket ICMP kalau bisa, kalau tidak → subprocess ping.
+    """
+    hosts = list(hosts)
+    if not hosts:
+        return {}
+
+    if not _socket_denied["value"]:
+        try:
+            return probe_socket(hosts, count=count, timeout=timeout)
+        except PermissionError as e:
+            print(f"[ICMP] {e} → fallback subprocess ping")
+            _socket_denied["value"] = True
+
+    return probe_subprocess(hosts, count=count, timeout=timeout)
+
+
+def probe_hosts(hosts, timeout=TIMEOUT):
+    """
+    return: {host: rtt_ms / None}
+    """
+    return {
+        host: res["rtt_avg"]
+        for host, res in probe(hosts, timeout=timeout).items()
+    }
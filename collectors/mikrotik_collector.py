@@ -1,51 +1,113 @@
-from pysnmp.hlapi import *
+#!/usr/bin/env python3
+import os
+import sys
+import re
+import time
+import asyncio
+
+# ===============================
+# PROJECT ROOT PATH
+# ===============================
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
 from db.db import get_db
+from collectors import snmp_async
+
+# ===============================
+# OID SISTEM (1 GET PDU PER ROUTER)
+# ===============================
+OID_SYS_DESCR = "1.3.6.1.2.1.1.1.0"
+OID_SYS_UPTIME = "1.3.6.1.2.1.1.3.0"
+OID_SYS_NAME = "1.3.6.1.2.1.1.5.0"
+
+SYSTEM_OIDS = (OID_SYS_DESCR, OID_SYS_UPTIME, OID_SYS_NAME)
+
+
+def ros_version(sys_descr):
+    match = re.search(r"RouterOS\s+([\d\.]+)", sys_descr or "")
+    return match.group(1) if match else None
+
+
+def system_row(router_id, values):
+    sys_descr = values[OID_SYS_DESCR]
+    sys_uptime = values[OID_SYS_UPTIME]
+    sys_descr = None if sys_descr is None else str(sys_descr)
 
-def snmp_get(host, community, port, oid):
-    it = getCmd(
-        SnmpEngine(),
-        CommunityData(community, mpModel=1),
-        UdpTransportTarget((host, port), timeout=2, retries=1),
-        ContextData(),
-        ObjectType(ObjectIdentity(oid))
+    return (
+        None if values[OID_SYS_NAME] is None else str(values[OID_SYS_NAME]),
+        sys_descr,
+        None if sys_uptime is None else int(sys_uptime),
+        ros_version(sys_descr),
+        router_id,
     )
-    eInd, eStat, eIdx, varBinds = next(it)
-    if eInd or eStat:
-        raise Exception(eInd or eStat.prettyPrint())
-    return varBinds[0][1]
+
+
+# ===============================
+# POLL SEMUA ROUTER (ASYNC, 1 ENGINE)
+# ===============================
+async def poll_routers(routers, concurrency=snmp_async.SNMP_CONCURRENCY):
+    """
+    return: list (router, values | Exception)
+    """
+    engine = snmp_async.new_engine()
+
+    async def poll(r):
+        return await snmp_async.get(
+            engine,
+            r["host"],
+            r["snmp_community"],
+            SYSTEM_OIDS,
+            port=r["snmp_port"] or 161
+        )
+
+    try:
+        results = await snmp_async.gather_limited(poll, routers, concurrency)
+    finally:
+        snmp_async.close_engine(engine)
+
+    return list(zip(routers, results))
+
 
 def run():
     conn = get_db()
     cur = conn.cursor()
 
-    routers = cur.execute("""
-        SELECT id, host, snmp_community, snmp_port
-        FROM mikrotik_devices
-        WHERE enabled=1
-    """).fetchall()
-
-    for r in routers:
-        try:
-            sys_name   = str(snmp_get(r["host"], r["snmp_community"], r["snmp_port"], "1.3.6.1.2.1.1.5.0"))
-            sys_descr  = str(snmp_get(r["host"], r["snmp_community"], r["snmp_port"], "1.3.6.1.2.1.1.1.0"))
-            sys_uptime = int(snmp_get(r["host"], r["snmp_community"], r["snmp_port"], "1.3.6.1.2.1.1.3.0"))
-
-            cur.execute("""
-                UPDATE mikrotik_devices
-                SET
-                    sys_name   = ?,
-                    sys_descr  = ?,
-                    sys_uptime = ?,
-                    last_seen  = CURRENT_TIMESTAMP
-                WHERE id = ?
-            """, (sys_name, sys_descr, sys_uptime, r["id"]))
+    try:
+        routers = cur.execute("""
+            SELECT id, host, snmp_community, snmp_port
+            FROM mikrotik_devices
+            WHERE enabled=1
+        """).fetchall()
 
+        start = time.monotonic()
+        results = asyncio.run(poll_routers(routers))
+
+        rows = []
+        for r, values in results:
+            if isinstance(values, Exception):
+                print(f"[FAIL] {r['host']} → {values}")
+                continue
+            rows.append(system_row(r["id"], values))
             print(f"[OK] {r['host']}")
 
-        except Exception as e:
-            print(f"[FAIL] {r['host']} → {e}")
+        cur.executemany("""
+            UPDATE mikrotik_devices
+            SET
+                sys_name    = ?,
+                sys_descr   = ?,
+                sys_uptime  = ?,
+                ros_version = COALESCE(?, ros_version),
+                last_seen   = CURRENT_TIMESTAMP
+            WHERE id = ?
+        """, rows)
+
+        print(f"[SNMP] {len(rows)}/{len(routers)} router OK "
+              f"({time.monotonic() - start:.1f}s)")
+    finally:
+        conn.close()
 
-    conn.close()
 
 if __name__ == "__main__":
     run()
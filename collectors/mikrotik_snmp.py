@@ -1,97 +1,149 @@
-from pysnmp.hlapi import *
-import sqlite3
-
-ROUTER_IP = "172.16.81.1"
-COMMUNITY = "dashboard"
-DB_PATH = "data/dashboard.db"
-
-def walk(oid):
-    for (eInd, eStat, eIdx, varBinds) in nextCmd(
-        SnmpEngine(),
-        CommunityData(COMMUNITY),
-        UdpTransportTarget((ROUTER_IP, 161), timeout=2, retries=1),
-        ContextData(),
-        ObjectType(ObjectIdentity(oid)),
-        lexicographicMode=False
-    ):
-        if eInd or eStat:
-            return
-        for vb in varBinds:
-            yield vb
-
-interfaces = {}
-
-# Nama interface
-for oid, val in walk("1.3.6.1.2.1.2.2.1.2"):
-    idx = oid.prettyPrint().split('.')[-1]
-    interfaces[idx] = {"name": str(val)}
-
-# RX
-for oid, val in walk("1.3.6.1.2.1.31.1.1.1.6"):
-    idx = oid.prettyPrint().split('.')[-1]
-    interfaces.setdefault(idx, {})["rx"] = int(val)
-
-# TX
-for oid, val in walk("1.3.6.1.2.1.31.1.1.1.10"):
-    idx = oid.prettyPrint().split('.')[-1]
-    interfaces.setdefault(idx, {})["tx"] = int(val)
-
-conn = sqlite3.connect(DB_PATH, timeout=10)
-cur = conn.cursor()
-
-for i in interfaces.values():
-    name = i.get("name", "")
-    lname = name.lower()
-
-    if "pppoe-" not in lname:
-        continue
-
-    # contoh name: <pppoe-lukman@khasnetwork.com>
-    clean = name.strip("<>")          # pppoe-lukman@khasnetwork.com
-    clean = clean.replace("pppoe-", "")  # lukman@khasnetwork.com
-
-    username = clean.strip()
+#!/usr/bin/env python3
+import os
+import sys
+import time
+import asyncio
+
+# ===============================
+# PROJECT ROOT PATH
+# ===============================
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from db.db import get_db
+from collectors import snmp_async
+
+# ===============================
+# KOLOM IF-MIB (DI-WALK BERSAMA, GETBULK)
+# ===============================
+OID_IF_DESCR = "1.3.6.1.2.1.2.2.1.2"
+OID_IF_HC_IN = "1.3.6.1.2.1.31.1.1.1.6"
+OID_IF_HC_OUT = "1.3.6.1.2.1.31.1.1.1.10"
+
+IF_COLUMNS = (OID_IF_DESCR, OID_IF_HC_IN, OID_IF_HC_OUT)
+
+
+def pppoe_username(name):
+    """
+    contoh name: <pppoe-lukman@khasnetwork.com> → lukman@khasnetwork.com
+    bukan interface PPPoE / tanpa domain → None
+    """
+    if "pppoe-" not in name.lower():
+        return None
+
+    username = name.strip("<>").replace("pppoe-", "").strip()
 
     # proteksi
     if "@" not in username:
-        continue
-
-    cur.execute("""
-        INSERT INTO pppoe_active
-        (router_id, username, interface, rx_bytes, tx_bytes)
-        VALUES (1, ?, ?, ?, ?)
-        ON CONFLICT(router_id, username)
-        DO UPDATE SET
-            rx_bytes=excluded.rx_bytes,
-            tx_bytes=excluded.tx_bytes,
-            last_update=CURRENT_TIMESTAMP
-    """, (
-        username,
-        name,
-        i.get("rx", 0),
-        i.get("tx", 0)
-    ))
-
-
-    username = i["name"].replace("pppoe-", "")
-
-    cur.execute("""
-        INSERT INTO pppoe_active
-        (router_id, username, interface, rx_bytes, tx_bytes)
-        VALUES (1, ?, ?, ?, ?)
-        ON CONFLICT(router_id, username)
-        DO UPDATE SET
-            rx_bytes=excluded.rx_bytes,
-            tx_bytes=excluded.tx_bytes,
-            last_update=CURRENT_TIMESTAMP
-    """, (
-        username,
-        i["name"],
-        i.get("rx", 0),
-        i.get("tx", 0)
-    ))
-
-conn.commit()
-conn.close()
-
-print("✔ PPPoE SNMP sync done")
+        return None
+    return username
+
+
+def pppoe_rows(router_id, table):
+    """
+    hasil bulk_walk → baris pppoe_active
+    (router_id, username, interface, rx_bytes, tx_bytes)
+    """
+    rx = table[OID_IF_HC_IN]
+    tx = table[OID_IF_HC_OUT]
+
+    rows = {}
+    for idx, descr in table[OID_IF_DESCR].items():
+        name = str(descr)
+        username = pppoe_username(name)
+        if username is None:
+            continue
+
+        rows[username] = (
+            router_id,
+            username,
+            name,
+            int(rx[idx]) if idx in rx else 0,
+            int(tx[idx]) if idx in tx else 0,
+        )
+    return list(rows.values())
+
+
+# ===============================
+# POLL SEMUA ROUTER (ASYNC, 1 ENGINE)
+# ===============================
+async def poll_routers(routers, concurrency=snmp_async.SNMP_CONCURRENCY,
+                       max_repetitions=snmp_async.SNMP_MAX_REPETITIONS):
+    """
+    return: list (router, tabel interface | Exception)
+    """
+    engine = snmp_async.new_engine()
+
+    async def poll(r):
+        return await snmp_async.bulk_walk(
+            engine,
+            r["host"],
+            r["snmp_community"],
+            IF_COLUMNS,
+            port=r["snmp_port"] or 161,
+            max_repetitions=max_repetitions
+        )
+
+    try:
+        results = await snmp_async.gather_limited(poll, routers, concurrency)
+    finally:
+        snmp_async.close_engine(engine)
+
+    return list(zip(routers, results))
+
+
+def save_pppoe(cur, rows):
+    # 1 transaksi per router (koneksi pool autocommit)
+    cur.execute("BEGIN")
+    try:
+        cur.executemany("""
+            INSERT INTO pppoe_active
+            (router_id, username, interface, rx_bytes, tx_bytes)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(router_id, username)
+            DO UPDATE SET
+                interface=excluded.interface,
+                rx_bytes=excluded.rx_bytes,
+                tx_bytes=excluded.tx_bytes,
+                last_update=CURRENT_TIMESTAMP
+        """, rows)
+        cur.execute("COMMIT")
+    except Exception:
+        cur.execute("ROLLBACK")
+        raise
+
+
+def run():
+    conn = get_db()
+    cur = conn.cursor()
+
+    try:
+        routers = cur.execute("""
+            SELECT id, host, snmp_community, snmp_port
+            FROM mikrotik_devices
+            WHERE enabled=1
+        """).fetchall()
+
+        start = time.monotonic()
+        results = asyncio.run(poll_routers(routers))
+
+        ok = 0
+        for r, table in results:
+            if isinstance(table, Exception):
+                print(f"[FAIL] {r['host']} → {table}")
+                continue
+
+            rows = pppoe_rows(r["id"], table)
+            save_pppoe(cur, rows)
+            ok += 1
+            print(f"[OK] {r['host']} → {len(rows)} PPPoE")
+
+        print(f"✔ PPPoE SNMP sync done: {ok}/{len(routers)} router "
+              f"({time.monotonic() - start:.1f}s)")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    run()
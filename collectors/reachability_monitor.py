@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+import os
+import sys
+import time
+
+# ===============================
+# PROJECT ROOT PATH
+# ===============================
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from db.db import get_db
+from collectors.icmp_probe import host_ip, probe_hosts
+
+# ===============================
+# CONFIG
+# ===============================
+INTERVAL = float(os.environ.get("REACH_INTERVAL", 30))
+TIMEOUT = float(os.environ.get("REACH_TIMEOUT", 2))
+
+
+# ===============================
+# TARGET & SIMPAN STATUS
+# ===============================
+def load_targets(cur):
+    """
+    return: list (kind, device_id, host)
+    """
+    targets = []
+
+    cur.execute("SELECT id, host FROM olt_devices WHERE is_active = 1")
+    targets += [("olt", r["id"], r["host"]) for r in cur.fetchall()]
+
+    cur.execute("SELECT id, host FROM mikrotik_devices WHERE enabled = 1")
+    targets += [("mikrotik", r["id"], r["host"]) for r in cur.fetchall()]
+
+    return targets
+
+
+def save_results(cur, targets, rtts):
+    cur.executemany("""
+        INSERT INTO device_reachability
+            (kind, device_id, host, is_up, rtt_ms, last_check, last_seen)
+        VALUES (
+            %s, %s, %s, %s, %s,
+            CURRENT_TIMESTAMP,
+            CASE WHEN %s = 1 THEN CURRENT_TIMESTAMP END
+        )
+        ON CONFLICT (kind, device_id) DO UPDATE SET
+            host = EXCLUDED.host,
+            is_up = EXCLUDED.is_up,
+            rtt_ms = EXCLUDED.rtt_ms,
+            last_check = EXCLUDED.last_check,
+            last_seen = COALESCE(EXCLUDED.last_seen, device_reachability.last_seen)
+    """, [
+        (kind, device_id, host, up, rtt, up)
+        for kind, device_id, host in targets
+        for rtt in [rtts.get(host_ip(host))]
+        for up in [0 if rtt is None else 1]
+    ])
+
+
+def run_once():
+    conn = get_db()
+    cur = conn.cursor()
+
+    try:
+        targets = load_targets(cur)
+        # 1 batch ICMP untuk semua host (collectors/icmp_probe.py)
+        rtts = probe_hosts({host_ip(h) for _, _, h in targets}, timeout=TIMEOUT)
+        save_results(cur, targets, rtts)
+        return targets, rtts
+    finally:
+        cur.close()
+        conn.close()
+
+
+def run_forever(interval=INTERVAL):
+    while True:
+        start = time.monotonic()
+        try:
+            targets, rtts = run_once()
+            up = sum(1 for rtt in rtts.values() if rtt is not None)
+            print(f"[REACH] {up}/{len(rtts)} host up ({time.monotonic() - start:.1f}s)")
+        except Exception as e:
+            print(f"[REACH] error: {e}")
+
+        time.sleep(max(0, interval - (time.monotonic() - start)))
+
+
+if __name__ == "__main__":
+    run_forever()
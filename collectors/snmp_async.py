@@ -0,0 +1,226 @@
+import os
+import asyncio
+
+# ===============================
+# PYSNMP ASYNCIO (KOMPATIBEL LINTAS VERSI)
+# ===============================
+# pysnmp >= 6.2 : get_cmd / bulk_cmd, UdpTransportTarget.create() (async)
+# pysnmp lama   : getCmd / bulkCmd, UdpTransportTarget(...) biasa
+try:
+    from pysnmp.hlapi.v3arch.asyncio import (
+        SnmpEngine,
+        CommunityData,
+        UdpTransportTarget,
+        ContextData,
+        ObjectType,
+        ObjectIdentity,
+        get_cmd,
+        bulk_cmd,
+    )
+except ImportError:
+    from pysnmp.hlapi.asyncio import (
+        SnmpEngine,
+        CommunityData,
+        UdpTransportTarget,
+        ContextData,
+        ObjectType,
+        ObjectIdentity,
+        getCmd as get_cmd,
+        bulkCmd as bulk_cmd,
+    )
+
+from pysnmp.proto.rfc1905 import NoSuchObject, NoSuchInstance, EndOfMibView
+
+# ===============================
+# UJI TANPA ROUTER (SNMPSIM)
+# ===============================
+# pip install snmpsim
+# snmpsim-command-responder --data-dir=collectors/snmpsim \
+#     --agent-udpv4-endpoint=127.0.0.1:1161
+# → router host 127.0.0.1, port 1161, community "mikrotik"
+
+SNMP_TIMEOUT = float(os.environ.get("SNMP_TIMEOUT", 2))
+SNMP_RETRIES = int(os.environ.get("SNMP_RETRIES", 1))
+# router yang di-poll bersamaan
+SNMP_CONCURRENCY = int(os.environ.get("SNMP_CONCURRENCY", 32))
+# baris per kolom per GETBULK; varbind per respons = kolom x nilai ini
+# (jaga di bawah batas agent, mis. snmpsim 64, dan MTU / ukuran PDU)
+SNMP_MAX_REPETITIONS = int(os.environ.get("SNMP_MAX_REPETITIONS", 20))
+
+_MISSING = (NoSuchObject, NoSuchInstance, EndOfMibView)
+
+
+class SnmpError(Exception):
+    pass
+
+
+# ===============================
+# ENGINE & TRANSPORT
+# ===============================
+def new_engine():
+    """
+    1 engine dipakai semua request dalam 1 event loop
+    (bukan SnmpEngine() baru per OID)
+    """
+    return SnmpEngine()
+
+
+def close_engine(engine):
+    try:
+        if hasattr(engine, "close_dispatcher"):
+            engine.close_dispatcher()
+        else:
+            engine.transportDispatcher.closeDispatcher()
+    except Exception:
+        pass
+
+
+async def transport(host, port=161, timeout=SNMP_TIMEOUT, retries=SNMP_RETRIES):
+    if hasattr(UdpTransportTarget, "create"):
+        return await UdpTransportTarget.create((host, port), timeout=timeout, retries=retries)
+    return UdpTransportTarget((host, port), timeout=timeout, retries=retries)
+
+
+def community_data(community):
+    # SNMP v2c (GETBULK butuh v2c)
+    return CommunityData(community, mpModel=1)
+
+
+def _check(error_indication, error_status, error_index):
+    if error_indication:
+        raise SnmpError(str(error_indication))
+    if error_status:
+        raise SnmpError(f"{error_status.prettyPrint()} (index {int(error_index)})")
+
+
+# ===============================
+# GET (BANYAK OID, 1 PDU)
+# ===============================
+async def get(engine, host, community, oids, port=161,
+              timeout=SNMP_TIMEOUT, retries=SNMP_RETRIES):
+    """
+    return: {oid: nilai pyasn1}, OID yang tidak ada → None
+    """
+    result = await get_cmd(
+        engine,
+        community_data(community),
+        await transport(host, port, timeout, retries),
+        ContextData(),
+        *[ObjectType(ObjectIdentity(oid)) for oid in oids],
+        lookupMib=False
+    )
+    error_indication, error_status, error_index, var_binds = result
+    _check(error_indication, error_status, error_index)
+
+    values = {str(name): None if isinstance(value, _MISSING) else value
+              for name, value in var_binds}
+    return {oid: values.get(oid) for oid in oids}
+
+
+def get_sync(host, community, oids, port=161,
+             timeout=SNMP_TIMEOUT, retries=SNMP_RETRIES):
+    """
+    Versi blocking untuk route Flask (1 router, 1 PDU)
+    """
+    async def _run():
+        engine = new_engine()
+        try:
+            return await get(engine, host, community, oids, port, timeout, retries)
+        finally:
+            close_engine(engine)
+
+    return asyncio.run(_run())
+
+
+# ===============================
+# WALK KOLOM TABEL (GETBULK)
+# ===============================
+def _oid(oid):
+    return tuple(int(x) for x in str(oid).strip(".").split("."))
+
+
+def _flat(var_binds):
+    # pysnmp lama: tabel [[varbind, ...], ...], pysnmp baru: list datar
+    if var_binds and isinstance(var_binds[0], list):
+        return [vb for row in var_binds for vb in row]
+    return list(var_binds)
+
+
+async def bulk_walk(engine, host, community, columns, port=161,
+                    max_repetitions=SNMP_MAX_REPETITIONS,
+                    timeout=SNMP_TIMEOUT, retries=SNMP_RETRIES):
+    """
+    Walk beberapa kolom tabel sekaligus: 1 GETBULK berisi semua kolom
+    yang belum selesai, lanjut dari OID terakhir masing-masing kolom
+    (bukan GETNEXT per OID / walk terpisah per kolom).
+
+    columns : OID kolom, mis. ("1.3.6.1.2.1.2.2.1.2", ...)
+    return  : {kolom: {index: nilai pyasn1}}, index = sufiks OID ("12")
+    """
+    auth = community_data(community)
+    target = await transport(host, port, timeout, retries)
+
+    prefixes = {col: _oid(col) for col in columns}
+    table = {col: {} for col in columns}
+    # kolom belum selesai → OID terakhir yang diterima
+    cursor = dict(prefixes)
+
+    while cursor:
+        active = list(cursor)
+        result = await bulk_cmd(
+            engine,
+            auth,
+            target,
+            ContextData(),
+            0, max_repetitions,
+            *[ObjectType(ObjectIdentity(".".join(map(str, cursor[col]))))
+              for col in active],
+            lookupMib=False
+        )
+        error_indication, error_status, error_index, var_binds = result
+        _check(error_indication, error_status, error_index)
+
+        var_binds = _flat(var_binds)
+        if not var_binds:
+            break
+
+        # respons urut per baris: [kol1, kol2, kol3, kol1, kol2, kol3, ...]
+        done = set()
+        for i, (name, value) in enumerate(var_binds):
+            col = active[i % len(active)]
+            if col in done:
+                continue
+
+            oid = _oid(name)
+            prefix = prefixes[col]
+            if (isinstance(value, _MISSING)
+                    or oid[:len(prefix)] != prefix
+                    or oid <= cursor[col]):
+                # lewat ujung kolom / agent tidak maju → kolom selesai
+                done.add(col)
+                continue
+
+            table[col][".".join(map(str, oid[len(prefix):]))] = value
+            cursor[col] = oid
+
+        for col in done:
+            del cursor[col]
+
+    return table
+
+
+# ===============================
+# POLL BANYAK ROUTER SEKALIGUS
+# ===============================
+async def gather_limited(fn, items, concurrency=SNMP_CONCURRENCY):
+    """
+    fn(item) coroutine dijalankan paralel (maks `concurrency`)
+    return: list hasil / exception, urutan sama dengan items
+    """
+    sem = asyncio.Semaphore(concurrency)
+
+    async def _one(item):
+        async with sem:
+            return await fn(item)
+
+    return await asyncio.gather(*[_one(i) for i in items], return_exceptions=True)
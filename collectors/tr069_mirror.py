@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+import os
+import sys
+import time
+
+# ===============================
+# PROJECT ROOT PATH
+# ===============================
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from db.db import get_db
+import genieacs_client
+
+# ===============================
+# CONFIG
+# ===============================
+# mirror lokal device GenieACS → halaman TR-069 baca tabel tr069_devices,
+# tidak lagi menunggu ACS di setiap page load
+INTERVAL = float(os.environ.get("TR069_MIRROR_INTERVAL", 60))
+# full reload berkala: device yang dihapus di ACS ikut hilang dari mirror
+FULL_EVERY = float(os.environ.get("TR069_FULL_EVERY", 3600))
+PAGE_SIZE = int(os.environ.get("TR069_PAGE_SIZE", 1000))
+
+
+# ===============================
+# FETCH DARI ACS
+# ===============================
+def fetch_devices(base_url, since=None):
+    """
+    since : string _lastInform (watermark) → hanya device yang inform
+            sesudahnya; None → semua device
+    yield: device mentah (hanya kolom yang dipakai UI)
+
+    Halaman berikutnya lewat keyset (lanjut dari device terakhir), bukan
+    skip=: device dihapus / inform ulang di tengah jalan tidak menggeser
+    halaman, jadi tidak ada device terlewat (lalu ikut terhapus saat full).
+    """
+    if since:
+        first = {"_lastInform": {"$gte": since}}
+        sort = {"_lastInform": 1, "_id": 1}
+    else:
+        first = None
+        sort = {"_id": 1}
+
+    query = first
+    while True:
+        # streaming: 1 device di memori, bukan 1 halaman JSON utuh
+        count = 0
+        last = None
+        for d in genieacs_client.iter_devices(
+            base_url, query,
+            projection=genieacs_client.DEVICE_PROJECTION,
+            sort=sort,
+            limit=PAGE_SIZE
+        ):
+            count += 1
+            last = d
+            yield d
+
+        if count < PAGE_SIZE:
+            return
+
+        if since:
+            # (_lastInform, _id) > device terakhir
+            query = {"$or": [
+                {"_lastInform": {"$gt": last["_lastInform"]}},
+                {"_lastInform": last["_lastInform"], "_id": {"$gt": last["_id"]}},
+            ]}
+        else:
+            query = {"_id": {"$gt": last["_id"]}}
+
+
+def mirror_row(server_id, d, seen_at):
+    dev = genieacs_client.parse_device(d, seen_at)
+    return (
+        server_id,
+        dev["id"],
+        None if dev["pppoe"] == "-" else dev["pppoe"],
+        dev["rx"],
+        dev["temp"],
+        dev["vendor"],
+        dev["model"],
+        dev["last_inform"],
+        genieacs_client.parse_iso(dev["last_inform"]) if dev["last_inform"] else None,
+        seen_at,
+    )
+
+
+# ===============================
+# SIMPAN KE MIRROR
+# ===============================
+def save_devices(cur, rows):
+    if not rows:
+        return
+    cur.executemany("""
+        INSERT INTO tr069_devices (
+            server_id, device_id,
+            pppoe, rx_power, temp, vendor, model,
+            last_inform, last_inform_ts, seen_at
+        )
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        ON CONFLICT (server_id, device_id) DO UPDATE SET
+            pppoe = EXCLUDED.pppoe,
+            rx_power = EXCLUDED.rx_power,
+            temp = EXCLUDED.temp,
+            vendor = EXCLUDED.vendor,
+            model = EXCLUDED.model,
+            last_inform = EXCLUDED.last_inform,
+            last_inform_ts = EXCLUDED.last_inform_ts,
+            seen_at = EXCLUDED.seen_at
+    """, rows)
+
+
+def load_state(cur, server_id):
+    cur.execute("""
+        SELECT watermark, last_full_ts
+        FROM tr069_mirror_state
+        WHERE server_id = %s
+    """, (server_id,))
+    return cur.fetchone()
+
+
+def save_state(cur, server_id, watermark, full_ts, count, error=None):
+    cur.execute("""
+        INSERT INTO tr069_mirror_state
+            (server_id, watermark, last_full_ts, last_sync, last_count, last_error)
+        VALUES (%s, %s, %s, CURRENT_TIMESTAMP, %s, %s)
+        ON CONFLICT (server_id) DO UPDATE SET
+            watermark = COALESCE(EXCLUDED.watermark, tr069_mirror_state.watermark),
+            last_full_ts = COALESCE(EXCLUDED.last_full_ts, tr069_mirror_state.last_full_ts),
+            last_sync = EXCLUDED.last_sync,
+            last_count = EXCLUDED.last_count,
+            last_error = EXCLUDED.last_error
+    """, (server_id, watermark, full_ts, count, error))
+
+
+# ===============================
+# SYNC 1 SERVER
+# ===============================
+def sync_server(conn, server, now=None):
+    """
+    Full load pertama kali / tiap FULL_EVERY detik, selebihnya incremental
+    (_lastInform >= watermark; device di batas watermark diambil ulang,
+    upsert-nya idempoten)
+
+    return: (full, jumlah device diambil)
+    """
+    now = now or time.time()
+    cur = conn.cursor()
+
+    state = load_state(cur, server["id"])
+    watermark = state["watermark"] if state else None
+    last_full = (state["last_full_ts"] or 0) if state else 0
+    full = watermark is None or now - last_full >= FULL_EVERY
+
+    seen_at = now
+    new_watermark = watermark
+    watermark_ts = genieacs_client.parse_iso(watermark) if watermark else 0
+    count = 0
+    batch = []
+
+    # fetch di luar transaksi, tulis per batch
+    for d in fetch_devices(server["base_url"], since=None if full else watermark):
+        row = mirror_row(server["id"], d, seen_at)
+        batch.append(row)
+        count += 1
+
+        # watermark = _lastInform terbaru versi jam ACS
+        last_inform, last_inform_ts = row[7], row[8]
+        if last_inform_ts and last_inform_ts > watermark_ts:
+            new_watermark, watermark_ts = last_inform, last_inform_ts
+
+        if len(batch) >= PAGE_SIZE:
+            save_devices(cur, batch)
+            batch = []
+
+    cur.execute("BEGIN")
+    try:
+        save_devices(cur, batch)
+        if full:
+            # tidak terlihat di full reload → sudah dihapus di ACS
+            cur.execute("""
+                DELETE FROM tr069_devices
+                WHERE server_id = %s AND seen_at < %s
+            """, (server["id"], seen_at))
+        save_state(cur, server["id"], new_watermark, now if full else None, count)
+        cur.execute("COMMIT")
+    except Exception:
+        cur.execute("ROLLBACK")
+        raise
+    finally:
+        cur.close()
+
+    return full, count
+
+
+def run_once():
+    conn = get_db()
+    try:
+        servers = conn.execute("""
+            SELECT id, name, base_url
+            FROM tr069_servers
+            WHERE is_active = 1
+            ORDER BY id
+        """).fetchall()
+
+        results = {}
+        for server in servers:
+            try:
+                results[server["id"]] = sync_server(conn, server)
+            except Exception as e:
+                print(f"[TR069] {server['name']}: {e}")
+                save_state(conn.cursor(), server["id"], None, None, 0, str(e))
+        return results
+    finally:
+        conn.close()
+
+
+def run_forever(interval=INTERVAL):
+    while True:
+        start = time.monotonic()
+        try:
+            results = run_once()
+            for server_id, (full, count) in results.items():
+                mode = "full" if full else "incremental"
+                print(f"[TR069] server {server_id}: {mode}, {count} device")
+        except Exception as e:
+            print(f"[TR069] error: {e}")
+
+        time.sleep(max(0, interval - (time.monotonic() - start)))
+
+
+if __name__ == "__main__":
+    run_forever()
@@ -10,10 +10,9 @@ sys.path.append(BASE_DIR)
 # =====================================================
 # IMPORT STANDARD / PYTHON
 # =====================================================
+import math
 import time
 import threading
-import subprocess
-import platform
 import sqlite3
 import hashlib
 from datetime import datetime
@@ -39,20 +38,24 @@ from flask import (
     session
 )
 
-# =====================================================
-# IMPORT EXTERNAL LIBRARY
-# =====================================================
-from routeros_api import RouterOsApiPool
-
 # =====================================================
 # IMPORT INTERNAL PROJECT
 # =====================================================
 from sync_core import sync_single_olt
+import optical_history
+import onu_summary
+import genieacs_client
+import mikrotik_api
+from collectors import snmp_async
+from collectors.mikrotik_collector import SYSTEM_OIDS, system_row
 
 #from db.db import get_db, DB_PATH
-from db.db import get_db
+from db.db import get_db, pool_stats
+from db import keyset
 
 from auth_routes import auth_bp   # ⬅️ blueprint auth dipisah
+from alerts import dispatcher as alert_dispatcher
+from alerts import telegram as alert_telegram
 
 # =====================================================
 # INIT FLASK APP
@@ -68,10 +71,17 @@ app.secret_key = os.environ["FLASK_SECRET_KEY"]
 # =====================================================
 app.register_blueprint(auth_bp)
 
+# =====================================================
+# ALERT DISPATCHER (OUTBOX → TELEGRAM)
+# hanya ALERT_DISPATCHER=dashboard (default: service alert-dispatcher)
+# =====================================================
+alert_dispatcher.start_thread()
+
 # =====================================================
 # GLOBAL STORAGE
 # =====================================================
 sync_progress = {}
+sync_lock = threading.Lock()
 
 # =====================================================
 # HELPER FUNCTION
@@ -91,24 +101,13 @@ def get_active_tr069():
     conn.close()
     return row
 
-def ping_host(host: str) -> bool:
-    """
-    Ping host (support ip atau ip:port)
-    """
-    ip = host.split(":")[0]
-    param = "-n" if platform.system().lower() == "windows" else "-c"
-
-    try:
-        res = subprocess.run(
-            ["ping", param, "1", ip],
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-            timeout=2
-        )
-        return res.returncode == 0
-    except Exception:
-        return False
-
+# status ping diisi collectors/reachability_monitor.py (background);
+# hasil yang lebih tua dari REACH_STALE dianggap offline (monitor mati)
+REACH_STALE = int(os.environ.get("REACH_STALE", 180))
+REACH_UP_SQL = (
+    "COALESCE(r.is_up = 1 AND r.last_check >= "
+    f"NOW() - INTERVAL '{REACH_STALE} seconds', FALSE)"
+)
 
 
 def login_required(f):
@@ -129,40 +128,36 @@ def home():
     cur = conn.cursor()
 
     # =====================================================
-    # OLT STATUS (REAL-TIME via PING)
+    # OLT STATUS (dari collectors/reachability_monitor.py)
     # =====================================================
-    cur.execute("""
-        SELECT id, name, host
-        FROM olt_devices
-        WHERE is_active = 1
+    cur.execute(f"""
+        SELECT
+            COUNT(*) AS total,
+            COUNT(*) FILTER (WHERE {REACH_UP_SQL}) AS online
+        FROM olt_devices o
+        LEFT JOIN device_reachability r
+          ON r.kind = 'olt' AND r.device_id = o.id
+        WHERE o.is_active = 1
     """)
-    olts = cur.fetchall()
-
-    olt_total = len(olts)
-    olt_online = 0
-
-    for o in olts:
-        if ping_host(o["host"]):
-            olt_online += 1
+    row = cur.fetchone()
 
+    olt_total = row["total"] or 0
+    olt_online = row["online"] or 0
     olt_offline = olt_total - olt_online
 
     # =====================================================
-    # ONU SUMMARY
+    # ONU SUMMARY (onu_summary_global, di-refresh sync_core)
     # =====================================================
-    # total onu
-    cur.execute("SELECT COUNT(*) AS total FROM onu_status")
-    ont_total = cur.fetchone()["total"] or 0
-
-    # online onu
     cur.execute("""
-        SELECT COUNT(*) AS total
-        FROM onu_status
-        WHERE status = 'ONLINE'
+        SELECT total, online, offline
+        FROM onu_summary_global
+        WHERE id = 1
     """)
-    ont_online = cur.fetchone()["total"] or 0
+    summary = cur.fetchone()
 
-    ont_offline = ont_total - ont_online
+    ont_total = summary["total"] if summary else 0
+    ont_online = summary["online"] if summary else 0
+    ont_offline = summary["offline"] if summary else 0
 
 
     # =====================================================
@@ -268,12 +263,16 @@ def olt_devices():
     conn = get_db()
     cur = conn.cursor()
 
-    cur.execute("SELECT * FROM olt_devices ORDER BY created_at DESC")
+    cur.execute(f"""
+        SELECT o.*, ({REACH_UP_SQL}) AS is_up
+        FROM olt_devices o
+        LEFT JOIN device_reachability r
+          ON r.kind = 'olt' AND r.device_id = o.id
+        ORDER BY o.created_at DESC
+    """)
     olts = cur.fetchall()
 
-    olt_status = {}
-    for o in olts:
-        olt_status[o["id"]] = ping_host(o["host"])
+    olt_status = {o["id"]: bool(o["is_up"]) for o in olts}
 
     conn.close()
 
@@ -290,10 +289,10 @@ def olt_devices():
 def olt_onu_by_olt(olt_id):
     status_filter = request.args.get("status", "ALL")
     pon_filter = request.args.get("pon", "ALL")
-    page = max(int(request.args.get("page", 1)), 1)
+    after = request.args.get("after")
+    before = request.args.get("before")
 
     PER_PAGE = 25
-    offset = (page - 1) * PER_PAGE
 
     conn = get_db()
     cur = conn.cursor()
@@ -305,73 +304,70 @@ def olt_onu_by_olt(olt_id):
         conn.close()
         return "OLT tidak ditemukan", 404
 
-    # ================= SUMMARY =================
-    cur.execute(
-        "SELECT COUNT(*) AS total FROM onu_status WHERE olt_id=?",
-        (olt_id,)
-    )
-
-    total = cur.fetchone()["total"] or 0
-
+    # ================= SUMMARY (PER PON, DARI onu_summary_pon) =================
     cur.execute("""
-        SELECT COUNT(*) AS total
-        FROM onu_status
-        WHERE olt_id=? AND status='ONLINE'
+        SELECT pon, total, online, offline
+        FROM onu_summary_pon
+        WHERE olt_id=?
+        ORDER BY pon
     """, (olt_id,))
+    pon_summary = {str(r["pon"]): r for r in cur.fetchall()}
+
+    # OLT belum pernah di-sync sejak ringkasan ada → hitung langsung
+    if not pon_summary:
+        pon_summary = {
+            str(r["pon"]): {
+                "total": r["total"],
+                "online": r["online"],
+                "offline": r["total"] - r["online"],
+            }
+            for r in onu_summary.pon_counts(cur, olt_id)
+        }
 
-    online = cur.fetchone()["total"] or 0
-
+    total = sum(r["total"] for r in pon_summary.values())
+    online = sum(r["online"] for r in pon_summary.values())
     offline = total - online
 
-
     # ================= PON LIST =================
-    cur.execute("""
-        SELECT DISTINCT pon FROM onu_status
-        WHERE olt_id=?
-        ORDER BY CAST(pon AS INTEGER)
-    """, (olt_id,))
-    pon_list = [str(r["pon"]) for r in cur.fetchall()]
+    pon_list = list(pon_summary)
 
     # ================= WHERE =================
-    where = "WHERE olt_id=?"
+    where = ["olt_id=?"]
     params = [olt_id]
 
     if status_filter == "ONLINE":
-        where += " AND status='ONLINE'"
+        where.append("status='ONLINE'")
     elif status_filter == "OFFLINE":
-        where += " AND status!='ONLINE'"
+        where.append("status!='ONLINE'")
 
     if pon_filter != "ALL":
-        where += " AND pon=?"
+        where.append("pon=?")
         params.append(pon_filter)
 
-    # ================= PAGINATION =================
-    cur.execute(
-        f"SELECT COUNT(*) AS total FROM onu_status {where}",
-        params
-    )
-    total_rows = cur.fetchone()["total"] or 0
-    total_pages = (total_rows + PER_PAGE - 1) // PER_PAGE
-
+    # ================= TOTAL (PERKIRAAN, DARI RINGKASAN) =================
+    # jumlah baris filter = kolom ringkasan (tanpa COUNT(*) onu_status)
+    count_col = {"ONLINE": "online", "OFFLINE": "offline"}.get(status_filter, "total")
+    if pon_filter != "ALL":
+        scoped = [pon_summary[pon_filter]] if pon_filter in pon_summary else []
+    else:
+        scoped = pon_summary.values()
 
-    # ================= DATA (RX TERBURUK DI ATAS) =================
-    query = f"""
-        SELECT *
-        FROM onu_status
-        {where}
-        ORDER BY
-        rx_power IS NULL,
-        rx_power ASC,
-        CAST(pon AS INTEGER),
-        CAST(onu_id AS INTEGER)
-        LIMIT ? OFFSET ?
-    """
+    total_rows = sum(r[count_col] for r in scoped)
 
-    cur.execute(query, params + [PER_PAGE, offset])
-    rows = cur.fetchall()
+    # ================= DATA (RX TERBURUK DI ATAS, KEYSET) =================
+    rows, next_cursor, prev_cursor = keyset.paginate(
+        cur, "*", "onu_status", where, params, keyset.ONU_PAGE_KEYS,
+        after=after, before=before, limit=PER_PAGE, ph="?"
+    )
 
     conn.close()
 
+    def page_url(**cursor):
+        return url_for(
+            "olt_onu_by_olt", olt_id=olt_id,
+            status=status_filter, pon=pon_filter, **cursor
+        )
+
     return render_template(
         "olt_dashboard.html",
         active_page="olt_devices",
@@ -383,8 +379,9 @@ def olt_onu_by_olt(olt_id):
         status_filter=status_filter,
         pon_filter=str(pon_filter),
         pon_list=pon_list,
-        page=page,
-        total_pages=total_pages
+        total_rows=total_rows,
+        next_url=page_url(after=next_cursor) if next_cursor else None,
+        prev_url=page_url(before=prev_cursor) if prev_cursor else None
     )
 
 
@@ -478,6 +475,9 @@ def olt_delete(olt_id):
             (olt_id,)
         )
 
+        # ringkasan ONU OLT ini + global
+        onu_summary.delete_olt(cur, olt_id)
+
         # =========================
         # HAPUS OLT
         # =========================
@@ -524,6 +524,13 @@ def sync_olt(olt_id):
 
     # init progress (AMAN)
     with sync_lock:
+        # klik berulang tidak boleh membuka Chrome / sync kedua
+        if sync_progress.get(olt_id, {}).get("status") == "running":
+            return jsonify({
+                "success": True,
+                "message": "Sinkronisasi sedang berjalan"
+            })
+
         sync_progress[olt_id] = {
             "status": "running",
             "message": "Menghubungi OLT...",
@@ -582,34 +589,28 @@ def pppoe_dashboard():
     # ambil filter status (opsional)
     status_filter = request.args.get("status", "ALL")
 
-    rows_raw = cur.execute("""
+    rows = cur.execute("""
         SELECT
             username,
+            router_id,
+            interface,
             rx_bytes,
             tx_bytes,
             last_update,
-            (strftime('%s','now') - strftime('%s', last_update)) AS age
+            EXTRACT(EPOCH FROM (NOW() - last_update))::INT AS age
         FROM pppoe_active
-        ORDER BY username
+        ORDER BY username, router_id
     """).fetchall()
 
-    # mapping ke object (biar rapi di template)
-    rows = []
-    for r in rows_raw:
-        rows.append({
-            "username": r[0],
-            "rx_bytes": r[1],
-            "tx_bytes": r[2],
-            "last_update": r[3],
-            "age": r[4]
-        })
-
     # filter status
     if status_filter == "ACTIVE":
         rows = [r for r in rows if r["age"] < 180]
     elif status_filter == "STALE":
         rows = [r for r in rows if r["age"] >= 180]
 
+    cur.close()
+    conn.close()
+
     # summary
     total = len(rows)
     active = sum(1 for r in rows if r["age"] < 180)
@@ -798,15 +799,13 @@ def mikrotik_delete(id):
     cur = conn.cursor()
     cur.execute("DELETE FROM mikrotik_devices WHERE id=?", (id,))
     conn.commit()
+    conn.close()
 
     flash("Mikrotik berhasil dihapus", "success")
     return redirect("/mikrotik")
 
 
 
-from pysnmp.hlapi import *
-import re
-
 @app.route("/mikrotik/<int:id>/test-snmp", methods=["POST"])
 @login_required
 def mikrotik_test_snmp(id):
@@ -819,32 +818,14 @@ def mikrotik_test_snmp(id):
         WHERE id=?    """, (id,)).fetchone()
 
     if not row:
+        conn.close()
         flash("Mikrotik tidak ditemukan", "error")
         return redirect("/mikrotik")
 
-    host, community = row
-    port = 161
     try:
-        def snmp_get(oid):
-            it = getCmd(
-                SnmpEngine(),
-                CommunityData(community, mpModel=1),
-                UdpTransportTarget((host, port), timeout=2, retries=1),
-                ContextData(),
-                ObjectType(ObjectIdentity(oid))
-            )
-            eInd, eStat, eIdx, v = next(it)
-            if eInd or eStat:
-                raise Exception(eInd or eStat.prettyPrint())
-            return str(v[0][1])
-
-        sys_descr  = snmp_get("1.3.6.1.2.1.1.1.0")  # sysDescr
-        sys_name   = snmp_get("1.3.6.1.2.1.1.5.0")  # sysName
-        sys_uptime = snmp_get("1.3.6.1.2.1.1.3.0")  # sysUpTime
-
-        # ambil versi RouterOS dari sysDescr (opsional)
-        match = re.search(r"RouterOS\s+([\d\.]+)", sys_descr)
-        ros_version = match.group(1) if match else None
+        # sysDescr + sysUpTime + sysName dalam 1 GET PDU
+        values = snmp_async.get_sync(row["host"], row["snmp_community"], SYSTEM_OIDS)
+        sys_name, sys_descr, sys_uptime, ros_version, _ = system_row(id, values)
 
         cur.execute("""
             UPDATE mikrotik_devices
@@ -857,7 +838,7 @@ def mikrotik_test_snmp(id):
             WHERE id=?        """, (
             sys_descr,
             sys_name,
-            int(sys_uptime),
+            sys_uptime,
             ros_version,
             id
         ))
@@ -868,10 +849,29 @@ def mikrotik_test_snmp(id):
     except Exception as e:
         flash(f"SNMP GAGAL: {e}", "error")
 
+    finally:
+        conn.close()
+
     return redirect("/mikrotik")
 
 
 
+def mikrotik_realtime_stats(api):
+    res   = api.get_resource("/system/resource").get()[0]
+    clock = api.get_resource("/system/clock").get()[0]
+
+    return {
+        "cpu": int(res["cpu-load"]),
+        "memory": round(
+            (1 - int(res["free-memory"]) / int(res["total-memory"])) * 100, 1
+        ),
+        "uptime": res["uptime"],
+        "version": res["version"],
+        "board": res["board-name"],
+        "router_time": f'{clock["date"]} {clock["time"]}'
+    }
+
+
 @app.route("/api/mikrotik/<int:id>/realtime")
 @login_required
 def mikrotik_realtime(id):
@@ -887,36 +887,12 @@ def mikrotik_realtime(id):
         return {"error": "not found"}, 404
 
     try:
-        from routeros_api import RouterOsApiPool
-
-        api_pool = RouterOsApiPool(
-            r["host"],
-            username=r["api_user"],
-            password=r["api_pass"],
-            port=r["api_port"],
-            use_ssl=False,
-            plaintext_login=True
+        # session RouterOS dipakai ulang (mikrotik_api), tanpa login ulang;
+        # viewer serentak / dalam TTL berbagi 1 query ke router
+        return mikrotik_api.cached_call(
+            ("realtime", id), r, mikrotik_realtime_stats
         )
 
-        api = api_pool.get_api()
-
-        res   = api.get_resource("/system/resource").get()[0]
-        clock = api.get_resource("/system/clock").get()[0]
-
-        data = {
-            "cpu": int(res["cpu-load"]),
-            "memory": round(
-                (1 - int(res["free-memory"]) / int(res["total-memory"])) * 100, 1
-            ),
-            "uptime": res["uptime"],
-            "version": res["version"],
-            "board": res["board-name"],
-            "router_time": f'{clock["date"]} {clock["time"]}'
-        }
-
-        api_pool.disconnect()
-        return data
-
     except Exception as e:
         return {"error": str(e)}, 500
 
@@ -949,6 +925,9 @@ def telegram_settings_page():
         cur.close()
         conn.close()
 
+        # worker ini langsung pakai config baru (worker lain setelah TTL)
+        alert_telegram.invalidate_config()
+
         flash("✅ Konfigurasi Telegram berhasil disimpan!", "success")
         return redirect(url_for("telegram_settings_page"))
 
@@ -1025,44 +1004,53 @@ def telegram_test_page():
 @login_required
 def ont_problem_list():
     status_filter = request.args.get("status", "ALL")
-    page = max(int(request.args.get("page", 1)), 1)
+    after = request.args.get("after")
+    before = request.args.get("before")
 
     PER_PAGE = 25
-    offset = (page - 1) * PER_PAGE
 
     conn = get_db()
     cur = conn.cursor()
 
-    where = """
-        WHERE
-          o.is_active = 1
-          AND (
+    where = [
+        "o.is_active = 1",
+        """(
             n.status != 'ONLINE'
             OR (n.rx_power IS NOT NULL AND n.rx_power < -25)
             OR n.diagnosis != 'NORMAL'
-          )
-    """
+        )"""
+    ]
     params = []
 
     if status_filter != "ALL":
-        where += " AND n.status = %s"
+        where.append("n.status = %s")
         params.append(status_filter)
 
     # ===== TOTAL =====
-    cur.execute(f"""
-        SELECT COUNT(*) AS total
-        FROM onu_status n
-        JOIN olt_devices o ON o.id = n.olt_id
-        {where}
-    """, params)
+    if status_filter == "ALL":
+        # tanpa filter status → jumlah problem dari ringkasan per OLT
+        cur.execute("""
+            SELECT COALESCE(SUM(s.problem), 0) AS total
+            FROM onu_summary_olt s
+            JOIN olt_devices o ON o.id = s.olt_id
+            WHERE o.is_active = 1
+        """)
+    else:
+        # filter status → COUNT lewat partial index idx_onu_status_problem
+        cur.execute(f"""
+            SELECT COUNT(*) AS total
+            FROM onu_status n
+            JOIN olt_devices o ON o.id = n.olt_id
+            WHERE {" AND ".join(where)}
+        """, params)
 
     row = cur.fetchone()
     total_rows = row["total"] if row else 0
-    total_pages = (total_rows + PER_PAGE - 1) // PER_PAGE
 
-    # ===== DATA =====
-    cur.execute(f"""
-        SELECT
+    # ===== DATA (KEYSET) =====
+    rows, next_cursor, prev_cursor = keyset.paginate(
+        cur,
+        """
             o.name AS olt_name,
             n.olt_id,
             n.pon,
@@ -1074,25 +1062,24 @@ def ont_problem_list():
             n.diagnosis,
             n.alert_telegram,
             n.last_update
-        FROM onu_status n
-        JOIN olt_devices o ON o.id = n.olt_id
-        {where}
-        ORDER BY
-            n.last_update DESC,
-            n.rx_power ASC
-        LIMIT %s OFFSET %s
-    """, params + [PER_PAGE, offset])
-
-    rows = cur.fetchall()
+        """,
+        "onu_status n JOIN olt_devices o ON o.id = n.olt_id",
+        where, params, keyset.PROBLEM_PAGE_KEYS,
+        after=after, before=before, limit=PER_PAGE
+    )
 
     cur.close()
     conn.close()
 
+    def page_url(**cursor):
+        return url_for("ont_problem_list", status=status_filter, **cursor)
+
     return render_template(
         "ont_problem.html",
         rows=rows,
-        page=page,
-        total_pages=total_pages,
+        total_rows=total_rows,
+        next_url=page_url(after=next_cursor) if next_cursor else None,
+        prev_url=page_url(before=prev_cursor) if prev_cursor else None,
         status_filter=status_filter,
         active_page="ont_problem",
         show_topbar=True
@@ -1130,6 +1117,52 @@ def ont_toggle_telegram(olt_id, pon, onu_id):
         "success": True,
         "value": new_val
     })
+@app.route("/api/onu/<int:olt_id>/<int:pon>/<int:onu_id>/optical")
+@login_required
+def onu_optical_history(olt_id, pon, onu_id):
+    """
+    Riwayat RX/TX ONU dari tabel rollup (5m / 1h / 1d otomatis)
+    ?days=30
+    """
+    # bukan angka → default (type=float), nan / inf → default juga
+    days = request.args.get("days", 1, type=float)
+    if not math.isfinite(days):
+        days = 1
+    days = min(max(days, 0.1), 1825)
+    now = time.time()
+
+    conn = get_db()
+    rows = optical_history.get_history(
+        conn, olt_id, pon, onu_id,
+        since=now - days * 86400,
+        until=now
+    )
+    conn.close()
+
+    return jsonify({
+        "resolution": optical_history.pick_rollup(days * 86400),
+        "points": rows
+    })
+
+
+@app.route("/api/db/pool")
+@login_required
+def db_pool_stats():
+    """
+    Statistik pool koneksi Postgres worker ini (per proses gunicorn)
+    """
+    return jsonify(pool_stats())
+
+
+@app.route("/api/mikrotik/pool")
+@login_required
+def mikrotik_pool_stats():
+    """
+    Statistik session RouterOS API worker ini (per proses gunicorn)
+    """
+    return jsonify(mikrotik_api.pool_stats())
+
+
 #########        routeros tr069 server management      ###########
 
 @app.route("/tr069")
@@ -1274,13 +1307,114 @@ import time
 import requests
 from flask import request, render_template, flash, redirect
 
-def parse_iso(ts):
-    try:
-        return datetime.fromisoformat(
-            ts.replace("Z", "+00:00")
-        ).timestamp()
-    except Exception:
-        return 0
+# =============================
+# TR-069 DEVICE: MIRROR LOKAL (collectors/tr069_mirror.py)
+# ACS live hanya dipakai sebelum mirror selesai full load pertama
+# =============================
+TR069_SORTS = {
+    "last_inform": "last_inform_ts DESC NULLS LAST, device_id",
+    "rx": "rx_power ASC NULLS LAST, device_id",
+    "pppoe": "pppoe ASC NULLS LAST, device_id",
+}
+TR069_DEFAULT_SORT = "last_inform"
+
+
+def tr069_mirror_state(conn, server_id):
+    """
+    return: baris tr069_mirror_state, None kalau mirror belum siap
+    """
+    state = conn.execute(
+        "SELECT * FROM tr069_mirror_state WHERE server_id=?",
+        (server_id,)
+    ).fetchone()
+    return state if state and state["last_full_ts"] else None
+
+
+def like_pattern(text):
+    text = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{text}%"
+
+
+def tr069_page_mirror(conn, server_id, search, rx_critical, sort, page, per_page, now):
+    """
+    return: (devices, total, online, page)
+    """
+    where = ["server_id = ?"]
+    params = [server_id]
+
+    if search:
+        where.append("(pppoe ILIKE ? OR device_id ILIKE ? OR model ILIKE ?)")
+        params += [like_pattern(search)] * 3
+
+    if rx_critical:
+        where.append("rx_power < ?")
+        params.append(genieacs_client.RX_CRITICAL)
+
+    where_sql = " AND ".join(where)
+    online_since = now - genieacs_client.ONLINE_WINDOW
+
+    kpi = conn.execute(f"""
+        SELECT
+            COUNT(*) AS total,
+            COUNT(*) FILTER (WHERE last_inform_ts >= ?) AS online
+        FROM tr069_devices
+        WHERE {where_sql}
+    """, [online_since] + params).fetchone()
+
+    total = kpi["total"]
+    page = min(page, max(ceil(total / per_page), 1))
+
+    rows = conn.execute(f"""
+        SELECT *
+        FROM tr069_devices
+        WHERE {where_sql}
+        ORDER BY {TR069_SORTS[sort]}
+        LIMIT ? OFFSET ?
+    """, params + [per_page, (page - 1) * per_page]).fetchall()
+
+    devices = [{
+        "id": r["device_id"],
+        "pppoe": r["pppoe"] or "-",
+        "rx": r["rx_power"],
+        "temp": r["temp"],
+        "vendor": r["vendor"] or "-",
+        "model": r["model"] or "-",
+        "online": (r["last_inform_ts"] or 0) >= online_since,
+        "last_inform": r["last_inform"]
+    } for r in rows]
+
+    return devices, total, kpi["online"], page
+
+
+def tr069_page_live(acs, search, rx_critical, sort, page, per_page, now):
+    """
+    Fallback: filter / sort / halaman dikirim sebagai query GenieACS
+    return: (devices, total, online, page)
+    """
+    query = genieacs_client.device_query(search, rx_critical)
+
+    total = genieacs_client.count_devices(acs["base_url"], query)
+    online = genieacs_client.count_devices(
+        acs["base_url"],
+        genieacs_client.device_query(
+            search, rx_critical,
+            online_since=now - genieacs_client.ONLINE_WINDOW
+        )
+    )
+
+    page = min(page, max(ceil(total / per_page), 1))
+
+    raw_devices = genieacs_client.list_devices(
+        acs["base_url"],
+        query,
+        projection=genieacs_client.DEVICE_PROJECTION,
+        sort=genieacs_client.SORTS[sort],
+        skip=(page - 1) * per_page,
+        limit=per_page
+    )
+    devices = [genieacs_client.parse_device(d, now) for d in raw_devices]
+
+    return devices, total, online, page
 
 
 @app.route("/tr069/<int:id>/devices")
@@ -1294,103 +1428,53 @@ def tr069_devices_by_server(id):
         "SELECT * FROM tr069_servers WHERE id=?",
         (id,)
     ).fetchone()
-    conn.close()
 
     if not acs:
+        conn.close()
         flash("❌ Server TR-069 tidak ditemukan", "danger")
         return redirect("/tr069")
 
-    search = request.args.get("q", "").strip().lower()
-    rx_filter = request.args.get("rx")
+    search = request.args.get("q", "").strip()
+    rx_critical = request.args.get("rx") == "critical"
+    sort = request.args.get("sort", TR069_DEFAULT_SORT)
+    if sort not in TR069_SORTS:
+        sort = TR069_DEFAULT_SORT
 
-    # =============================
-    # FETCH DEVICES FROM ACS
-    # =============================
     try:
-        r = requests.get(
-            f"{acs['base_url']}/devices",
-            timeout=15
-        )
-        r.raise_for_status()
-        raw_devices = r.json()
-    except Exception as e:
-        flash(f"❌ Gagal mengambil devices: {e}", "danger")
-        raw_devices = []
+        page = max(int(request.args.get("page", 1)), 1)
+    except ValueError:
+        page = 1
+    per_page = 20
 
     # =============================
-    # PARSE & NORMALIZE DEVICES
+    # DEVICE + KPI (MIRROR LOKAL, FALLBACK ACS LIVE)
     # =============================
-    devices_all = []
     now = time.time()
+    devices_page, total, online_count = [], 0, 0
 
-    for d in raw_devices:
-        vp = d.get("VirtualParameters", {})
-        did = d.get("_deviceId", {})
-
-        pppoe = (
-            vp.get("pppoeUsername", {}).get("_value")
-            or "-"
-        )
-
-        try:
-            rx = float(vp.get("RXPower", {}).get("_value"))
-        except Exception:
-            rx = None
-
-        try:
-            temp = int(vp.get("gettemp", {}).get("_value"))
-        except Exception:
-            temp = None
-
-        last_inform = d.get("_lastInform")
-        last_ts = parse_iso(last_inform) if last_inform else 0
-        online = (now - last_ts) < 300  # 5 menit
-
-        devices_all.append({
-            "id": d.get("_id", ""),
-            "pppoe": pppoe,
-            "rx": rx,
-            "temp": temp,
-            "vendor": did.get("_Manufacturer", "-"),
-            "model": did.get("_ProductClass", "-"),
-            "online": online,
-            "last_inform": last_inform
-        })
-
-    # =============================
-    # FILTERING (SETELAH DATA ADA)
-    # =============================
-    if search:
-        devices_all = [
-            d for d in devices_all
-            if search in d["pppoe"].lower()
-            or search in d["id"].lower()
-            or search in d["model"].lower()
-        ]
-
-    if rx_filter == "critical":
-        devices_all = [
-            d for d in devices_all
-            if d["rx"] is not None and d["rx"] < -25
-        ]
+    try:
+        mirror = tr069_mirror_state(conn, id)
+        if mirror:
+            devices_page, total, online_count, page = tr069_page_mirror(
+                conn, id, search, rx_critical, sort, page, per_page, now
+            )
+        else:
+            devices_page, total, online_count, page = tr069_page_live(
+                acs, search, rx_critical, sort, page, per_page, now
+            )
+    except Exception as e:
+        mirror = None
+        flash(f"❌ Gagal mengambil devices: {e}", "danger")
+    finally:
+        conn.close()
 
-    # =============================
-    # KPI
-    # =============================
-    total = len(devices_all)
-    online_count = sum(1 for d in devices_all if d["online"])
     offline_count = total - online_count
-
-    # =============================
-    # PAGINATION
-    # =============================
-    page = max(int(request.args.get("page", 1)), 1)
-    per_page = 20
     total_pages = ceil(total / per_page) if total else 1
 
-    start = (page - 1) * per_page
-    end = start + per_page
-    devices_page = devices_all[start:end]
+    def page_url(p):
+        args = request.args.to_dict()
+        args["page"] = p
+        return url_for("tr069_devices_by_server", id=id, **args)
 
     # =============================
     # RENDER
@@ -1404,6 +1488,9 @@ def tr069_devices_by_server(id):
         offline=offline_count,
         page=page,
         total_pages=total_pages,
+        page_url=page_url,
+        sort=sort,
+        mirror=mirror,
         active_page="tr069",
         show_topbar=True
     )
@@ -1420,31 +1507,43 @@ def tr069_overview():
         WHERE is_active=1
         LIMIT 1
     """).fetchone()
-    conn.close()
 
     if not acs:
+        conn.close()
         flash("❌ Tidak ada server TR-069 aktif", "danger")
         return redirect("/tr069")
 
+    # ======================
+    # KPI CALCULATION (MIRROR LOKAL, FALLBACK HITUNG DI GENIEACS)
+    # ======================
+    total = online = 0
     try:
-        r = requests.get(f"{acs['base_url']}/devices", timeout=10)
-        r.raise_for_status()
-        devices = r.json()
+        if tr069_mirror_state(conn, acs["id"]):
+            kpi = conn.execute("""
+                SELECT
+                    COUNT(*) AS total,
+                    COUNT(last_inform) AS online
+                FROM tr069_devices
+                WHERE server_id=?
+            """, (acs["id"],)).fetchone()
+            total, online = kpi["total"], kpi["online"]
+        else:
+            total = genieacs_client.count_devices(acs["base_url"], timeout=10)
+            online = genieacs_client.count_devices(
+                acs["base_url"],
+                {"_lastInform": {"$exists": True}},
+                timeout=10
+            )
     except Exception as e:
         flash(f"❌ Gagal mengambil data TR-069: {e}", "danger")
-        devices = []
+    finally:
+        conn.close()
 
-    # ======================
-    # KPI CALCULATION
-    # ======================
-    total = len(devices)
-    online = sum(1 for d in devices if d.get("_lastInform"))
     offline = total - online
 
     return render_template(
         "tr069_overview.html",
         acs=acs,
-        devices=devices,
         total=total,
         online=online,
         offline=offline,
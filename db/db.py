@@ -1,19 +1,337 @@
 import os
+import time
+import threading
 import psycopg2
+import psycopg2.pool
+from psycopg2 import extensions
 from psycopg2.extras import RealDictCursor
 
 DATABASE_URL = os.environ.get("DATABASE_URL")
 
+# backend tulis sync (sync_core, alerts/outbox):
+#   sqlite   → data/dashboard.db (default)
+#   postgres → langsung ke DATABASE_URL (COPY bulk ingest, db/pg_ingest.py)
+SYNC_DB = os.environ.get("SYNC_DB", "sqlite").lower()
+
+# ===============================
+# POOL CONFIG (PER PROSES / WORKER GUNICORN)
+# ===============================
+POOL_MAX = int(os.environ.get("DB_POOL_MAX", 10))
+# tunggu koneksi bebas maks N detik → PoolTimeout
+POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", 10))
+# koneksi lebih tua dari ini ditutup & dibuka ulang
+POOL_RECYCLE = float(os.environ.get("DB_POOL_RECYCLE", 1800))
+# idle lebih lama dari ini → SELECT 1 dulu sebelum dipakai
+POOL_PING_AFTER = float(os.environ.get("DB_POOL_PING_AFTER", 30))
+
+
+class PoolTimeout(psycopg2.pool.PoolError):
+    pass
+
+
+# ===============================
+# CURSOR (KOMPATIBEL GAYA SQLITE)
+# ===============================
+def qmark_to_format(sql):
+    """
+    Placeholder sqlite `?` → `%s` psycopg2 (kecuali di dalam string literal).
+    Query yang sudah pakai %s dibiarkan.
+    """
+    if "?" not in sql or "%s" in sql:
+        return sql
+
+    out = []
+    quote = None
+    for ch in sql:
+        if quote:
+            if ch == quote:
+                quote = None
+            out.append("%%" if ch == "%" else ch)
+        elif ch in ("'", '"'):
+            quote = ch
+            out.append(ch)
+        elif ch == "?":
+            out.append("%s")
+        elif ch == "%":
+            out.append("%%")
+        else:
+            out.append(ch)
+    return "".join(out)
+
+
+class DictCursor(RealDictCursor):
+    """
+    RealDictCursor + placeholder `?` + execute() return self
+    (pola `cur.execute(...).fetchone()` dari versi sqlite tetap jalan)
+    """
+
+    def execute(self, query, vars=None):
+        if vars is not None:
+            query = qmark_to_format(query)
+        super().execute(query, vars)
+        return self
+
+    def executemany(self, query, vars_list):
+        super().executemany(qmark_to_format(query), vars_list)
+        return self
+
+
+# ===============================
+# KONEKSI DARI POOL
+# ===============================
+class PooledConnection:
+    """
+    Proxy koneksi psycopg2: close() → kembali ke pool, bukan diputus.
+    Atribut lain (cursor, commit, rollback, autocommit, ...) diteruskan.
+    """
+
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+
+    def __getattr__(self, name):
+        raw = self.__dict__.get("_raw")
+        if raw is None:
+            raise psycopg2.InterfaceError("connection already returned to pool")
+        return getattr(raw, name)
+
+    def execute(self, query, vars=None):
+        # pintasan gaya sqlite3: conn.execute(...).fetchone()
+        return self.cursor().execute(query, vars)
+
+    def executemany(self, query, vars_list):
+        return self.cursor().executemany(query, vars_list)
+
+    def close(self):
+        raw, self._raw = self._raw, None
+        if raw is not None:
+            self._pool.release(raw)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._raw is not None and exc_type is not None and not self._raw.autocommit:
+            self._raw.rollback()
+        self.close()
+
+    def __del__(self):
+        # route lupa close() → koneksi tidak bocor dari pool
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class ConnectionPool:
+    def __init__(self, dsn, maxsize=POOL_MAX, timeout=POOL_TIMEOUT,
+                 recycle=POOL_RECYCLE, ping_after=POOL_PING_AFTER):
+        self.dsn = dsn
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.recycle = recycle
+        self.ping_after = ping_after
+
+        self.pid = os.getpid()
+        self._cond = threading.Condition()
+        self._idle = []       # [(raw, created_at, released_at)]
+        self._created = {}    # id(raw) → created_at (yang sedang dipinjam)
+        self._size = 0
+
+        self._stats = {
+            "checkouts": 0,
+            "waits": 0,
+            "wait_time_total": 0.0,
+            "wait_time_max": 0.0,
+            "timeouts": 0,
+            "connects": 0,
+            "recycled": 0,
+            "health_failed": 0,
+            "discarded": 0,
+        }
+
+    # ---------- internal ----------
+    def _bump(self, key):
+        with self._cond:
+            self._stats[key] += 1
+
+    def _connect(self):
+        raw = psycopg2.connect(
+            self.dsn,
+            cursor_factory=DictCursor,
+            connect_timeout=5
+        )
+        # autocommit mirip sqlite isolation_level=None
+        raw.autocommit = True
+        self._bump("connects")
+        return raw
+
+    @staticmethod
+    def _close_quiet(raw):
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+    def _healthy(self, raw, created, released):
+        now = time.monotonic()
+
+        if raw.closed:
+            return False
+
+        if now - created > self.recycle:
+            self._bump("recycled")
+            return False
+
+        if now - released > self.ping_after:
+            try:
+                with raw.cursor() as cur:
+                    cur.execute("SELECT 1")
+            except Exception:
+                self._bump("health_failed")
+                return False
+
+        return True
+
+    def _check_fork(self):
+        # setelah fork (gunicorn worker) socket milik parent jangan dipakai
+        # / ditutup dari child → buang referensinya saja
+        if os.getpid() != self.pid:
+            self.pid = os.getpid()
+            self._idle = []
+            self._created = {}
+            self._size = 0
+
+    # ---------- API ----------
+    def acquire(self):
+        start = time.monotonic()
+        waited = False
+
+        with self._cond:
+            self._check_fork()
+
+            while True:
+                if self._idle:
+                    raw, created, released = self._idle.pop()
+                    break
+
+                if self._size < self.maxsize:
+                    self._size += 1
+                    raw = None
+                    created = time.monotonic()
+                    break
+
+                waited = True
+                remaining = self.timeout - (time.monotonic() - start)
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    raise PoolTimeout(
+                        f"DB pool habis ({self.maxsize} koneksi) "
+                        f"setelah menunggu {self.timeout:g}s"
+                    )
+                self._cond.wait(remaining)
+
+            wait = time.monotonic() - start
+            self._stats["checkouts"] += 1
+            if waited:
+                self._stats["waits"] += 1
+                self._stats["wait_time_total"] += wait
+                self._stats["wait_time_max"] = max(self._stats["wait_time_max"], wait)
+
+        # connect / health check di luar lock
+        try:
+            if raw is not None and not self._healthy(raw, created, released):
+                self._close_quiet(raw)
+                raw = None
+                created = time.monotonic()
+
+            if raw is None:
+                raw = self._connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+        with self._cond:
+            self._created[id(raw)] = created
+
+        return PooledConnection(self, raw)
+
+    def release(self, raw):
+        with self._cond:
+            if os.getpid() != self.pid:
+                return
+            created = self._created.pop(id(raw), time.monotonic())
+
+        reusable = not raw.closed
+        if reusable:
+            try:
+                # transaksi menggantung / route ubah autocommit → reset
+                if raw.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                    if raw.autocommit:
+                        # BEGIN manual di mode autocommit → rollback() no-op
+                        with raw.cursor() as cur:
+                            cur.execute("ROLLBACK")
+                    else:
+                        raw.rollback()
+                if not raw.autocommit:
+                    raw.autocommit = True
+            except Exception:
+                reusable = False
+
+        with self._cond:
+            if reusable:
+                self._idle.append((raw, created, time.monotonic()))
+            else:
+                self._size -= 1
+                self._stats["discarded"] += 1
+            self._cond.notify()
+
+        if not reusable:
+            self._close_quiet(raw)
+
+    def close_all(self):
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+        for raw, _, _ in idle:
+            self._close_quiet(raw)
+
+    def stats(self):
+        with self._cond:
+            s = dict(self._stats)
+            s.update({
+                "pid": self.pid,
+                "max": self.maxsize,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+            })
+        s["wait_time_avg"] = s["wait_time_total"] / s["waits"] if s["waits"] else 0.0
+        return s
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(DATABASE_URL)
+    return _pool
+
+
 def get_db():
     """
-    Get PostgreSQL connection (dict-style row)
+    Get PostgreSQL connection (dict-style row) dari pool per proses.
+    conn.close() mengembalikan koneksi ke pool.
     """
-    conn = psycopg2.connect(
-        DATABASE_URL,
-        cursor_factory=RealDictCursor,
-        connect_timeout=5
-    )
+    return get_pool().acquire()
+
 
-    # autocommit mirip sqlite isolation_level=None
-    conn.autocommit = True
-    return conn
+def pool_stats():
+    return get_pool().stats()
@@ -0,0 +1,162 @@
+import json
+import base64
+from collections import namedtuple
+
+# ===============================
+# KEYSET (CURSOR) PAGINATION
+# ===============================
+# Halaman berikut = baris "sesudah" key baris terakhir (WHERE, bukan OFFSET)
+# → halaman ke-1000 sama murahnya dengan halaman 1.
+#
+# Key harus unik & tidak NULL → kolom nullable dibungkus
+# (CASE ... IS NULL) + COALESCE(...), ditutup kolom unik (pon, onu_id).
+#
+#   expr  : ekspresi SQL urutan
+#   alias : nama kolom hasil SELECT (nilai cursor)
+#   desc  : True → DESC
+#   cast  : tipe CAST parameter (mis. REAL, supaya float4 Postgres
+#           dibandingkan sebagai float4, bukan numeric)
+Key = namedtuple("Key", "expr alias desc cast", defaults=(False, None))
+
+
+# ===============================
+# URUTAN LISTING ONU (DASHBOARD)
+# ===============================
+# dipakai dashboard/app.py & scripts/explain_onu.py (plan = query asli)
+# halaman OLT : RX terburuk dulu (NULL di akhir), lalu pon, onu_id
+ONU_PAGE_KEYS = [
+    Key("CASE WHEN rx_power IS NULL THEN 1 ELSE 0 END", "k_rx_null"),
+    Key("COALESCE(rx_power, 0)", "k_rx", cast="REAL"),
+    Key("pon", "k_pon"),
+    Key("onu_id", "k_onu"),
+]
+
+# /ont/problem : terbaru dulu, lalu RX terburuk (+ key unik ONU)
+PROBLEM_PAGE_KEYS = [
+    Key("n.last_update", "k_update", desc=True),
+    Key("CASE WHEN n.rx_power IS NULL THEN 1 ELSE 0 END", "k_rx_null"),
+    Key("COALESCE(n.rx_power, 0)", "k_rx", cast="REAL"),
+    Key("n.olt_id", "k_olt"),
+    Key("n.pon", "k_pon"),
+    Key("n.onu_id", "k_onu"),
+]
+
+
+def encode_cursor(values):
+    raw = json.dumps(list(values), default=str, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token, keys):
+    """
+    return: list nilai key, None kalau kosong / rusak
+    """
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        return None
+
+    if not isinstance(values, list) or len(values) != len(keys):
+        return None
+    return values
+
+
+def select_keys(keys):
+    return ", ".join(f"{k.expr} AS {k.alias}" for k in keys)
+
+
+def order_by(keys, reverse=False):
+    return ", ".join(
+        f"{k.expr} {'DESC' if k.desc != reverse else 'ASC'}"
+        for k in keys
+    )
+
+
+def row_key(row, keys):
+    return [row[k.alias] for k in keys]
+
+
+def seek_where(keys, values, reverse=False, ph="%s"):
+    """
+    Predikat leksikografis "sesudah values" sesuai arah ORDER BY:
+      k1 >= v1 AND ((k1 > v1) OR (k1 = v1 AND k2 > v2) OR ...)
+    (k1 >= v1 di depan → index pada k1 bisa dipakai sebagai range)
+
+    return: (sql, params)
+    """
+    def p(k):
+        return f"CAST({ph} AS {k.cast})" if k.cast else ph
+
+    def op(k, strict=True):
+        after = "<" if k.desc != reverse else ">"
+        return after if strict else after + "="
+
+    first = keys[0]
+    sql = f"{first.expr} {op(first, strict=False)} {p(first)}"
+    params = [values[0]]
+
+    branches = []
+    for i, k in enumerate(keys):
+        conds = [f"{keys[j].expr} = {p(keys[j])}" for j in range(i)]
+        conds.append(f"{k.expr} {op(k)} {p(k)}")
+        params.extend(values[:i] + [values[i]])
+        branches.append("(" + " AND ".join(conds) + ")")
+
+    return f"{sql} AND ({' OR '.join(branches)})", params
+
+
+def paginate(cur, columns, from_sql, where, params, keys,
+             after=None, before=None, limit=25, ph="%s"):
+    """
+    Ambil 1 halaman.
+
+    columns  : kolom SELECT, mis. "n.*, o.name AS olt_name"
+    from_sql : "onu_status n JOIN olt_devices o ON ..."
+    where    : list kondisi (digabung AND)
+    after    : cursor → halaman sesudah baris ini
+    before   : cursor → halaman sebelum baris ini
+
+    return: (rows, next_cursor, prev_cursor)
+    """
+    where = list(where)
+    params = list(params)
+
+    reverse = False
+    cursor = decode_cursor(after, keys)
+    if cursor is None:
+        cursor = decode_cursor(before, keys)
+        reverse = cursor is not None
+
+    if cursor is not None:
+        cond, cond_params = seek_where(keys, cursor, reverse=reverse, ph=ph)
+        where.append(cond)
+        params.extend(cond_params)
+
+    cur.execute(f"""
+        SELECT {columns}, {select_keys(keys)}
+        FROM {from_sql}
+        {"WHERE " + " AND ".join(where) if where else ""}
+        ORDER BY {order_by(keys, reverse)}
+        LIMIT {ph}
+    """, params + [limit + 1])
+    rows = cur.fetchall()
+
+    more = len(rows) > limit
+    rows = rows[:limit]
+    if reverse:
+        rows.reverse()
+
+    if not rows:
+        return rows, None, None
+
+    first_key = encode_cursor(row_key(rows[0], keys))
+    last_key = encode_cursor(row_key(rows[-1], keys))
+
+    if reverse:
+        # datang dari "sebelumnya" → pasti ada halaman sesudahnya
+        return rows, last_key, first_key if more else None
+
+    return rows, last_key if more else None, first_key if cursor is not None else None
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Migrasi skema onu_status (SQLite sync + PostgreSQL dashboard)
+
+- pon / onu_id dipastikan INTEGER (data lama hasil str(...) ikut dikonversi,
+  baris bukan angka dilaporkan → batal / dihapus dengan --delete-invalid)
+- index sesuai query dashboard
+- ringkasan onu_summary_* dibangun ulang dari onu_status
+- pppoe_active (postgres): kolom router_id / interface, PK (router_id, username)
+
+  python db/migrate.py            # SQLite data/dashboard.db + Postgres (DATABASE_URL)
+  python db/migrate.py --sqlite   # SQLite saja
+  python db/migrate.py --pg       # Postgres saja
+  python db/migrate.py --sqlite --delete-invalid
+                                  # hapus baris pon / onu_id bukan angka
+"""
+import os
+import sys
+import sqlite3
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+import onu_summary
+
+SQLITE_PATH = os.path.join(BASE_DIR, "data", "dashboard.db")
+
+# sama persis dengan filter /ont/problem → planner bisa pakai partial index
+PROBLEM_PREDICATE = (
+    "status != 'ONLINE' "
+    "OR (rx_power IS NOT NULL AND rx_power < -25) "
+    "OR diagnosis != 'NORMAL'"
+)
+
+# (olt_id, pon, onu_id) sudah ada lewat UNIQUE uq_onu → tidak dibuat ulang
+ONU_INDEXES = f"""
+-- halaman OLT: filter status per OLT
+CREATE INDEX IF NOT EXISTS idx_onu_status_olt_status
+    ON onu_status (olt_id, status);
+
+-- halaman OLT (keyset): urutan RX terburuk per OLT langsung dari index
+CREATE INDEX IF NOT EXISTS idx_onu_status_olt_rx
+    ON onu_status (
+        olt_id,
+        (CASE WHEN rx_power IS NULL THEN 1 ELSE 0 END),
+        (COALESCE(rx_power, 0)),
+        pon,
+        onu_id
+    );
+
+-- ONU terbaru per status (home: status != ONLINE ORDER BY last_update DESC)
+CREATE INDEX IF NOT EXISTS idx_onu_status_status_update
+    ON onu_status (status, last_update DESC);
+
+-- /ont/problem & home: hanya baris bermasalah (kecil), urut last_update
+CREATE INDEX IF NOT EXISTS idx_onu_status_problem
+    ON onu_status (last_update DESC)
+    WHERE {PROBLEM_PREDICATE};
+"""
+
+
+# ===============================
+# SQLITE
+# ===============================
+# nilai pon / onu_id yang bukan angka bulat (kosong, "1/2", "3.0", NULL)
+# → tidak di-CAST (SQLite akan menjadikannya 0 / angka terpotong)
+INVALID_ID_SQL = (
+    "{col} IS NULL OR TRIM({col}) = '' OR TRIM({col}) GLOB '*[^0-9]*'"
+)
+INVALID_SHOW = 20
+
+
+def _invalid_ids(cur):
+    """
+    return: list baris onu_status yang pon / onu_id-nya tidak bisa dikonversi
+    """
+    cond = " OR ".join(
+        f"(typeof({col}) != 'integer' AND ({INVALID_ID_SQL.format(col=col)}))"
+        for col in ("pon", "onu_id")
+    )
+    cur.execute(f"""
+        SELECT id, olt_id, pon, onu_id, name
+        FROM onu_status
+        WHERE {cond}
+        ORDER BY id
+    """)
+    return cur.fetchall()
+
+
+def migrate_sqlite(conn, delete_invalid=False):
+    """
+    Kolom sudah dideklarasi INTEGER (affinity), tapi baris lama bisa
+    tersimpan TEXT kalau nilainya bukan angka murni → normalisasi.
+    Baris yang bukan angka sama sekali dilaporkan dulu: migrasi batal,
+    kecuali delete_invalid (--delete-invalid) → baris itu dihapus
+    (sync berikutnya mengisi ulang ONU yang memang ada di OLT).
+    """
+    onu_summary.ensure_schema(conn)
+
+    cur = conn.cursor()
+    cur.execute("BEGIN IMMEDIATE")
+    try:
+        invalid = _invalid_ids(cur)
+        if invalid:
+            print(f"[MIGRATE] sqlite onu_status: {len(invalid)} baris pon / onu_id bukan angka")
+            for r in invalid[:INVALID_SHOW]:
+                print(f"   id={r['id']} olt_id={r['olt_id']} pon={r['pon']!r} "
+                      f"onu_id={r['onu_id']!r} name={r['name']!r}")
+            if len(invalid) > INVALID_SHOW:
+                print(f"   ... {len(invalid) - INVALID_SHOW} baris lagi")
+
+            if not delete_invalid:
+                raise SystemExit(
+                    "[MIGRATE] dibatalkan: perbaiki baris di atas atau jalankan "
+                    "ulang dengan --delete-invalid untuk menghapusnya"
+                )
+
+            cur.executemany(
+                "DELETE FROM onu_status WHERE id=?",
+                [(r["id"],) for r in invalid]
+            )
+            print(f"[MIGRATE] sqlite onu_status: {len(invalid)} baris dihapus")
+
+        for col in ("pon", "onu_id"):
+            cur.execute(f"""
+                UPDATE onu_status
+                SET {col} = CAST(TRIM({col}) AS INTEGER)
+                WHERE typeof({col}) != 'integer'
+                  AND NOT ({INVALID_ID_SQL.format(col=col)})
+            """)
+            print(f"[MIGRATE] sqlite onu_status.{col}: {cur.rowcount} baris dikonversi")
+
+        _run_script(cur, ONU_INDEXES)
+
+        n = onu_summary.rebuild_all(cur)
+        print(f"[MIGRATE] sqlite onu_summary: {n} OLT")
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+    conn.execute("ANALYZE onu_status")
+
+
+def _run_script(cur, script):
+    # executescript() melakukan COMMIT implisit → jalankan per statement
+    for stmt in script.split(";"):
+        if stmt.strip():
+            cur.execute(stmt)
+
+
+# ===============================
+# POSTGRES
+# ===============================
+def migrate_postgres(conn):
+    cur = conn.cursor()
+
+    cur.execute("""
+        SELECT column_name, data_type
+        FROM information_schema.columns
+        WHERE table_name = 'onu_status'
+          AND column_name IN ('pon', 'onu_id')
+    """)
+    types = {r["column_name"]: r["data_type"] for r in cur.fetchall()}
+
+    for col in ("pon", "onu_id"):
+        if types.get(col) and types[col] != "integer":
+            cur.execute(f"""
+                ALTER TABLE onu_status
+                ALTER COLUMN {col} TYPE INTEGER
+                USING TRIM({col}::TEXT)::INTEGER
+            """)
+            print(f"[MIGRATE] pg onu_status.{col}: {types[col]} → integer")
+
+    _run_script(cur, ONU_INDEXES)
+    cur.execute("ANALYZE onu_status")
+
+    migrate_pppoe_active(cur)
+
+    # autocommit → transaksi manual (dashboard tidak lihat ringkasan kosong)
+    cur.execute("BEGIN")
+    try:
+        n = onu_summary.rebuild_all(cur)
+        cur.execute("COMMIT")
+    except Exception:
+        cur.execute("ROLLBACK")
+        raise
+    print(f"[MIGRATE] pg onu_summary: {n} OLT")
+    cur.close()
+
+
+def migrate_pppoe_active(cur):
+    """
+    Skema lama: username TEXT PRIMARY KEY (1 router).
+    Collector multi-router butuh router_id + interface & PK (router_id, username).
+    """
+    cur.execute("SELECT to_regclass('pppoe_active') AS t")
+    if cur.fetchone()["t"] is None:
+        # belum ada → dibuat db/init.sql dengan skema baru
+        return
+
+    cur.execute("""
+        SELECT a.attname
+        FROM pg_index i
+        JOIN pg_attribute a
+          ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
+        WHERE i.indrelid = to_regclass('pppoe_active') AND i.indisprimary
+    """)
+    pk = {r["attname"] for r in cur.fetchall()}
+    if pk == {"router_id", "username"}:
+        return
+
+    cur.execute("BEGIN")
+    try:
+        cur.execute("ALTER TABLE pppoe_active ADD COLUMN IF NOT EXISTS router_id INTEGER")
+        cur.execute("ALTER TABLE pppoe_active ADD COLUMN IF NOT EXISTS interface TEXT")
+
+        # snapshot lama tanpa router → dibuang, diisi ulang collector berikutnya
+        cur.execute("DELETE FROM pppoe_active WHERE router_id IS NULL")
+        print(f"[MIGRATE] pg pppoe_active: {cur.rowcount} baris lama dihapus")
+
+        cur.execute("ALTER TABLE pppoe_active ALTER COLUMN router_id SET NOT NULL")
+
+        cur.execute("""
+            SELECT conname
+            FROM pg_constraint
+            WHERE conrelid = 'pppoe_active'::regclass AND contype = 'p'
+        """)
+        row = cur.fetchone()
+        if row:
+            cur.execute(f'ALTER TABLE pppoe_active DROP CONSTRAINT "{row["conname"]}"')
+        cur.execute("ALTER TABLE pppoe_active ADD PRIMARY KEY (router_id, username)")
+        cur.execute("COMMIT")
+    except Exception:
+        cur.execute("ROLLBACK")
+        raise
+    print("[MIGRATE] pg pppoe_active: PK (router_id, username)")
+
+
+def main():
+    args = set(sys.argv[1:])
+    run_sqlite = "--pg" not in args
+    run_pg = "--sqlite" not in args
+
+    if run_sqlite and os.path.exists(SQLITE_PATH):
+        conn = sqlite3.connect(SQLITE_PATH, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            migrate_sqlite(conn, delete_invalid="--delete-invalid" in args)
+        finally:
+            conn.close()
+        print("[MIGRATE] sqlite OK")
+
+    if run_pg and os.environ.get("DATABASE_URL"):
+        from db.db import get_db
+
+        conn = get_db()
+        try:
+            migrate_postgres(conn)
+        finally:
+            conn.close()
+        print("[MIGRATE] postgres OK")
+
+
+if __name__ == "__main__":
+    main()
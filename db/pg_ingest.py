@@ -0,0 +1,179 @@
+import io
+
+# ===============================
+# BULK INGEST ONU (POSTGRES)
+# ===============================
+# 1 OLT = 1x COPY ke tabel staging + 1x INSERT ... ON CONFLICT
+# + 1x DELETE ... NOT EXISTS → jumlah round-trip tetap, berapa pun ONU-nya
+# (ganti executemany upsert / delete per baris versi sqlite)
+#
+# harus dipanggil di dalam transaksi (staging dikosongkan saat COMMIT)
+
+STAGE_TABLE = "onu_stage"
+
+STAGE_COLUMNS = (
+    "pon", "onu_id",
+    "sn", "mac", "name",
+    "status", "rx_power", "tx_power",
+    "diagnosis"
+)
+
+# kolom yang diupdate (& dibandingkan) saat konflik
+MERGE_FIELDS = STAGE_COLUMNS[2:]
+
+STAGE_SCHEMA = f"""
+CREATE TEMP TABLE IF NOT EXISTS {STAGE_TABLE} (
+    pon INTEGER NOT NULL,
+    onu_id INTEGER NOT NULL,
+    sn TEXT,
+    mac TEXT,
+    name TEXT,
+    status TEXT,
+    rx_power REAL,
+    tx_power REAL,
+    diagnosis TEXT
+) ON COMMIT DELETE ROWS
+"""
+
+
+def _copy_value(value):
+    """
+    Format text COPY: NULL = \\N, backslash / tab / newline di-escape
+    """
+    if value is None:
+        return "\\N"
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def _copy_buffer(onus):
+    buf = io.StringIO()
+    for onu in onus:
+        row = (
+            int(onu.get("pon")),
+            int(onu.get("onu_id")),
+            onu.get("sn"),
+            onu.get("mac"),
+            onu.get("name"),
+            onu.get("status"),
+            onu.get("rx_power"),
+            onu.get("tx_power"),
+            onu.get("diagnosis"),
+        )
+        buf.write("\t".join(_copy_value(v) for v in row))
+        buf.write("\n")
+    buf.seek(0)
+    return buf
+
+
+def stage_onus(cur, onus):
+    """
+    Isi staging (temp table per koneksi) lewat COPY FROM STDIN
+    """
+    cur.execute(STAGE_SCHEMA)
+    # koneksi pool bisa dipakai ulang → pastikan kosong
+    cur.execute(f"TRUNCATE {STAGE_TABLE}")
+    if onus:
+        cur.copy_expert(
+            f"COPY {STAGE_TABLE} ({', '.join(STAGE_COLUMNS)}) "
+            "FROM STDIN",
+            _copy_buffer(onus)
+        )
+
+
+def merge_onus(cur, olt_id, onus, pons=None):
+    """
+    Sinkronkan onu_status 1 OLT dengan hasil scrape.
+
+    pons : None → seluruh OLT, set → hanya PON ini yang direkonsiliasi
+           (ONU di PON lain tidak dihapus)
+
+    return: (upserted, deleted)
+      upserted = ONU baru + ONU yang kolomnya berubah
+                 (baris sama persis tidak ditulis ulang → last_update tetap)
+    """
+    stage_onus(cur, onus)
+
+    # DISTINCT ON: scrape ganda (pon, onu_id) sama → ON CONFLICT
+    # tidak boleh menyentuh baris yang sama 2x dalam 1 statement
+    cur.execute(f"""
+        INSERT INTO onu_status (
+            olt_id, {", ".join(STAGE_COLUMNS)}, last_update
+        )
+        SELECT DISTINCT ON (pon, onu_id)
+            %s, {", ".join(STAGE_COLUMNS)}, CURRENT_TIMESTAMP
+        FROM {STAGE_TABLE}
+        ORDER BY pon, onu_id
+        ON CONFLICT (olt_id, pon, onu_id) DO UPDATE SET
+            {", ".join(f"{f} = EXCLUDED.{f}" for f in MERGE_FIELDS)},
+            last_update = CURRENT_TIMESTAMP
+        WHERE ({", ".join(f"onu_status.{f}" for f in MERGE_FIELDS)})
+              IS DISTINCT FROM
+              ({", ".join(f"EXCLUDED.{f}" for f in MERGE_FIELDS)})
+    """, (olt_id,))
+    upserted = cur.rowcount
+
+    params = [olt_id]
+    scope = ""
+    if pons is not None:
+        scope = "AND s.pon = ANY(%s)"
+        params.append(sorted(int(p) for p in pons))
+
+    cur.execute(f"""
+        DELETE FROM onu_status s
+        WHERE s.olt_id = %s
+          {scope}
+          AND NOT EXISTS (
+              SELECT 1 FROM {STAGE_TABLE} t
+              WHERE t.pon = s.pon AND t.onu_id = s.onu_id
+          )
+    """, params)
+    deleted = cur.rowcount
+
+    return upserted, deleted
+
+
+# ===============================
+# STAGING SAMPEL OPTIK (optical_history)
+# ===============================
+# sampel RX/TX 1 sync → 1x COPY, lalu raw + rollup 5m/1h/1d masing-masing
+# 1x INSERT ... SELECT (bukan executemany per ONU per tabel)
+SAMPLE_STAGE_TABLE = "optical_stage"
+
+SAMPLE_STAGE_COLUMNS = ("pon", "onu_id", "rx_power", "tx_power", "changed")
+
+SAMPLE_STAGE_SCHEMA = f"""
+CREATE TEMP TABLE IF NOT EXISTS {SAMPLE_STAGE_TABLE} (
+    pon INTEGER NOT NULL,
+    onu_id INTEGER NOT NULL,
+    rx_power REAL,
+    tx_power REAL,
+    changed BOOLEAN NOT NULL
+) ON COMMIT DELETE ROWS
+"""
+
+
+def stage_samples(cur, samples):
+    """
+    samples: iterable (pon, onu_id, rx, tx, changed)
+    """
+    cur.execute(SAMPLE_STAGE_SCHEMA)
+    cur.execute(f"TRUNCATE {SAMPLE_STAGE_TABLE}")
+
+    buf = io.StringIO()
+    for pon, onu_id, rx, tx, changed in samples:
+        row = (int(pon), int(onu_id), rx, tx, "t" if changed else "f")
+        buf.write("\t".join(_copy_value(v) for v in row))
+        buf.write("\n")
+    buf.seek(0)
+
+    cur.copy_expert(
+        f"COPY {SAMPLE_STAGE_TABLE} ({', '.join(SAMPLE_STAGE_COLUMNS)}) "
+        "FROM STDIN",
+        buf
+    )
@@ -0,0 +1,240 @@
+import os
+import re
+import json
+from datetime import datetime, timezone
+
+import ijson
+import requests
+
+# ===============================
+# GENIEACS NBI CLIENT
+# ===============================
+# Filter / sort / halaman dikirim ke GenieACS (query=, projection=,
+# sort=, skip=, limit=) → yang lewat jaringan hanya 1 halaman
+# & kolom yang ditampilkan, bukan seluruh device + semua parameter.
+GENIEACS_TIMEOUT = float(os.environ.get("GENIEACS_TIMEOUT", 15))
+
+# device dianggap online kalau inform terakhir < N detik
+ONLINE_WINDOW = 300
+
+RX_CRITICAL = -25
+
+# path parameter (GenieACS) yang dipakai halaman device
+PARAM_PPPOE = "VirtualParameters.pppoeUsername._value"
+PARAM_RX = "VirtualParameters.RXPower._value"
+PARAM_TEMP = "VirtualParameters.gettemp._value"
+
+DEVICE_PROJECTION = ",".join((
+    "_id",
+    "_lastInform",
+    "_deviceId._Manufacturer",
+    "_deviceId._ProductClass",
+    "VirtualParameters.pppoeUsername",
+    "VirtualParameters.RXPower",
+    "VirtualParameters.gettemp",
+))
+
+# nilai (leaf) yang disimpan saat parsing streaming, sisanya dibuang
+DEVICE_FIELDS = frozenset((
+    "_id",
+    "_lastInform",
+    "_deviceId._Manufacturer",
+    "_deviceId._ProductClass",
+    PARAM_PPPOE,
+    PARAM_RX,
+    PARAM_TEMP,
+))
+
+_SCALAR_EVENTS = ("string", "number", "boolean", "null")
+
+# ?sort= halaman device → sort GenieACS
+SORTS = {
+    "last_inform": {"_lastInform": -1},
+    "rx": {PARAM_RX: 1},
+    "pppoe": {PARAM_PPPOE: 1},
+}
+DEFAULT_SORT = "last_inform"
+
+# keep-alive ke ACS antar request dashboard
+_session = requests.Session()
+
+
+# ===============================
+# QUERY
+# ===============================
+def iso(ts):
+    """
+    epoch → string tanggal yang dikenali query GenieACS
+    """
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+def device_query(search=None, rx_critical=False, online_since=None):
+    """
+    Query MongoDB-style untuk /devices
+
+    search       : substring (case-insensitive) PPPoE / device id / model
+    rx_critical  : RX < -25 dBm (VirtualParameter RXPower harus bertipe angka)
+    online_since : epoch → hanya device dengan inform sesudahnya
+    """
+    conds = []
+
+    if search:
+        pattern = {"$regex": re.escape(search), "$options": "i"}
+        conds.append({"$or": [
+            {PARAM_PPPOE: pattern},
+            {"_id": pattern},
+            {"_deviceId._ProductClass": pattern},
+        ]})
+
+    if rx_critical:
+        conds.append({PARAM_RX: {"$lt": RX_CRITICAL}})
+
+    if online_since is not None:
+        conds.append({"_lastInform": {"$gt": iso(online_since)}})
+
+    if not conds:
+        return {}
+    if len(conds) == 1:
+        return conds[0]
+    return {"$and": conds}
+
+
+# ===============================
+# NBI REQUEST
+# ===============================
+def _device_params(query=None, projection=None, sort=None, skip=0, limit=None):
+    params = {}
+    if query:
+        params["query"] = json.dumps(query, separators=(",", ":"))
+    if projection:
+        params["projection"] = projection
+    if sort:
+        params["sort"] = json.dumps(sort, separators=(",", ":"))
+    if skip:
+        params["skip"] = int(skip)
+    if limit:
+        params["limit"] = int(limit)
+    return params
+
+
+def slim_devices(fp, fields=DEVICE_FIELDS):
+    """
+    Parse array JSON /devices secara streaming (ijson), per device hanya
+    leaf di `fields` yang dibangun → memori tetap kecil berapa pun
+    jumlah device / parameter yang dikirim ACS.
+
+    yield: dict bersarang, mis. {"_id": ..., "VirtualParameters":
+           {"RXPower": {"_value": ...}}} (bentuk sama dengan r.json())
+    """
+    device = None
+    for prefix, event, value in ijson.parse(fp, use_float=True):
+        if prefix == "item":
+            if event == "start_map":
+                device = {}
+            elif event == "end_map":
+                yield device
+                device = None
+            continue
+
+        if device is None or event not in _SCALAR_EVENTS:
+            continue
+
+        path = prefix[5:]   # buang "item."
+        if path not in fields:
+            continue
+
+        *parents, leaf = path.split(".")
+        node = device
+        for key in parents:
+            node = node.setdefault(key, {})
+        node[leaf] = value
+
+
+def iter_devices(base_url, query=None, projection=None, sort=None,
+                 skip=0, limit=None, fields=DEVICE_FIELDS,
+                 timeout=GENIEACS_TIMEOUT):
+    """
+    GET /devices tanpa r.json(): body dibaca streaming,
+    device di-yield satu per satu (lihat slim_devices)
+    """
+    params = _device_params(query, projection, sort, skip, limit)
+
+    with _session.get(f"{base_url}/devices", params=params,
+                      timeout=timeout, stream=True) as r:
+        r.raise_for_status()
+        # gzip / deflate dari ACS / reverse proxy
+        r.raw.decode_content = True
+        yield from slim_devices(r.raw, fields)
+
+
+def list_devices(base_url, query=None, projection=None, sort=None,
+                 skip=0, limit=None, timeout=GENIEACS_TIMEOUT):
+    return list(iter_devices(
+        base_url, query, projection, sort, skip, limit, timeout=timeout
+    ))
+
+
+def count_devices(base_url, query=None, timeout=GENIEACS_TIMEOUT):
+    """
+    Jumlah device cocok query lewat HEAD (header X-Total-Count),
+    tanpa body. ACS lama tanpa header → GET projection _id saja.
+    """
+    params = _device_params(query)
+
+    r = _session.head(f"{base_url}/devices", params=params, timeout=timeout)
+    r.raise_for_status()
+
+    total = r.headers.get("X-Total-Count")
+    if total is not None:
+        return int(total)
+
+    return sum(1 for _ in iter_devices(
+        base_url, query, projection="_id", fields=("_id",), timeout=timeout
+    ))
+
+
+# ===============================
+# NORMALISASI
+# ===============================
+def parse_iso(ts):
+    try:
+        return datetime.fromisoformat(
+            ts.replace("Z", "+00:00")
+        ).timestamp()
+    except Exception:
+        return 0
+
+
+def parse_device(d, now):
+    vp = d.get("VirtualParameters", {})
+    did = d.get("_deviceId", {})
+
+    pppoe = (
+        vp.get("pppoeUsername", {}).get("_value")
+        or "-"
+    )
+
+    try:
+        rx = float(vp.get("RXPower", {}).get("_value"))
+    except Exception:
+        rx = None
+
+    try:
+        temp = int(vp.get("gettemp", {}).get("_value"))
+    except Exception:
+        temp = None
+
+    last_inform = d.get("_lastInform")
+    last_ts = parse_iso(last_inform) if last_inform else 0
+
+    return {
+        "id": d.get("_id", ""),
+        "pppoe": pppoe,
+        "rx": rx,
+        "temp": temp,
+        "vendor": did.get("_Manufacturer", "-"),
+        "model": did.get("_ProductClass", "-"),
+        "online": (now - last_ts) < ONLINE_WINDOW,
+        "last_inform": last_inform
+    }
@@ -41,6 +41,29 @@ CREATE TABLE IF NOT EXISTS onu_status (
       ON DELETE CASCADE
 );
 
+-- index query dashboard (lihat db/migrate.py)
+-- (olt_id, pon, onu_id) sudah dicakup UNIQUE uq_onu
+CREATE INDEX IF NOT EXISTS idx_onu_status_olt_status
+    ON onu_status (olt_id, status);
+
+CREATE INDEX IF NOT EXISTS idx_onu_status_olt_rx
+    ON onu_status (
+        olt_id,
+        (CASE WHEN rx_power IS NULL THEN 1 ELSE 0 END),
+        (COALESCE(rx_power, 0)),
+        pon,
+        onu_id
+    );
+
+CREATE INDEX IF NOT EXISTS idx_onu_status_status_update
+    ON onu_status (status, last_update DESC);
+
+CREATE INDEX IF NOT EXISTS idx_onu_status_problem
+    ON onu_status (last_update DESC)
+    WHERE status != 'ONLINE'
+       OR (rx_power IS NOT NULL AND rx_power < -25)
+       OR diagnosis != 'NORMAL';
+
 -- ================= ALERTS =================
 CREATE TABLE IF NOT EXISTS alerts (
     id SERIAL PRIMARY KEY,
@@ -53,11 +76,207 @@ CREATE TABLE IF NOT EXISTS alerts (
 );
 
 -- ================= PPPoE =================
+-- diisi collectors/mikrotik_snmp.py (semua router, GETBULK IF-MIB)
 CREATE TABLE IF NOT EXISTS pppoe_active (
-    username TEXT PRIMARY KEY,
+    router_id INTEGER NOT NULL,
+    username TEXT NOT NULL,
+    interface TEXT,
     rx_bytes BIGINT,
     tx_bytes BIGINT,
-    last_update TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    last_update TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (router_id, username)
+);
+
+-- ================= RIWAYAT OPTIK ONU =================
+CREATE TABLE IF NOT EXISTS onu_optical_raw (
+    olt_id INTEGER NOT NULL,
+    pon INTEGER NOT NULL,
+    onu_id INTEGER NOT NULL,
+    ts BIGINT NOT NULL,
+    rx_power REAL,
+    tx_power REAL,
+    PRIMARY KEY (olt_id, pon, onu_id, ts)
+);
+
+CREATE INDEX IF NOT EXISTS idx_onu_optical_raw_ts ON onu_optical_raw (ts);
+
+CREATE TABLE IF NOT EXISTS onu_optical_5m (
+    olt_id INTEGER NOT NULL,
+    pon INTEGER NOT NULL,
+    onu_id INTEGER NOT NULL,
+    bucket BIGINT NOT NULL,
+    rx_min REAL,
+    rx_max REAL,
+    rx_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    rx_count INTEGER NOT NULL DEFAULT 0,
+    tx_min REAL,
+    tx_max REAL,
+    tx_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    tx_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (olt_id, pon, onu_id, bucket)
+);
+
+CREATE INDEX IF NOT EXISTS idx_onu_optical_5m_bucket ON onu_optical_5m (bucket);
+
+CREATE TABLE IF NOT EXISTS onu_optical_1h (
+    olt_id INTEGER NOT NULL,
+    pon INTEGER NOT NULL,
+    onu_id INTEGER NOT NULL,
+    bucket BIGINT NOT NULL,
+    rx_min REAL,
+    rx_max REAL,
+    rx_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    rx_count INTEGER NOT NULL DEFAULT 0,
+    tx_min REAL,
+    tx_max REAL,
+    tx_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    tx_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (olt_id, pon, onu_id, bucket)
+);
+
+CREATE INDEX IF NOT EXISTS idx_onu_optical_1h_bucket ON onu_optical_1h (bucket);
+
+CREATE TABLE IF NOT EXISTS onu_optical_1d (
+    olt_id INTEGER NOT NULL,
+    pon INTEGER NOT NULL,
+    onu_id INTEGER NOT NULL,
+    bucket BIGINT NOT NULL,
+    rx_min REAL,
+    rx_max REAL,
+    rx_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    rx_count INTEGER NOT NULL DEFAULT 0,
+    tx_min REAL,
+    tx_max REAL,
+    tx_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    tx_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (olt_id, pon, onu_id, bucket)
+);
+
+CREATE INDEX IF NOT EXISTS idx_onu_optical_1d_bucket ON onu_optical_1d (bucket);
+
+-- ================= RINGKASAN ONU (onu_summary.py) =================
+CREATE TABLE IF NOT EXISTS onu_summary_pon (
+    olt_id INTEGER NOT NULL,
+    pon INTEGER NOT NULL,
+    total INTEGER NOT NULL DEFAULT 0,
+    online INTEGER NOT NULL DEFAULT 0,
+    offline INTEGER NOT NULL DEFAULT 0,
+    problem INTEGER NOT NULL DEFAULT 0,
+    rx_min REAL,
+    rx_avg REAL,
+    rx_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    rx_count INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (olt_id, pon)
+);
+
+CREATE TABLE IF NOT EXISTS onu_summary_olt (
+    olt_id INTEGER PRIMARY KEY,
+    total INTEGER NOT NULL DEFAULT 0,
+    online INTEGER NOT NULL DEFAULT 0,
+    offline INTEGER NOT NULL DEFAULT 0,
+    problem INTEGER NOT NULL DEFAULT 0,
+    rx_min REAL,
+    rx_avg REAL,
+    rx_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    rx_count INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS onu_summary_global (
+    id INTEGER PRIMARY KEY,
+    total INTEGER NOT NULL DEFAULT 0,
+    online INTEGER NOT NULL DEFAULT 0,
+    offline INTEGER NOT NULL DEFAULT 0,
+    problem INTEGER NOT NULL DEFAULT 0,
+    rx_min REAL,
+    rx_avg REAL,
+    rx_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    rx_count INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- ================= REACHABILITY (collectors/reachability_monitor.py) =================
+CREATE TABLE IF NOT EXISTS device_reachability (
+    kind TEXT NOT NULL,
+    device_id INTEGER NOT NULL,
+    host TEXT NOT NULL,
+    is_up INTEGER NOT NULL DEFAULT 0,
+    rtt_ms REAL,
+    last_seen TIMESTAMP,
+    last_check TIMESTAMP,
+    PRIMARY KEY (kind, device_id)
+);
+
+-- ================= SYNC STATE (sync_core.py, SYNC_DB=postgres) =================
+CREATE TABLE IF NOT EXISTS pon_fingerprint (
+    olt_id INTEGER NOT NULL,
+    pon INTEGER NOT NULL,
+    fingerprint TEXT NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (olt_id, pon)
+);
+
+CREATE TABLE IF NOT EXISTS olt_sync_state (
+    olt_id INTEGER PRIMARY KEY,
+    cycle INTEGER NOT NULL DEFAULT 0,
+    last_full_sync TIMESTAMP
+);
+
+-- ================= ALERT OUTBOX (alerts/outbox.py, SYNC_DB=postgres) =================
+CREATE TABLE IF NOT EXISTS alert_outbox (
+    id SERIAL PRIMARY KEY,
+    olt_id INTEGER,
+    message TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at DOUBLE PRECISION NOT NULL DEFAULT 0,
+    claimed_at DOUBLE PRECISION,
+    last_error TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    sent_at TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_alert_outbox_status
+    ON alert_outbox (status, next_attempt_at);
+
+-- ================= TR-069 =================
+CREATE TABLE IF NOT EXISTS tr069_servers (
+    id SERIAL PRIMARY KEY,
+    name TEXT NOT NULL,
+    base_url TEXT NOT NULL,
+    is_active INTEGER DEFAULT 1,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- mirror device GenieACS (collectors/tr069_mirror.py)
+CREATE TABLE IF NOT EXISTS tr069_devices (
+    server_id INTEGER NOT NULL,
+    device_id TEXT NOT NULL,
+    pppoe TEXT,
+    rx_power REAL,
+    temp INTEGER,
+    vendor TEXT,
+    model TEXT,
+    last_inform TEXT,
+    last_inform_ts DOUBLE PRECISION,
+    seen_at DOUBLE PRECISION NOT NULL,
+    PRIMARY KEY (server_id, device_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_tr069_devices_inform
+    ON tr069_devices (server_id, last_inform_ts DESC);
+
+CREATE INDEX IF NOT EXISTS idx_tr069_devices_rx
+    ON tr069_devices (server_id, rx_power);
+
+CREATE TABLE IF NOT EXISTS tr069_mirror_state (
+    server_id INTEGER PRIMARY KEY,
+    watermark TEXT,
+    last_full_ts DOUBLE PRECISION,
+    last_sync TIMESTAMP,
+    last_count INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT
 );
 
 -- ================= TELEGRAM =================
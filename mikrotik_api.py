@@ -0,0 +1,283 @@
+import os
+import time
+import threading
+
+from routeros_api import RouterOsApiPool
+from routeros_api import exceptions as ros_exceptions
+
+# ===============================
+# POOL SESSION ROUTEROS API (PER PROSES)
+# ===============================
+# 1 session login per router dipakai ulang antar request
+# (sebelumnya: connect + login + disconnect di setiap panggilan realtime).
+# API RouterOS sekuensial per koneksi → session dikunci selama dipakai.
+API_TIMEOUT = float(os.environ.get("MIKROTIK_API_TIMEOUT", 5))
+# session idle lebih lama dari ini ditutup
+API_IDLE_TIMEOUT = float(os.environ.get("MIKROTIK_API_IDLE_TIMEOUT", 300))
+# session idle dikirimi perintah ringan tiap N detik (NAT / firewall
+# tidak memutus koneksi diam, session mati ketahuan lebih awal)
+API_KEEPALIVE = float(os.environ.get("MIKROTIK_API_KEEPALIVE", 60))
+# hasil realtime dipakai bersama semua viewer selama N detik
+REALTIME_TTL = float(os.environ.get("MIKROTIK_REALTIME_TTL", 5))
+
+# error koneksi → session dibuang, request diulang 1x dengan login baru
+CONNECTION_ERRORS = (
+    ros_exceptions.RouterOsApiConnectionError,
+    ros_exceptions.FatalRouterOsApiError,
+    ros_exceptions.RouterOsApiFatalCommunicationError,
+    OSError,
+)
+
+
+class RouterSession:
+    def __init__(self, host, username, password, port):
+        self.pool = RouterOsApiPool(
+            host,
+            username=username,
+            password=password,
+            port=port,
+            use_ssl=False,
+            plaintext_login=True
+        )
+        self.pool.socket_timeout = API_TIMEOUT
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+
+    @property
+    def connected(self):
+        return self.pool.connected
+
+    def api(self):
+        # login ulang otomatis kalau belum / sudah terputus
+        return self.pool.get_api()
+
+    def close(self):
+        try:
+            self.pool.disconnect()
+        except Exception:
+            pass
+
+
+class RouterPool:
+    def __init__(self, idle_timeout=API_IDLE_TIMEOUT, keepalive=API_KEEPALIVE):
+        self.idle_timeout = idle_timeout
+        self.keepalive = keepalive
+
+        self.pid = os.getpid()
+        self._lock = threading.Lock()
+        self._sessions = {}
+        self._reaper = None
+
+        self._stats = {
+            "calls": 0,
+            "connects": 0,
+            "reconnects": 0,
+            "keepalive_failed": 0,
+            "idle_closed": 0,
+        }
+
+    # ---------- internal ----------
+    def _bump(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+    def _check_fork(self):
+        # socket milik parent (gunicorn preload) tidak dipakai di child
+        if os.getpid() != self.pid:
+            self.pid = os.getpid()
+            self._sessions = {}
+            self._reaper = None
+
+    def _session(self, key, router):
+        with self._lock:
+            self._check_fork()
+
+            if self._reaper is None:
+                self._reaper = threading.Thread(
+                    target=self._reap_forever,
+                    name="mikrotik-api-reaper",
+                    daemon=True
+                )
+                self._reaper.start()
+
+            session = self._sessions.get(key)
+            if session is None:
+                session = RouterSession(
+                    router["host"],
+                    router["api_user"],
+                    router["api_pass"],
+                    router["api_port"]
+                )
+                self._sessions[key] = session
+            return session
+
+    def _drop(self, key, session):
+        with self._lock:
+            if self._sessions.get(key) is session:
+                del self._sessions[key]
+        session.close()
+
+    # ---------- API ----------
+    def call(self, router, fn):
+        """
+        Jalankan fn(api) memakai session router yang sudah login.
+        fn diulang 1x setelah error koneksi → harus aman diulang (baca saja).
+
+        router : baris mikrotik_devices (host, api_user, api_pass, api_port)
+        """
+        # kredensial / port berubah → session baru
+        key = (router["host"], router["api_port"], router["api_user"], router["api_pass"])
+        self._bump("calls")
+
+        for attempt in (1, 2):
+            session = self._session(key, router)
+            with session.lock:
+                try:
+                    if not session.connected:
+                        self._bump("connects" if attempt == 1 else "reconnects")
+                    result = fn(session.api())
+                    session.last_used = time.monotonic()
+                    return result
+                except CONNECTION_ERRORS:
+                    session.close()
+                    if attempt == 2:
+                        self._drop(key, session)
+                        raise
+
+    def reap(self):
+        """
+        Tutup session idle > idle_timeout, keepalive session idle > keepalive
+        """
+        now = time.monotonic()
+        with self._lock:
+            sessions = list(self._sessions.items())
+
+        for key, session in sessions:
+            # sedang dipakai request → lewati
+            if not session.lock.acquire(blocking=False):
+                continue
+            try:
+                idle = now - session.last_used
+                if idle > self.idle_timeout:
+                    self._drop(key, session)
+                    self._bump("idle_closed")
+                elif idle > self.keepalive and session.connected:
+                    try:
+                        session.api().get_resource("/system/identity").get()
+                    except Exception:
+                        self._drop(key, session)
+                        self._bump("keepalive_failed")
+            finally:
+                session.lock.release()
+
+    def _reap_forever(self):
+        interval = max(1.0, min(self.keepalive, self.idle_timeout) / 2)
+        while True:
+            time.sleep(interval)
+            try:
+                self.reap()
+            except Exception as e:
+                print(f"[MIKROTIK] reaper error: {e}")
+
+    def close_all(self):
+        with self._lock:
+            sessions, self._sessions = self._sessions, {}
+        for session in sessions.values():
+            session.close()
+
+    def stats(self):
+        with self._lock:
+            s = dict(self._stats)
+            s["pid"] = self.pid
+            s["sessions"] = len(self._sessions)
+            s["connected"] = sum(1 for x in self._sessions.values() if x.connected)
+        return s
+
+
+# ===============================
+# SINGLE-FLIGHT + CACHE TTL PENDEK
+# ===============================
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Pemanggil serentak dengan key sama → 1 query ke router, hasilnya
+    dibagi ke semua; hasil sukses disimpan `ttl` detik.
+    Beban router tetap ±1 query / ttl / worker, berapa pun viewer-nya.
+    Error tidak di-cache (hanya dibagi ke yang sedang menunggu).
+    """
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._results = {}   # key → (expires_at, value)
+        self._flights = {}   # key → _Flight yang sedang jalan
+        self._stats = {"hits": 0, "shared": 0, "misses": 0}
+
+    def get(self, key, fn):
+        with self._lock:
+            cached = self._results.get(key)
+            if cached and cached[0] > time.monotonic():
+                self._stats["hits"] += 1
+                return cached[1]
+
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self._stats["misses"] += 1
+            else:
+                self._stats["shared"] += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = fn()
+            with self._lock:
+                self._results[key] = (time.monotonic() + self.ttl, flight.value)
+            return flight.value
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def stats(self):
+        with self._lock:
+            s = dict(self._stats)
+            s["keys"] = len(self._results)
+            s["in_flight"] = len(self._flights)
+        return s
+
+
+_pool = RouterPool()
+_realtime = SingleFlight(REALTIME_TTL)
+
+
+def call(router, fn):
+    return _pool.call(router, fn)
+
+
+def cached_call(key, router, fn):
+    """
+    call() lewat single-flight + cache REALTIME_TTL (data baca saja)
+    key: mis. ("realtime", router_id)
+    """
+    return _realtime.get(key, lambda: _pool.call(router, fn))
+
+
+def pool_stats():
+    s = _pool.stats()
+    s["cache"] = _realtime.stats()
+    return s
@@ -0,0 +1,209 @@
+# ===============================
+# RINGKASAN ONU (MATERIALIZED)
+# ===============================
+# Di-refresh sync_core di akhir transaksi sync tiap OLT → dashboard cukup
+# baca beberapa baris, tidak COUNT(*) onu_status tiap request.
+#
+#   onu_summary_pon    : per (olt_id, pon)
+#   onu_summary_olt    : per olt_id
+#   onu_summary_global : 1 baris (id = 1), total semua OLT
+#
+# problem = status != ONLINE / RX < -25 / diagnosis != NORMAL
+#           (sama dengan filter halaman /ont/problem)
+
+RX_PROBLEM = -25
+
+_COUNT_COLUMNS = """
+    total INTEGER NOT NULL DEFAULT 0,
+    online INTEGER NOT NULL DEFAULT 0,
+    offline INTEGER NOT NULL DEFAULT 0,
+    problem INTEGER NOT NULL DEFAULT 0,
+    rx_min REAL,
+    rx_avg REAL,
+    rx_sum REAL NOT NULL DEFAULT 0,
+    rx_count INTEGER NOT NULL DEFAULT 0,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+"""
+
+SUMMARY_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS onu_summary_pon (
+    olt_id INTEGER NOT NULL,
+    pon INTEGER NOT NULL,
+    {_COUNT_COLUMNS},
+    PRIMARY KEY (olt_id, pon)
+);
+
+CREATE TABLE IF NOT EXISTS onu_summary_olt (
+    olt_id INTEGER PRIMARY KEY,
+    {_COUNT_COLUMNS}
+);
+
+CREATE TABLE IF NOT EXISTS onu_summary_global (
+    id INTEGER PRIMARY KEY,
+    {_COUNT_COLUMNS}
+);
+"""
+
+
+def ensure_schema(conn):
+    conn.executescript(SUMMARY_SCHEMA)
+
+
+# ===============================
+# REFRESH (DIPANGGIL sync_core, DALAM TRANSAKSI SYNC)
+# ===============================
+def _summarize(rows):
+    total = sum(r["total"] for r in rows)
+    online = sum(r["online"] for r in rows)
+    rx_sum = sum(r["rx_sum"] or 0 for r in rows)
+    rx_count = sum(r["rx_count"] for r in rows)
+    rx_mins = [r["rx_min"] for r in rows if r["rx_min"] is not None]
+
+    return {
+        "total": total,
+        "online": online,
+        "offline": total - online,
+        "problem": sum(r["problem"] for r in rows),
+        "rx_min": min(rx_mins) if rx_mins else None,
+        "rx_avg": rx_sum / rx_count if rx_count else None,
+        "rx_sum": rx_sum,
+        "rx_count": rx_count,
+    }
+
+
+def _values(s):
+    return (
+        s["total"], s["online"], s["offline"], s["problem"],
+        s["rx_min"], s["rx_avg"], s["rx_sum"], s["rx_count"]
+    )
+
+
+def pon_counts(cur, olt_id):
+    """
+    Hitung langsung dari onu_status per PON (1 query GROUP BY pon)
+    """
+    cur.execute(f"""
+        SELECT
+            pon,
+            COUNT(*) AS total,
+            SUM(CASE WHEN status = 'ONLINE' THEN 1 ELSE 0 END) AS online,
+            SUM(CASE
+                WHEN status != 'ONLINE'
+                  OR (rx_power IS NOT NULL AND rx_power < {RX_PROBLEM})
+                  OR diagnosis != 'NORMAL'
+                THEN 1 ELSE 0 END) AS problem,
+            MIN(rx_power) AS rx_min,
+            SUM(rx_power) AS rx_sum,
+            COUNT(rx_power) AS rx_count
+        FROM onu_status
+        WHERE olt_id=?
+        GROUP BY pon
+    """, (olt_id,))
+    return cur.fetchall()
+
+
+def refresh_olt(cur, olt_id):
+    """
+    Hitung ulang ringkasan 1 OLT (per PON + total OLT) lalu global.
+    Cuma scan baris onu_status milik OLT ini.
+    """
+    per_pon = {int(r["pon"]): _summarize([r]) for r in pon_counts(cur, olt_id)}
+
+    cur.execute("DELETE FROM onu_summary_pon WHERE olt_id=?", (olt_id,))
+    cur.executemany("""
+        INSERT INTO onu_summary_pon (
+            olt_id, pon,
+            total, online, offline, problem,
+            rx_min, rx_avg, rx_sum, rx_count,
+            updated_at
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+    """, [(olt_id, pon) + _values(s) for pon, s in per_pon.items()])
+
+    cur.execute("""
+        INSERT INTO onu_summary_olt (
+            olt_id,
+            total, online, offline, problem,
+            rx_min, rx_avg, rx_sum, rx_count,
+            updated_at
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT(olt_id) DO UPDATE SET
+            total=excluded.total,
+            online=excluded.online,
+            offline=excluded.offline,
+            problem=excluded.problem,
+            rx_min=excluded.rx_min,
+            rx_avg=excluded.rx_avg,
+            rx_sum=excluded.rx_sum,
+            rx_count=excluded.rx_count,
+            updated_at=CURRENT_TIMESTAMP
+    """, (olt_id,) + _values(_summarize(list(per_pon.values()))))
+
+    refresh_global(cur)
+
+
+def refresh_global(cur):
+    """
+    Global = jumlah ringkasan per OLT (tabel kecil, 1 baris per OLT)
+    """
+    cur.execute("""
+        INSERT INTO onu_summary_global (
+            id,
+            total, online, offline, problem,
+            rx_min, rx_avg, rx_sum, rx_count,
+            updated_at
+        )
+        SELECT
+            1,
+            COALESCE(SUM(total), 0),
+            COALESCE(SUM(online), 0),
+            COALESCE(SUM(offline), 0),
+            COALESCE(SUM(problem), 0),
+            MIN(rx_min),
+            CASE WHEN SUM(rx_count) > 0 THEN SUM(rx_sum) / SUM(rx_count) END,
+            COALESCE(SUM(rx_sum), 0),
+            COALESCE(SUM(rx_count), 0),
+            CURRENT_TIMESTAMP
+        FROM onu_summary_olt
+        -- WHERE wajib di SQLite untuk INSERT ... SELECT ... ON CONFLICT
+        WHERE 1 = 1
+        ON CONFLICT(id) DO UPDATE SET
+            total=excluded.total,
+            online=excluded.online,
+            offline=excluded.offline,
+            problem=excluded.problem,
+            rx_min=excluded.rx_min,
+            rx_avg=excluded.rx_avg,
+            rx_sum=excluded.rx_sum,
+            rx_count=excluded.rx_count,
+            updated_at=CURRENT_TIMESTAMP
+    """)
+
+
+def rebuild_all(cur):
+    """
+    Bangun ulang ringkasan semua OLT dari onu_status
+    (deploy pertama / data diubah di luar sync, dipanggil db/migrate.py)
+    return: jumlah OLT
+    """
+    cur.execute("SELECT DISTINCT olt_id FROM onu_status")
+    olt_ids = [r["olt_id"] for r in cur.fetchall()]
+
+    # OLT yang sudah tidak punya ONU → ringkasannya dibuang
+    cur.execute("DELETE FROM onu_summary_pon")
+    cur.execute("DELETE FROM onu_summary_olt")
+
+    for olt_id in olt_ids:
+        refresh_olt(cur, olt_id)
+    refresh_global(cur)
+    return len(olt_ids)
+
+
+def delete_olt(cur, olt_id):
+    """
+    OLT dihapus → buang ringkasannya & hitung ulang global
+    """
+    cur.execute("DELETE FROM onu_summary_pon WHERE olt_id=?", (olt_id,))
+    cur.execute("DELETE FROM onu_summary_olt WHERE olt_id=?", (olt_id,))
+    refresh_global(cur)
@@ -0,0 +1,282 @@
+import os
+import time
+
+from db.db import SYNC_DB
+from db import pg_ingest
+
+# ===============================
+# RIWAYAT OPTIK ONU (RX / TX)
+# ===============================
+# raw  : sampel ONU saat RX/TX berubah + 1 per 5 menit (retensi pendek)
+# 5m / 1h / 1d : rollup min / avg / max, di-update langsung saat sync
+#               → query bulanan tidak pernah scan sampel raw
+# ONU yang nilainya sama dengan sync sebelumnya hanya ditulis sekali per
+# bucket (bucket baru) → avg = rata-rata nilai yang tercatat (awal bucket
+# + tiap perubahan), bukan rata-rata per sync
+RAW_BUCKET = 300
+ROLLUPS = (
+    ("onu_optical_5m", 300),
+    ("onu_optical_1h", 3600),
+    ("onu_optical_1d", 86400),
+)
+
+# retensi (hari)
+RETENTION_DAYS = {
+    "onu_optical_raw": int(os.environ.get("OPTICAL_RAW_DAYS", 2)),
+    "onu_optical_5m": int(os.environ.get("OPTICAL_5M_DAYS", 30)),
+    "onu_optical_1h": int(os.environ.get("OPTICAL_1H_DAYS", 365)),
+    "onu_optical_1d": int(os.environ.get("OPTICAL_1D_DAYS", 1825)),
+}
+PRUNE_INTERVAL = 3600
+
+_ROLLUP_COLUMNS = """
+    olt_id INTEGER NOT NULL,
+    pon INTEGER NOT NULL,
+    onu_id INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    rx_min REAL,
+    rx_max REAL,
+    rx_sum REAL NOT NULL DEFAULT 0,
+    rx_count INTEGER NOT NULL DEFAULT 0,
+    tx_min REAL,
+    tx_max REAL,
+    tx_sum REAL NOT NULL DEFAULT 0,
+    tx_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (olt_id, pon, onu_id, bucket)
+"""
+
+HISTORY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS onu_optical_raw (
+    olt_id INTEGER NOT NULL,
+    pon INTEGER NOT NULL,
+    onu_id INTEGER NOT NULL,
+    ts INTEGER NOT NULL,
+    rx_power REAL,
+    tx_power REAL,
+    PRIMARY KEY (olt_id, pon, onu_id, ts)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_onu_optical_raw_ts
+    ON onu_optical_raw (ts);
+""" + "".join(f"""
+CREATE TABLE IF NOT EXISTS {table} ({_ROLLUP_COLUMNS}) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_{table}_bucket
+    ON {table} (bucket);
+""" for table, _ in ROLLUPS)
+
+_last_prune = {"ts": 0}
+# sampel terakhir yang ditulis proses ini: {olt_id: (ts, {(pon, onu_id): (rx, tx)})}
+# proses baru / OLT baru → semua sampel ditulis sekali
+_last_samples = {}
+
+
+def ensure_schema(conn):
+    conn.executescript(HISTORY_SCHEMA)
+
+
+def _rollup_sql(table, source=None):
+    """
+    source: sumber baris (default VALUES 12 placeholder, 1 ONU per execute)
+    """
+    t = table
+    source = source or "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+    return f"""
+        INSERT INTO {t} (
+            olt_id, pon, onu_id, bucket,
+            rx_min, rx_max, rx_sum, rx_count,
+            tx_min, tx_max, tx_sum, tx_count
+        )
+        {source}
+        ON CONFLICT(olt_id, pon, onu_id, bucket) DO UPDATE SET
+            rx_min = CASE WHEN {t}.rx_min IS NULL OR excluded.rx_min < {t}.rx_min
+                          THEN excluded.rx_min ELSE {t}.rx_min END,
+            rx_max = CASE WHEN {t}.rx_max IS NULL OR excluded.rx_max > {t}.rx_max
+                          THEN excluded.rx_max ELSE {t}.rx_max END,
+            rx_sum = {t}.rx_sum + excluded.rx_sum,
+            rx_count = {t}.rx_count + excluded.rx_count,
+            tx_min = CASE WHEN {t}.tx_min IS NULL OR excluded.tx_min < {t}.tx_min
+                          THEN excluded.tx_min ELSE {t}.tx_min END,
+            tx_max = CASE WHEN {t}.tx_max IS NULL OR excluded.tx_max > {t}.tx_max
+                          THEN excluded.tx_max ELSE {t}.tx_max END,
+            tx_sum = {t}.tx_sum + excluded.tx_sum,
+            tx_count = {t}.tx_count + excluded.tx_count
+    """
+
+
+def _record_pg(cur, olt_id, ts, samples, changed, rolled):
+    """
+    Postgres: 1x COPY sampel ke staging + 1 INSERT ... SELECT per tabel
+    rolled: {tabel: True kalau bucket baru → semua ONU, False → yang berubah}
+    """
+    if not any(rolled.values()):
+        samples = {k: v for k, v in samples.items() if k in changed}
+    if not samples:
+        return
+
+    pg_ingest.stage_samples(cur, [
+        (pon, onu_id, rx, tx, (pon, onu_id) in changed)
+        for (pon, onu_id), (rx, tx) in samples.items()
+    ])
+    stage = pg_ingest.SAMPLE_STAGE_TABLE
+
+    def where(table):
+        return "" if rolled[table] else "WHERE changed"
+
+    cur.execute(f"""
+        INSERT INTO onu_optical_raw (olt_id, pon, onu_id, ts, rx_power, tx_power)
+        SELECT %s, pon, onu_id, %s, rx_power, tx_power
+        FROM {stage}
+        {where("onu_optical_raw")}
+        ON CONFLICT(olt_id, pon, onu_id, ts) DO NOTHING
+    """, (olt_id, ts))
+
+    for table, size in ROLLUPS:
+        cur.execute(_rollup_sql(table, f"""
+            SELECT
+                %s, pon, onu_id, %s,
+                rx_power, rx_power, COALESCE(rx_power, 0),
+                CASE WHEN rx_power IS NULL THEN 0 ELSE 1 END,
+                tx_power, tx_power, COALESCE(tx_power, 0),
+                CASE WHEN tx_power IS NULL THEN 0 ELSE 1 END
+            FROM {stage}
+            {where(table)}
+        """), (olt_id, ts - ts % size))
+
+
+# ===============================
+# TULIS SAMPEL (DIPANGGIL sync_core)
+# ===============================
+def record_samples(cur, olt_id, onus, ts=None):
+    """
+    Simpan RX/TX ONU hasil scrape + update rollup 5m/1h/1d (ikut transaksi cur)
+    per tabel hanya ONU yang RX/TX-nya berubah atau bucket-nya baru
+    transaksi gagal → panggil forget_samples(olt_id)
+    """
+    ts = int(ts or time.time())
+
+    samples = {
+        (int(onu["pon"]), int(onu["onu_id"])): (onu.get("rx_power"), onu.get("tx_power"))
+        for onu in onus
+        if onu.get("rx_power") is not None or onu.get("tx_power") is not None
+    }
+    prev_ts, prev = _last_samples.get(olt_id, (None, {}))
+    _last_samples[olt_id] = (ts, samples)
+
+    changed = {
+        key for key, value in samples.items()
+        if prev.get(key) != value
+    }
+
+    # bucket baru sejak sync sebelumnya → semua ONU, selain itu yang berubah
+    rolled = {
+        table: prev_ts is None or prev_ts // size != ts // size
+        for table, size in (("onu_optical_raw", RAW_BUCKET),) + ROLLUPS
+    }
+
+    if SYNC_DB == "postgres":
+        _record_pg(cur, olt_id, ts, samples, changed, rolled)
+    else:
+        def due(table):
+            return [
+                (pon, onu_id, rx, tx)
+                for (pon, onu_id), (rx, tx) in samples.items()
+                if rolled[table] or (pon, onu_id) in changed
+            ]
+
+        cur.executemany("""
+            INSERT INTO onu_optical_raw (olt_id, pon, onu_id, ts, rx_power, tx_power)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(olt_id, pon, onu_id, ts) DO NOTHING
+        """, [(olt_id, pon, onu_id, ts, rx, tx) for pon, onu_id, rx, tx in due("onu_optical_raw")])
+
+        for table, size in ROLLUPS:
+            bucket = ts - ts % size
+            cur.executemany(_rollup_sql(table), [
+                (
+                    olt_id, pon, onu_id, bucket,
+                    rx, rx, rx or 0, 0 if rx is None else 1,
+                    tx, tx, tx or 0, 0 if tx is None else 1,
+                )
+                for pon, onu_id, rx, tx in due(table)
+            ])
+
+    return len(samples) if rolled["onu_optical_raw"] else len(changed)
+
+
+def forget_samples(olt_id):
+    """
+    Rollback → sampel sync ini tidak tersimpan, sync berikutnya tulis ulang semua
+    """
+    _last_samples.pop(olt_id, None)
+
+
+def prune(cur, now=None, force=False):
+    """
+    Hapus data lewat retensi (maks 1x per PRUNE_INTERVAL per proses)
+    """
+    now = int(now or time.time())
+    if not force and now - _last_prune["ts"] < PRUNE_INTERVAL:
+        return
+    _last_prune["ts"] = now
+
+    cur.execute(
+        "DELETE FROM onu_optical_raw WHERE ts < ?",
+        (now - RETENTION_DAYS["onu_optical_raw"] * 86400,)
+    )
+    for table, _ in ROLLUPS:
+        cur.execute(
+            f"DELETE FROM {table} WHERE bucket < ?",
+            (now - RETENTION_DAYS[table] * 86400,)
+        )
+
+
+# ===============================
+# BACA RIWAYAT (DASHBOARD / API)
+# ===============================
+def pick_rollup(span_seconds):
+    """
+    Resolusi otomatis: ≤ 2 hari → 5 menit, ≤ 60 hari → 1 jam, sisanya harian
+    """
+    if span_seconds <= 2 * 86400:
+        return "onu_optical_5m"
+    if span_seconds <= 60 * 86400:
+        return "onu_optical_1h"
+    return "onu_optical_1d"
+
+
+def get_history(conn, olt_id, pon, onu_id, since, until=None):
+    """
+    return: list dict {bucket, rx_min, rx_avg, rx_max, tx_min, tx_avg, tx_max}
+    since / until: epoch detik
+    """
+    until = int(until or time.time())
+    table = pick_rollup(until - since)
+
+    # bucket pertama ikut kalau sebagian rentangnya masuk `since`
+    size = dict(ROLLUPS)[table]
+    since = int(since) - int(since) % size
+
+    rows = conn.execute(f"""
+        SELECT
+            bucket,
+            rx_min, rx_max, rx_sum, rx_count,
+            tx_min, tx_max, tx_sum, tx_count
+        FROM {table}
+        WHERE olt_id=? AND pon=? AND onu_id=?
+          AND bucket >= ? AND bucket <= ?
+        ORDER BY bucket
+    """, (olt_id, pon, onu_id, since, until)).fetchall()
+
+    return [
+        {
+            "bucket": r["bucket"],
+            "rx_min": r["rx_min"],
+            "rx_avg": r["rx_sum"] / r["rx_count"] if r["rx_count"] else None,
+            "rx_max": r["rx_max"],
+            "tx_min": r["tx_min"],
+            "tx_avg": r["tx_sum"] / r["tx_count"] if r["tx_count"] else None,
+            "tx_max": r["tx_max"],
+        }
+        for r in rows
+    ]
@@ -0,0 +1,396 @@
+import os
+import time
+import atexit
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:     # non-POSIX → batas hanya per proses
+    fcntl = None
+
+# ===============================
+# CONFIG
+# ===============================
+# maksimal Chrome hidup bersamaan — GLOBAL, semua proses yang memakai
+# VSOL_BROWSER_LOCK_DIR yang sama (worker gunicorn, sync_runner process)
+BROWSER_MAX = int(os.environ.get("VSOL_BROWSER_MAX", 2))
+# 1 file lock per slot; container terpisah → mount direktori yang sama
+BROWSER_LOCK_DIR = os.environ.get("VSOL_BROWSER_LOCK_DIR", "/tmp/fams-browser-slots")
+# interval cek slot global saat penuh dipakai proses lain
+BROWSER_SLOT_POLL = 0.5
+# reaper: tutup Chrome idle kadaluarsa / idle yang diminta proses lain
+BROWSER_REAP_INTERVAL = 5
+# Chrome di-restart setelah dipakai N kali
+BROWSER_MAX_USES = int(os.environ.get("VSOL_BROWSER_MAX_USES", 20))
+# ... atau kalau RSS (chromedriver + semua child Chrome) lewat batas
+BROWSER_MAX_RSS_MB = int(os.environ.get("VSOL_BROWSER_MAX_RSS_MB", 600))
+# Chrome idle lebih lama dari ini ditutup
+BROWSER_IDLE_TIMEOUT = int(os.environ.get("VSOL_BROWSER_IDLE_TIMEOUT", 600))
+# lama menunggu slot kosong sebelum menyerah
+BROWSER_WAIT_TIMEOUT = int(os.environ.get("VSOL_BROWSER_WAIT_TIMEOUT", 300))
+
+
+def new_chrome():
+    from selenium import webdriver
+
+    options = webdriver.ChromeOptions()
+    options.add_argument("--headless=new")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--log-level=3")
+
+    driver = webdriver.Chrome(options=options)
+    driver.set_page_load_timeout(30)
+    return driver
+
+
+# ===============================
+# RSS PROCESS TREE (LINUX /proc)
+# ===============================
+def _process_tree_rss_mb(root_pid):
+    """
+    Total RSS root_pid + semua turunannya (MB)
+    return None kalau /proc tidak tersedia
+    """
+    if not root_pid or not os.path.isdir("/proc"):
+        return None
+
+    children = {}
+    rss = {}
+
+    for name in os.listdir("/proc"):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/stat") as f:
+                stat = f.read()
+            # field setelah "(comm)" : state ppid ...
+            ppid = int(stat.rsplit(")", 1)[1].split()[1])
+            with open(f"/proc/{name}/statm") as f:
+                pages = int(f.read().split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+
+        pid = int(name)
+        children.setdefault(ppid, []).append(pid)
+        rss[pid] = pages
+
+    total = 0
+    stack = [root_pid]
+    while stack:
+        pid = stack.pop()
+        total += rss.get(pid, 0)
+        stack.extend(children.get(pid, []))
+
+    return total * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+# ===============================
+# SLOT GLOBAL ANTAR PROSES (flock)
+# ===============================
+class GlobalSlots:
+    """
+    Semaphore lintas proses: N file lock, 1 Chrome hidup = 1 file di-flock.
+    Proses mati → kernel melepas lock-nya (tidak ada slot bocor).
+    """
+
+    def __init__(self, size, lock_dir=BROWSER_LOCK_DIR):
+        self.size = max(1, size)
+        self.lock_dir = lock_dir
+
+    def try_acquire(self):
+        """
+        return: fd slot yang dikunci, None kalau semua slot terpakai
+        """
+        os.makedirs(self.lock_dir, exist_ok=True)
+        for i in range(self.size):
+            fd = os.open(os.path.join(self.lock_dir, f"slot-{i}.lock"),
+                         os.O_RDWR | os.O_CREAT, 0o666)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return fd
+            except OSError:
+                os.close(fd)
+        return None
+
+    def want(self):
+        """
+        Tandai ada proses yang menunggu slot (mtime file "wanted")
+        """
+        os.makedirs(self.lock_dir, exist_ok=True)
+        path = os.path.join(self.lock_dir, "wanted")
+        with open(path, "a"):
+            os.utime(path)
+
+    def wanted(self, within=BROWSER_REAP_INTERVAL * 2):
+        try:
+            mtime = os.path.getmtime(os.path.join(self.lock_dir, "wanted"))
+        except OSError:
+            return False
+        return time.time() - mtime < within
+
+    @staticmethod
+    def release(fd):
+        try:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
+
+
+# ===============================
+# 1 BROWSER
+# ===============================
+class PooledBrowser:
+    def __init__(self, key):
+        self.key = key
+        self.driver = None
+        self.uses = 0
+        self.busy = True
+        self.logged_in = False
+        self.broken = False
+        self.last_used = time.monotonic()
+        self.slot = None
+
+    def rss_mb(self):
+        try:
+            pid = self.driver.service.process.pid
+        except Exception:
+            return None
+        return _process_tree_rss_mb(pid)
+
+    def quit(self):
+        if self.driver is not None:
+            try:
+                self.driver.quit()
+            except Exception:
+                pass
+            self.driver = None
+
+        if self.slot is not None:
+            GlobalSlots.release(self.slot)
+            self.slot = None
+
+
+# ===============================
+# POOL
+# ===============================
+class BrowserPool:
+    """
+    Pool Chrome headless per OLT:
+    - session login tetap hangat per OLT (key)
+    - total Chrome dibatasi max_browsers, per proses & lintas proses
+      (GlobalSlots, kalau lock_dir diisi & fcntl tersedia)
+    - Chrome di-recycle setelah max_uses atau RSS > max_rss_mb
+    - Chrome idle > idle_timeout ditutup thread reaper
+    """
+
+    def __init__(self, max_browsers=BROWSER_MAX, max_uses=BROWSER_MAX_USES,
+                 max_rss_mb=BROWSER_MAX_RSS_MB, idle_timeout=BROWSER_IDLE_TIMEOUT,
+                 factory=new_chrome, lock_dir=BROWSER_LOCK_DIR):
+        self.max_browsers = max(1, max_browsers)
+        self.max_uses = max_uses
+        self.max_rss_mb = max_rss_mb
+        self.idle_timeout = idle_timeout
+        self.factory = factory
+
+        self.slots = None
+        if lock_dir and fcntl is not None:
+            self.slots = GlobalSlots(self.max_browsers, lock_dir)
+
+        self._browsers = {}
+        self._cond = threading.Condition()
+        self._reaper_pid = None
+
+    # ---------- internal ----------
+    def _pop_idle_lru(self):
+        idle = [b for b in self._browsers.values() if not b.busy]
+        if not idle:
+            return None
+        victim = min(idle, key=lambda b: b.last_used)
+        del self._browsers[victim.key]
+        return victim
+
+    def _pop_expired(self):
+        now = time.monotonic()
+        expired = [
+            b for b in self._browsers.values()
+            if not b.busy and now - b.last_used > self.idle_timeout
+        ]
+        for b in expired:
+            del self._browsers[b.key]
+        return expired
+
+    def _start_reaper(self):
+        # thread tidak ikut fork → dicek per PID (lazy, dipanggil di bawah lock)
+        if self._reaper_pid == os.getpid():
+            return
+        self._reaper_pid = os.getpid()
+        threading.Thread(
+            target=self._reap_forever,
+            name="browser-pool-reaper",
+            daemon=True
+        ).start()
+
+    def reap(self):
+        """
+        Tutup Chrome idle > idle_timeout (slot global ikut dilepas).
+        Proses lain menunggu slot → 1 Chrome idle (LRU) dilepas juga.
+        """
+        wanted = self.slots is not None and self.slots.wanted()
+
+        with self._cond:
+            expired = self._pop_expired()
+            if not expired and wanted:
+                victim = self._pop_idle_lru()
+                if victim:
+                    expired.append(victim)
+            if expired:
+                self._cond.notify_all()
+
+        for b in expired:
+            b.quit()
+        return len(expired)
+
+    def _reap_forever(self):
+        interval = min(BROWSER_REAP_INTERVAL, max(1, self.idle_timeout / 4))
+        while True:
+            time.sleep(interval)
+            try:
+                self.reap()
+            except Exception as e:
+                print(f"[BROWSER] reaper error: {e}")
+
+    def _acquire_slot(self, browser, deadline):
+        """
+        Slot global untuk Chrome baru. Penuh → tutup Chrome idle milik
+        proses ini dulu, kalau tidak ada tunggu proses lain melepas.
+        """
+        while True:
+            browser.slot = self.slots.try_acquire()
+            if browser.slot is not None:
+                return
+
+            with self._cond:
+                victim = self._pop_idle_lru()
+            if victim:
+                victim.quit()
+                continue
+
+            if time.monotonic() >= deadline:
+                raise TimeoutError("Browser pool penuh (slot global)")
+            # Chrome idle di proses lain dilepas reaper-nya
+            self.slots.want()
+            time.sleep(BROWSER_SLOT_POLL)
+
+    def _acquire(self, key, timeout):
+        deadline = time.monotonic() + timeout
+        to_quit = []
+
+        with self._cond:
+            self._start_reaper()
+            to_quit.extend(self._pop_expired())
+
+            while True:
+                browser = self._browsers.get(key)
+
+                if browser and not browser.busy:
+                    browser.busy = True
+                    break
+
+                if browser is None:
+                    if len(self._browsers) >= self.max_browsers:
+                        victim = self._pop_idle_lru()
+                        if victim:
+                            to_quit.append(victim)
+
+                    if len(self._browsers) < self.max_browsers:
+                        # slot dipesan dulu, Chrome dibuat di luar lock
+                        browser = PooledBrowser(key)
+                        self._browsers[key] = browser
+                        break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError("Browser pool penuh")
+                self._cond.wait(remaining)
+
+        for b in to_quit:
+            b.quit()
+
+        if browser.driver is None:
+            try:
+                if self.slots is not None and browser.slot is None:
+                    self._acquire_slot(browser, deadline)
+                browser.driver = self.factory()
+            except BaseException:
+                self._discard(browser)
+                raise
+
+        return browser
+
+    def _discard(self, browser):
+        with self._cond:
+            if self._browsers.get(browser.key) is browser:
+                del self._browsers[browser.key]
+            self._cond.notify_all()
+        browser.quit()
+
+    def _release(self, browser):
+        browser.uses += 1
+        browser.last_used = time.monotonic()
+
+        recycle = browser.broken or browser.uses >= self.max_uses
+        if not recycle and self.max_rss_mb:
+            rss = browser.rss_mb()
+            recycle = rss is not None and rss > self.max_rss_mb
+
+        if recycle:
+            self._discard(browser)
+            return
+
+        with self._cond:
+            browser.busy = False
+            self._cond.notify_all()
+
+    # ---------- public ----------
+    @contextmanager
+    def session(self, key, timeout=BROWSER_WAIT_TIMEOUT):
+        """
+        with pool.session(key) as browser:
+            browser.driver ...
+            browser.logged_in = True
+
+        Exception di dalam blok → browser dianggap rusak & ditutup
+        """
+        browser = self._acquire(key, timeout)
+        try:
+            yield browser
+        except BaseException:
+            browser.broken = True
+            raise
+        finally:
+            self._release(browser)
+
+    def close_all(self):
+        with self._cond:
+            browsers = list(self._browsers.values())
+            self._browsers.clear()
+            self._cond.notify_all()
+        for b in browsers:
+            b.quit()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "total": len(self._browsers),
+                "busy": sum(1 for b in self._browsers.values() if b.busy),
+                "max": self.max_browsers,
+                "global": self.slots is not None,
+            }
+
+
+# pool per proses (sync_runner thread & dashboard sync_olt),
+# jumlah Chrome dibatasi lintas proses lewat BROWSER_LOCK_DIR
+BROWSER_POOL = BrowserPool()
+atexit.register(BROWSER_POOL.close_all)
@@ -1,5 +1,8 @@
 #!/usr/bin/env python3
+import asyncio
+import hashlib
 import requests
+import httpx
 import re
 import time
 import json
@@ -181,12 +184,115 @@ def scrape_hioso(olt):
 
 
 
+# =================================================
+# PARSER BERSAMA (SYNC & ASYNC)
+# =================================================
+PON_RE = re.compile(r"'(\d+/\d+/\d+)'")
+ONU_TABLE_RE = re.compile(
+    r"var\s+ponOnuTable\s*=\s*new Array\s*\((.*?)\);",
+    re.S
+)
+ONU_FIELD = 13
+
+
+def parse_pon_list(html):
+    return sorted(set(PON_RE.findall(html)))
+
+
+def parse_onu_list(pon, html):
+    """
+    Parse halaman onuConfigOnuList.asp 1 PON
+    return: list of ONU dict (standar onu_status)
+    """
+    m = ONU_TABLE_RE.search(html)
+    if not m:
+        return []
+
+    fields = re.findall(r"'(.*?)'", m.group(1))
+    rows = [fields[i:i + ONU_FIELD] for i in range(0, len(fields), ONU_FIELD)]
+
+    result = []
+
+    for onu in rows:
+        if len(onu) < ONU_FIELD:
+            continue
+
+        try:
+            onu_id = int(onu[0].split(":")[-1])
+        except:
+            continue
+
+        name = onu[1]
+        mac  = onu[2]
+        raw  = onu[3].strip()
+        tx   = onu[9]
+        rx   = onu[11]
+
+        if raw == "Up":
+            status = "ONLINE"
+            diagnosis = "NORMAL"
+        elif raw == "Down":
+            status = "DOWN"
+            diagnosis = "KABEL_PUTUS"
+        elif raw in ["PwrDown", "Power Down", "PowerOff"]:
+            status = "POWER_OFF"
+            diagnosis = "ONU_MATI"
+        else:
+            status = "UNKNOWN"
+            diagnosis = "PERLU_CEK"
+
+        result.append({
+            "pon": pon,
+            "onu_id": onu_id,
+            "sn": None,
+            "mac": mac or None,
+            "name": name or None,
+            "status": status,
+            "rx_power": float(rx) if rx else None,
+            "tx_power": float(tx) if tx else None,
+            "diagnosis": diagnosis
+        })
+
+    return result
+
+
+def parse_pon_fingerprints(html):
+    """
+    Fingerprint murah per PON dari onuConfigPonList.asp:
+    hash data yang tertulis setelah nama PON (jumlah ONU, online, dst)
+    sampai nama PON berikutnya.
+    return: {pon_number: fingerprint}
+    """
+    parts = PON_RE.split(html)
+    # parts = [prefix, pon1, data1, pon2, data2, ...]
+    result = {}
+
+    for pon_str, data in zip(parts[1::2], parts[2::2]):
+        pon = pon_number(pon_str)
+        if pon is None:
+            continue
+        h = hashlib.sha1(result.get(pon, "").encode())
+        h.update(data.encode())
+        result[pon] = h.hexdigest()
+
+    return result
+
+
+def pon_number(pon_str):
+    # contoh pon_str: 1/1/1 → ambil angka terakhir
+    try:
+        return int(pon_str.split("/")[-1])
+    except:
+        return None
+
+
 # =================================================
 # WRAPPER UNTUK DASHBOARD SYNC
 # =================================================
-def fetch_onu_hioso(olt):
+def fetch_onu_hioso(olt, pons=None):
     """
     Wrapper untuk dashboard sync
+    pons: set nomor PON yang diambil (None = semua)
     return: list of ONU dict (standar onu_status)
     """
 
@@ -209,14 +315,13 @@ def fetch_onu_hioso(olt):
     r = session.get(f"{BASE_URL}/onuConfigPonList.asp", timeout=10)
     time.sleep(DELAY)
 
-    pon_list = sorted(set(re.findall(r"'(\d+/\d+/\d+)'", r.text)))
+    pon_list = parse_pon_list(r.text)
     if not pon_list:
         return []
 
     for pon_str in pon_list:
-        try:
-            pon = int(pon_str.split("/")[-1])
-        except:
+        pon = pon_number(pon_str)
+        if pon is None or (pons is not None and pon not in pons):
             continue
 
         r = session.get(
@@ -225,59 +330,88 @@ def fetch_onu_hioso(olt):
         )
         time.sleep(DELAY)
 
-        m = re.search(
-            r"var\s+ponOnuTable\s*=\s*new Array\s*\((.*?)\);",
-            r.text,
-            re.S
-        )
-        if not m:
-            continue
+        onu_result.extend(parse_onu_list(pon, r.text))
 
-        fields = re.findall(r"'(.*?)'", m.group(1))
-        ONU_FIELD = 13
-        rows = [fields[i:i + ONU_FIELD] for i in range(0, len(fields), ONU_FIELD)]
+    return onu_result
 
-        for onu in rows:
-            if len(onu) < ONU_FIELD:
-                continue
 
-            try:
-                onu_id = int(onu[0].split(":")[-1])
-            except:
-                continue
+# =================================================
+# ASYNC FETCH (SEMUA PON PARALEL)
+# =================================================
+# batas request paralel ke 1 OLT (web server HIOSO kecil)
+ASYNC_CONCURRENCY = int(os.environ.get("HIOSO_CONCURRENCY", 4))
 
-            name = onu[1]
-            mac  = onu[2]
-            raw  = onu[3].strip()
-            tx   = onu[9]
-            rx   = onu[11]
 
-            if raw == "Up":
-                status = "ONLINE"
-                diagnosis = "NORMAL"
-            elif raw == "Down":
-                status = "DOWN"
-                diagnosis = "KABEL_PUTUS"
-            elif raw in ["PwrDown", "Power Down", "PowerOff"]:
-                status = "POWER_OFF"
-                diagnosis = "ONU_MATI"
-            else:
-                status = "UNKNOWN"
-                diagnosis = "PERLU_CEK"
+async def fetch_onu_hioso_async(olt, pons=None, concurrency=None):
+    """
+    Versi async fetch_onu_hioso: semua halaman PON diambil
+    bersamaan (maks `concurrency` per OLT), tanpa sleep DELAY.
+    pons: set nomor PON yang diambil (None = semua)
+    return: list of ONU dict, urutan sama dengan versi sync
+    """
+    BASE_URL = f"http://{olt['host']}"
+    limit = asyncio.Semaphore(concurrency or ASYNC_CONCURRENCY)
 
-            onu_result.append({
-                "pon": pon,
-                "onu_id": onu_id,
-                "sn": None,
-                "mac": mac or None,
-                "name": name or None,
-                "status": status,
-                "rx_power": float(rx) if rx else None,
-                "tx_power": float(tx) if tx else None,
-                "diagnosis": diagnosis
-            })
+    async with httpx.AsyncClient(
+        auth=(olt["username"], olt["password"]),
+        headers={"User-Agent": "Mozilla/5.0"},
+        verify=False,
+        timeout=10
+    ) as client:
 
-    return onu_result
+        # login test
+        r = await client.get(f"{BASE_URL}/", timeout=5)
+        if r.status_code != 200:
+            return []
+
+        r = await client.get(f"{BASE_URL}/onuConfigPonList.asp")
+        pon_list = parse_pon_list(r.text)
+        if pons is not None:
+            pon_list = [p for p in pon_list if pon_number(p) in pons]
+        if not pon_list:
+            return []
+
+        async def fetch_pon(pon_str):
+            pon = pon_number(pon_str)
+            if pon is None:
+                return []
+
+            async with limit:
+                r = await client.get(
+                    f"{BASE_URL}/onuConfigOnuList.asp?oltponno={pon_str}"
+                )
+
+            return parse_onu_list(pon, r.text)
+
+        pages = await asyncio.gather(*(fetch_pon(p) for p in pon_list))
+
+    return [onu for page in pages for onu in page]
+
+
+def fetch_onu_hioso_fast(olt, pons=None):
+    """
+    Drop-in pengganti fetch_onu_hioso (blocking) untuk sync_core
+    """
+    return asyncio.run(fetch_onu_hioso_async(olt, pons=pons))
+
+
+# =================================================
+# PROBE MURAH (SYNC INCREMENTAL)
+# =================================================
+def probe_pons_hioso(olt):
+    """
+    1 request onuConfigPonList.asp → {pon_number: fingerprint}
+    """
+    session = requests.Session()
+    session.auth = HTTPBasicAuth(olt["username"], olt["password"])
+    session.headers.update({"User-Agent": "Mozilla/5.0"})
+
+    try:
+        r = session.get(f"http://{olt['host']}/onuConfigPonList.asp", timeout=10)
+        r.raise_for_status()
+        return parse_pon_fingerprints(r.text)
+    finally:
+        session.close()
 
 
 
@@ -1,200 +1,428 @@
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from bs4 import BeautifulSoup
+import os
 import time
+from urllib.parse import urljoin
+
+import requests
+from bs4 import BeautifulSoup
+
+from scraper.browser_pool import BROWSER_POOL
 
 WAIT_TIME = 15
 
+# http     → request langsung (tanpa browser)
+# selenium → headless Chrome (cara lama)
+# auto     → http dulu, kalau gagal fallback ke selenium
+VSOL_FETCH_MODE = os.environ.get("VSOL_FETCH_MODE", "auto")
+
+
+class VsolHttpError(Exception):
+    pass
+
+
+class VsolPonError(VsolHttpError):
+    """
+    Halaman berisi ONU dari PON lain (pilihan PON tidak diterapkan OLT)
+    → data tidak boleh dipakai, sync incremental bisa menghapus PON yang diminta
+    """
+    pass
+
+
+# ===================== URL =====================
+def _urls(olt):
+    base_url = f"http://{olt['host']}"
+    return {
+        "base": base_url,
+        "login": base_url + "/action/login.html",
+        "status": base_url + "/action/onustatusinfo.html",
+        "opm": base_url + "/action/onuopmdiag.html",
+    }
+
+
+# ===================== PARSER =====================
+def _parse_onu_key(onu_id_str):
+    # contoh: GPON0/1:5 → (1, 5)
+    port_part = onu_id_str.split("/")[-1]
+    pon_num, onu_num = port_part.split(":")
+    return int(pon_num), int(onu_num)
 
-def fetch_onu_vsol(olt):
+
+def _check_pon(key, pon, page):
+    if pon is not None and key[0] != pon:
+        raise VsolPonError(
+            f"Halaman {page} PON {pon} berisi ONU PON {key[0]} "
+            f"(pilihan PON tidak diterapkan)"
+        )
+
+
+def _table_rows(html):
+    soup = BeautifulSoup(html, "html.parser")
+    tables = soup.find_all("table", border="1")
+    if not tables:
+        return None
+    return tables[-1].find_all("tr")[1:]
+
+
+def parse_status_table(html, pon=None):
+    """
+    Parse tabel onustatusinfo.html
+    pon: PON yang diminta → ONU PON lain = VsolPonError
+    return: {(pon, onu): {mac, name, status}} atau None kalau tabel tidak ada
+    """
+    rows = _table_rows(html)
+    if rows is None:
+        return None
+
+    onu_status = {}
+
+    for row in rows:
+        cols = [c.get_text(strip=True) for c in row.find_all("td")]
+        if len(cols) < 10:
+            continue
+
+        status_raw = cols[1]
+        mac = cols[2]
+        name = cols[3]
+        reason = cols[8]
+
+        try:
+            key = _parse_onu_key(cols[0])
+        except Exception:
+            continue
+
+        _check_pon(key, pon, "status")
+
+        # ===============================
+        # STATUS RAW VSOL (APA ADANYA)
+        # ===============================
+        if status_raw == "Online":
+            status = "ONLINE"
+        elif reason == "Power Off":
+            status = "POWER_OFF"
+        elif reason == "Wire Down":
+            status = "WIRE_DOWN"
+        else:
+            status = "UNKNOWN"
+
+        onu_status[key] = {
+            "mac": mac,
+            "name": name,
+            "status": status,
+        }
+
+    return onu_status
+
+
+def parse_opm_table(html, online_onu, pon=None):
+    """
+    Parse tabel onuopmdiag.html (hanya ONU online)
+    pon: PON yang diminta → ONU PON lain = VsolPonError
+    return: {(pon, onu): {tx, rx}}
+    """
+    rows = _table_rows(html) or []
+    opm_data = {}
+
+    for row in rows:
+        cols = [c.get_text(strip=True) for c in row.find_all("td")]
+        if len(cols) < 9:
+            continue
+
+        try:
+            key = _parse_onu_key(cols[0])
+        except Exception:
+            continue
+
+        _check_pon(key, pon, "OPM")
+
+        if key not in online_onu:
+            continue
+
+        try:
+            tx = float(cols[7]) if cols[7] else None
+        except Exception:
+            tx = None
+
+        try:
+            rx = float(cols[8]) if cols[8] else None
+        except Exception:
+            rx = None
+
+        opm_data[key] = {
+            "tx": tx,
+            "rx": rx,
+        }
+
+    return opm_data
+
+
+def online_keys(onu_status):
+    return {k for k, v in onu_status.items() if v["status"] == "ONLINE"}
+
+
+def merge_onu(onu_status, opm_data):
+    result = []
+
+    for (pon_num, onu_num), info in onu_status.items():
+        opm = opm_data.get((pon_num, onu_num), {})
+
+        result.append({
+            "pon": pon_num,
+            "onu_id": onu_num,
+            "sn": None,
+            "mac": info["mac"] or None,
+            "name": info["name"] or None,
+            "status": info["status"],      # RAW STATUS
+            "rx_power": opm.get("rx"),
+            "tx_power": opm.get("tx"),
+            "diagnosis": None,             # ⛔ TIDAK DIHITUNG DI SINI
+        })
+
+    return result
+
+
+# =====================================================
+# HTTP DRIVER (TANPA BROWSER)
+# =====================================================
+def _form_fields(form):
+    """
+    Ambil semua input form (hidden, text, select) beserta value default
+    """
+    data = {}
+
+    for inp in form.find_all("input"):
+        name = inp.get("name")
+        if not name or inp.get("type") in ("button", "reset", "image"):
+            continue
+        data[name] = inp.get("value", "")
+
+    for sel in form.find_all("select"):
+        name = sel.get("name")
+        if not name:
+            continue
+        opt = sel.find("option", selected=True) or sel.find("option")
+        data[name] = opt.get("value", "") if opt else ""
+
+    return data
+
+
+def _submit_form(session, page_url, form, data):
+    action = urljoin(page_url, form.get("action") or page_url)
+
+    if (form.get("method") or "get").lower() == "post":
+        return session.post(action, data=data, timeout=WAIT_TIME)
+    return session.get(action, params=data, timeout=WAIT_TIME)
+
+
+def _http_login(session, urls, username, password):
+    r = session.get(urls["login"], timeout=WAIT_TIME)
+    r.raise_for_status()
+
+    soup = BeautifulSoup(r.text, "html.parser")
+    user_input = soup.find("input", attrs={"name": "user"})
+    form = user_input.find_parent("form") if user_input else None
+    if not form:
+        raise VsolHttpError("Form login VSOL tidak ditemukan")
+
+    data = _form_fields(form)
+    data["user"] = username
+    data["pass"] = password
+
+    r = _submit_form(session, urls["login"], form, data)
+    r.raise_for_status()
+
+    # masih dapat form login → user/pass salah
+    if BeautifulSoup(r.text, "html.parser").find("input", attrs={"name": "pass"}):
+        raise VsolHttpError("Login VSOL gagal")
+
+
+def _http_select_pon(session, url, pon_id):
+    """
+    GET halaman, lalu submit form <select name="select"> dengan PON tujuan
+    (sama seperti event change di browser)
+    """
+    r = session.get(url, timeout=WAIT_TIME)
+    r.raise_for_status()
+
+    soup = BeautifulSoup(r.text, "html.parser")
+    select = soup.find("select", attrs={"name": "select"})
+    form = select.find_parent("form") if select else None
+    if not form:
+        raise VsolHttpError(f"Form PON tidak ditemukan: {url}")
+
+    data = _form_fields(form)
+    data["select"] = str(pon_id)
+
+    r = _submit_form(session, url, form, data)
+    r.raise_for_status()
+    return r.text
+
+
+def _pon_range(olt, pons=None):
+    total_pon = int(olt.get("pon_count") or 4)
+    return [
+        p for p in range(1, total_pon + 1)
+        if pons is None or p in pons
+    ]
+
+
+def fetch_onu_vsol_http(olt, pons=None):
+    """
+    Scraping ONU VSOL via HTTP biasa (requests)
+    pons: set nomor PON yang diambil (None = semua)
+    Return DATA MENTAH, format sama dengan versi Selenium
+    """
+    urls = _urls(olt)
+
+    session = requests.Session()
+    session.headers.update({"User-Agent": "Mozilla/5.0"})
+
+    onu_result = []
+
+    try:
+        _http_login(session, urls, olt["username"], olt["password"])
+
+        for pon_loop in _pon_range(olt, pons):
+            html = _http_select_pon(session, urls["status"], pon_loop)
+
+            onu_status = parse_status_table(html, pon_loop)
+            if onu_status is None:
+                raise VsolHttpError(f"Tabel status PON {pon_loop} tidak ada")
+
+            opm_data = {}
+            online = online_keys(onu_status)
+
+            if online:
+                html = _http_select_pon(session, urls["opm"], pon_loop)
+                opm_data = parse_opm_table(html, online, pon_loop)
+
+            onu_result.extend(merge_onu(onu_status, opm_data))
+
+        return onu_result
+
+    finally:
+        session.close()
+
+
+# =====================================================
+# SELENIUM DRIVER (FALLBACK)
+# =====================================================
+def fetch_onu_vsol_selenium(olt, pons=None):
     """
     Scraping ONU VSOL via Selenium
+    Chrome diambil dari BROWSER_POOL (session login tetap hangat per OLT)
     Return DATA MENTAH:
     - status ASLI dari VSOL
     - rx / tx
     - TANPA LOGIKA DIAGNOSIS
     """
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
 
-    BASE_URL   = f"http://{olt['host']}"
-    LOGIN_URL  = BASE_URL + "/action/login.html"
-    STATUS_URL = BASE_URL + "/action/onustatusinfo.html"
-    OPM_URL    = BASE_URL + "/action/onuopmdiag.html"
+    urls = _urls(olt)
 
     USERNAME = olt["username"]
     PASSWORD = olt["password"]
-    TOTAL_PON = int(olt.get("pon_count") or 4)
-
-    # ===================== SELENIUM =====================
-    options = webdriver.ChromeOptions()
-    options.add_argument("--headless=new")
-    options.add_argument("--disable-gpu")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--log-level=3")
-
-    driver = webdriver.Chrome(options=options)
-    driver.set_page_load_timeout(30)
-    wait = WebDriverWait(driver, WAIT_TIME)
 
     onu_result = []
 
-    # ===================== HELPER =====================
-    def wait_table_loaded(timeout=15):
-        WebDriverWait(driver, timeout).until(
-            lambda d: len(
-                d.find_elements(By.CSS_SELECTOR, "table[border='1'] tr")
-            ) > 1
-        )
-
-    def change_pon(select, pon_id):
-        driver.execute_script(
-            """
-            arguments[0].value = arguments[1];
-            arguments[0].dispatchEvent(new Event('change', {bubbles:true}));
-            """,
-            select,
-            str(pon_id),
-        )
-        time.sleep(0.5)
+    with BROWSER_POOL.session(f"{olt['host']}|{USERNAME}") as browser:
+        driver = browser.driver
+        wait = WebDriverWait(driver, WAIT_TIME)
+
+        # ===================== HELPER =====================
+        def wait_table_loaded(timeout=15):
+            WebDriverWait(driver, timeout).until(
+                lambda d: len(
+                    d.find_elements(By.CSS_SELECTOR, "table[border='1'] tr")
+                ) > 1
+            )
+
+        def change_pon(select, pon_id):
+            driver.execute_script(
+                """
+                arguments[0].value = arguments[1];
+                arguments[0].dispatchEvent(new Event('change', {bubbles:true}));
+                """,
+                select,
+                str(pon_id),
+            )
+            time.sleep(0.5)
+
+        def login():
+            driver.get(urls["login"])
+
+            wait.until(EC.presence_of_element_located((By.NAME, "user"))).send_keys(USERNAME)
+            wait.until(EC.presence_of_element_located((By.NAME, "pass"))).send_keys(PASSWORD)
+            driver.find_element(By.ID, "loginBtn").click()
+
+            wait.until(EC.presence_of_element_located((By.TAG_NAME, "table")))
+            browser.logged_in = True
+
+        def open_page(url):
+            driver.get(url)
+
+            # session OLT habis → dilempar ke form login
+            if driver.find_elements(By.NAME, "pass"):
+                login()
+                driver.get(url)
+
+            return wait.until(EC.presence_of_element_located((By.NAME, "select")))
 
-    try:
         # ===================== LOGIN =====================
-        driver.get(LOGIN_URL)
-
-        wait.until(EC.presence_of_element_located((By.NAME, "user"))).send_keys(USERNAME)
-        wait.until(EC.presence_of_element_located((By.NAME, "pass"))).send_keys(PASSWORD)
-        driver.find_element(By.ID, "loginBtn").click()
-
-        wait.until(EC.presence_of_element_located((By.TAG_NAME, "table")))
+        if not browser.logged_in:
+            login()
 
         # ===================== LOOP PON =====================
-        for pon_loop in range(1, TOTAL_PON + 1):
+        for pon_loop in _pon_range(olt, pons):
 
             # ---------- STATUS ----------
-            driver.get(STATUS_URL)
-            select = wait.until(EC.presence_of_element_located((By.NAME, "select")))
+            select = open_page(urls["status"])
             change_pon(select, pon_loop)
 
             try:
                 wait_table_loaded()
-                soup = BeautifulSoup(driver.page_source, "html.parser")
-                table = soup.find_all("table", border="1")[-1]
-                rows = table.find_all("tr")[1:]
             except Exception:
                 continue
 
-            onu_status = {}
-
-            for row in rows:
-                cols = [c.get_text(strip=True) for c in row.find_all("td")]
-                if len(cols) < 10:
-                    continue
-
-                onu_id_str = cols[0]
-                status_raw = cols[1]
-                mac = cols[2]
-                name = cols[3]
-                reason = cols[8]
-
-                try:
-                    port_part = onu_id_str.split("/")[-1]
-                    pon_num, onu_num = port_part.split(":")
-                    pon_num = int(pon_num)
-                    onu_num = int(onu_num)
-                except Exception:
-                    continue
-
-                # ===============================
-                # STATUS RAW VSOL (APA ADANYA)
-                # ===============================
-                status = "UNKNOWN"
-
-                if status_raw == "Online":
-                    status = "ONLINE"
-                elif reason == "Power Off":
-                    status = "POWER_OFF"
-                elif reason == "Wire Down":
-                    status = "WIRE_DOWN"
-                else:
-                    status = "UNKNOWN"
-
-                onu_status[(pon_num, onu_num)] = {
-                    "mac": mac,
-                    "name": name,
-                    "status": status,
-                }
+            # tabel PON lain (change belum diterapkan) → gagal, bukan data salah
+            onu_status = parse_status_table(driver.page_source, pon_loop)
+            if onu_status is None:
+                continue
 
             # ===================== OPM (RX / TX) =====================
-            ONLINE_ONU = {
-                k for k, v in onu_status.items() if v["status"] == "ONLINE"
-            }
-
+            online = online_keys(onu_status)
             opm_data = {}
 
-            if ONLINE_ONU:
-                driver.get(OPM_URL)
-                select = wait.until(EC.presence_of_element_located((By.NAME, "select")))
+            if online:
+                select = open_page(urls["opm"])
                 change_pon(select, pon_loop)
 
                 try:
                     wait_table_loaded()
-                    soup = BeautifulSoup(driver.page_source, "html.parser")
-                    table = soup.find_all("table", border="1")[-1]
-                    rows = table.find_all("tr")[1:]
+                    opm_data = parse_opm_table(driver.page_source, online, pon_loop)
+                except VsolPonError:
+                    raise
                 except Exception:
-                    rows = []
-
-                for row in rows:
-                    cols = [c.get_text(strip=True) for c in row.find_all("td")]
-                    if len(cols) < 9:
-                        continue
-
-                    onu_id_str = cols[0]
-
-                    try:
-                        port_part = onu_id_str.split("/")[-1]
-                        pon_num, onu_num = port_part.split(":")
-                        pon_num = int(pon_num)
-                        onu_num = int(onu_num)
-                    except Exception:
-                        continue
+                    opm_data = {}
 
-                    if (pon_num, onu_num) not in ONLINE_ONU:
-                        continue
-
-                    try:
-                        tx = float(cols[7]) if cols[7] else None
-                    except Exception:
-                        tx = None
+            # ===================== MERGE DATA =====================
+            onu_result.extend(merge_onu(onu_status, opm_data))
 
-                    try:
-                        rx = float(cols[8]) if cols[8] else None
-                    except Exception:
-                        rx = None
+    return onu_result
 
-                    opm_data[(pon_num, onu_num)] = {
-                        "tx": tx,
-                        "rx": rx,
-                    }
 
-            # ===================== MERGE DATA =====================
-            for (pon_num, onu_num), info in onu_status.items():
-                opm = opm_data.get((pon_num, onu_num), {})
-
-                onu_result.append({
-                    "pon": pon_num,
-                    "onu_id": onu_num,
-                    "sn": None,
-                    "mac": info["mac"] or None,
-                    "name": info["name"] or None,
-                    "status": info["status"],      # RAW STATUS
-                    "rx_power": opm.get("rx"),
-                    "tx_power": opm.get("tx"),
-                    "diagnosis": None,             # ⛔ TIDAK DIHITUNG DI SINI
-                })
+# =====================================================
+# ENTRY POINT UNTUK sync_core
+# =====================================================
+def fetch_onu_vsol(olt, pons=None):
+    if VSOL_FETCH_MODE == "selenium":
+        return fetch_onu_vsol_selenium(olt, pons=pons)
 
-        return onu_result
+    if VSOL_FETCH_MODE == "http":
+        return fetch_onu_vsol_http(olt, pons=pons)
 
-    finally:
-        driver.quit()
+    try:
+        return fetch_onu_vsol_http(olt, pons=pons)
+    except Exception as e:
+        print(f"[VSOL] HTTP gagal ({olt['host']}): {e} → fallback Selenium")
+        return fetch_onu_vsol_selenium(olt, pons=pons)
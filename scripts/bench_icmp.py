@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark batch ICMP (1 socket) vs subprocess `ping` per host.
+
+  python scripts/bench_icmp.py 10.10.0.0/24
+  python scripts/bench_icmp.py 10.10.0.1 10.10.0.2 --count 3
+  python scripts/bench_icmp.py --olt          # semua OLT aktif di DB
+"""
+import os
+import sys
+import time
+import argparse
+import ipaddress
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from collectors import icmp_probe
+
+
+def expand(targets):
+    hosts = []
+    for t in targets:
+        if "/" in t:
+            hosts += [str(ip) for ip in ipaddress.ip_network(t, strict=False).hosts()]
+        else:
+            hosts.append(t)
+    return hosts
+
+
+def olt_hosts():
+    from sync_runner import get_active_olts
+    return [o["host"] for o in get_active_olts()]
+
+
+def run(name, fn, hosts, count, timeout):
+    start = time.monotonic()
+    res = fn(hosts, count=count, timeout=timeout)
+    elapsed = time.monotonic() - start
+
+    up = sum(1 for r in res.values() if r["recv"])
+    rtts = [r["rtt_avg"] for r in res.values() if r["rtt_avg"] is not None]
+    avg = f"{sum(rtts) / len(rtts):.2f} ms" if rtts else "-"
+
+    print(f"{name:<12} {elapsed:7.2f}s  up {up}/{len(hosts)}  rtt avg {avg}")
+    return res
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("targets", nargs="*", help="ip / host / CIDR")
+    ap.add_argument("--olt", action="store_true", help="pakai host OLT aktif")
+    ap.add_argument("--count", type=int, default=1)
+    ap.add_argument("--timeout", type=float, default=icmp_probe.TIMEOUT)
+    ap.add_argument("--skip-subprocess", action="store_true")
+    args = ap.parse_args()
+
+    hosts = expand(args.targets)
+    if args.olt:
+        hosts += olt_hosts()
+    if not hosts:
+        ap.error("tidak ada target")
+
+    print(f"{len(hosts)} host, count={args.count}, timeout={args.timeout}s\n")
+
+    sock_res = run("socket", icmp_probe.probe_socket, hosts, args.count, args.timeout)
+
+    if not args.skip_subprocess:
+        proc_res = run("subprocess", icmp_probe.probe_subprocess, hosts, args.count, args.timeout)
+
+        diff = [
+            h for h in hosts
+            if bool(sock_res[h]["recv"]) != bool(proc_res[h]["recv"])
+        ]
+        if diff:
+            print(f"\n⚠️ status beda di {len(diff)} host: {', '.join(diff[:10])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Tampilkan plan query dashboard onu_status, sebelum & sesudah index migrasi.
+
+  python scripts/explain_onu.py                 # salinan SQLite + data sintetis
+  python scripts/explain_onu.py --rows 200000   # jumlah ONU sintetis
+  python scripts/explain_onu.py --pg            # EXPLAIN ANALYZE di Postgres (DATABASE_URL)
+"""
+import os
+import sys
+import time
+import random
+import sqlite3
+import argparse
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from db import keyset
+from db.migrate import ONU_INDEXES, PROBLEM_PREDICATE, _run_script
+
+PER_PAGE = 25
+
+
+def page_sql(columns, from_sql, where, params, keys, after=None):
+    """
+    SQL halaman sama persis dengan keyset.paginate (placeholder ?)
+    after: nilai key baris terakhir → halaman berikut (seek)
+    """
+    where = list(where)
+    params = list(params)
+    if after is not None:
+        cond, cond_params = keyset.seek_where(keys, after, ph="?")
+        where.append(cond)
+        params.extend(cond_params)
+
+    return f"""
+        SELECT {columns}, {keyset.select_keys(keys)}
+        FROM {from_sql}
+        WHERE {" AND ".join(where)}
+        ORDER BY {keyset.order_by(keys)}
+        LIMIT {PER_PAGE + 1}
+    """, params
+
+
+def build_queries(olt_id):
+    """
+    query dashboard/app.py → {nama: (sql, params)}
+    """
+    problem = (PROBLEM_PREDICATE.replace("status", "n.status")
+               .replace("rx_power", "n.rx_power")
+               .replace("diagnosis", "n.diagnosis"))
+    problem_from = "onu_status n JOIN olt_devices o ON o.id = n.olt_id"
+    problem_cols = "o.name AS olt_name, n.olt_id, n.pon, n.onu_id, n.status, n.rx_power"
+
+    return {
+        "home: ONU bermasalah terbaru": ("""
+            SELECT n.pon, n.onu_id, n.name, n.status, n.last_update
+            FROM onu_status n
+            JOIN olt_devices o ON o.id = n.olt_id
+            WHERE n.status != 'ONLINE'
+            ORDER BY n.last_update DESC
+            LIMIT 10
+        """, []),
+        "olt: filter status per OLT": page_sql(
+            "*", "onu_status", ["olt_id=?", "status='ONLINE'"], [olt_id],
+            keyset.ONU_PAGE_KEYS
+        ),
+        "olt: filter status, halaman berikut": page_sql(
+            "*", "onu_status", ["olt_id=?", "status='ONLINE'"], [olt_id],
+            keyset.ONU_PAGE_KEYS, after=[0, -20.0, 2, 10]
+        ),
+        "olt: filter PON": page_sql(
+            "*", "onu_status", ["olt_id=?", "pon=?"], [olt_id, 3],
+            keyset.ONU_PAGE_KEYS
+        ),
+        "/ont/problem": page_sql(
+            problem_cols, problem_from, ["o.is_active = 1", f"({problem})"], [],
+            keyset.PROBLEM_PAGE_KEYS
+        ),
+        "/ont/problem, halaman berikut": page_sql(
+            problem_cols, problem_from, ["o.is_active = 1", f"({problem})"], [],
+            keyset.PROBLEM_PAGE_KEYS,
+            after=["2025-01-01 00:00:30", 1, 0, 5, 2, 10]
+        ),
+        "toggle telegram": ("""
+            SELECT alert_telegram
+            FROM onu_status
+            WHERE olt_id = ? AND pon = 1 AND onu_id = 7
+        """, [olt_id]),
+    }
+
+
+STATUSES = ["ONLINE"] * 17 + ["OFFLINE", "DOWN", "POWER_OFF"]
+
+
+def build_sqlite(rows, olts=20):
+    conn = sqlite3.connect(":memory:", isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.executescript("""
+        CREATE TABLE olt_devices (
+            id INTEGER PRIMARY KEY, name TEXT, is_active INTEGER DEFAULT 1
+        );
+        CREATE TABLE onu_status (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            olt_id INTEGER NOT NULL,
+            pon INTEGER NOT NULL,
+            onu_id INTEGER NOT NULL,
+            sn TEXT, mac TEXT, name TEXT,
+            status TEXT, rx_power REAL, tx_power REAL, diagnosis TEXT,
+            last_update DATETIME DEFAULT CURRENT_TIMESTAMP,
+            alert_telegram INTEGER DEFAULT 1,
+            UNIQUE (olt_id, pon, onu_id)
+        );
+    """)
+    conn.executemany(
+        "INSERT INTO olt_devices (id, name) VALUES (?, ?)",
+        [(i, f"OLT {i}") for i in range(1, olts + 1)]
+    )
+
+    rnd = random.Random(1)
+    per_olt = max(1, rows // olts)
+    data = []
+    for olt_id in range(1, olts + 1):
+        for i in range(per_olt):
+            status = rnd.choice(STATUSES)
+            rx = None if status != "ONLINE" else round(rnd.uniform(-29, -14), 2)
+            diag = "NORMAL" if status == "ONLINE" and rx > -25 else "ONU Offline"
+            data.append((
+                olt_id, i // 64 + 1, i % 64 + 1, status, rx, diag,
+                f"2025-01-01 00:00:{i % 60:02d}"
+            ))
+    conn.executemany("""
+        INSERT INTO onu_status (olt_id, pon, onu_id, status, rx_power, diagnosis, last_update)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, data)
+    conn.execute("ANALYZE")
+    return conn
+
+
+def explain_sqlite(conn, title):
+    print(f"\n===== {title} =====")
+    for name, (sql, params) in build_queries(1).items():
+        plan = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+
+        start = time.perf_counter()
+        for _ in range(20):
+            conn.execute(sql, params).fetchall()
+        ms = (time.perf_counter() - start) / 20 * 1000
+
+        print(f"\n-- {name} ({ms:.2f} ms)")
+        for r in plan:
+            print(f"   {r['detail']}")
+
+
+def explain_pg():
+    from db.db import get_db
+
+    conn = get_db()
+    cur = conn.cursor()
+    cur.execute("SELECT id FROM olt_devices ORDER BY id LIMIT 1")
+    row = cur.fetchone()
+    olt_id = row["id"] if row else 1
+
+    for name, (sql, params) in build_queries(olt_id).items():
+        cur.execute(
+            "EXPLAIN (ANALYZE, BUFFERS) " + sql.replace("?", "%s"),
+            params or None
+        )
+        print(f"\n-- {name}")
+        for r in cur.fetchall():
+            print(f"   {r['QUERY PLAN']}")
+
+    conn.close()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rows", type=int, default=100000)
+    ap.add_argument("--pg", action="store_true")
+    args = ap.parse_args()
+
+    if args.pg:
+        explain_pg()
+        return
+
+    conn = build_sqlite(args.rows)
+    explain_sqlite(conn, f"SEBELUM ({args.rows} ONU)")
+
+    _run_script(conn.cursor(), ONU_INDEXES)
+    conn.execute("ANALYZE")
+    explain_sqlite(conn, "SESUDAH index migrasi")
+
+
+if __name__ == "__main__":
+    main()
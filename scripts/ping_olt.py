@@ -1,24 +1,16 @@
 #!/usr/bin/env python3
 import os
+import sys
 import sqlite3
-import subprocess
-import platform
 from datetime import datetime
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DB_PATH = os.path.join(BASE_DIR, "data", "dashboard.db")
 
-def ping(host):
-    ip = host.split(":")[0]
-    param = "-n" if platform.system().lower() == "windows" else "-c"
-    cmd = ["ping", param, "1", ip]
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
 
-    result = subprocess.run(
-        cmd,
-        stdout=subprocess.DEVNULL,
-        stderr=subprocess.DEVNULL
-    )
-    return result.returncode == 0
+from collectors.icmp_probe import probe
 
 def main():
     conn = sqlite3.connect(DB_PATH)
@@ -32,8 +24,11 @@ def main():
 
     olts = cur.fetchall()
 
+    # semua OLT di-ping sekaligus (1 socket ICMP)
+    results = probe(host for _, host in olts)
+
     for olt_id, host in olts:
-        online = ping(host)
+        online = results[host]["recv"] > 0
 
         if online:
             cur.execute("""
@@ -1,28 +1,14 @@
-from olt_loader import get_active_olts
-from scraper_hioso import run_hioso
-from scraper_vsol import run_vsol
+#!/usr/bin/env python3
+import os
+import sys
 
-SCRAPER_MAP = {
-    "hioso": run_hioso,
-    "vsol": run_vsol
-}
+# ===============================
+# PROJECT ROOT PATH
+# ===============================
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
 
-def main():
-    olts = get_active_olts()
-
-    if not olts:
-        print("⚠️ Tidak ada OLT aktif")
-        return
-
-    for olt in olts:
-        brand = olt["brand"].lower()
-
-        if brand not in SCRAPER_MAP:
-            print(f"❌ Brand tidak dikenali: {brand}")
-            continue
-
-        print(f"\n🚀 Proses {olt['name']} ({brand})")
-        SCRAPER_MAP[brand](olt)
+from sync_runner import main
 
 if __name__ == "__main__":
     main()
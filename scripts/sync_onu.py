@@ -111,8 +111,8 @@ def upsert_onu(cur, olt_id, onu):
             last_update=CURRENT_TIMESTAMP
     """, (
         olt_id,
-        str(onu.get("pon")),
-        str(onu.get("onu_id")),
+        int(onu.get("pon")),
+        int(onu.get("onu_id")),
         onu.get("sn"),
         onu.get("mac"),
         onu.get("name"),
@@ -152,7 +152,7 @@ def main():
             WHERE olt_id=?
         """, (olt["id"],))
         old_onu = {
-            (str(r["pon"]), str(r["onu_id"])): r["diagnosis"]
+            (int(r["pon"]), int(r["onu_id"])): r["diagnosis"]
             for r in cur.fetchall()
         }
 
@@ -165,8 +165,8 @@ def main():
         olt_onu_keys = set()
 
         for onu in onus:
-            pon = str(onu.get("pon"))
-            onu_id = str(onu.get("onu_id"))
+            pon = int(onu.get("pon"))
+            onu_id = int(onu.get("onu_id"))
             olt_onu_keys.add((pon, onu_id))
 
             diagnosis = map_diagnosis(
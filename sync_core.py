@@ -1,10 +1,18 @@
 #!/usr/bin/env python3
 import os
+import time
 import sqlite3
+from collections import defaultdict
 
 from scraper import scraper_hioso
 from scraper import scraper_vsol
-from alerts.telegram import send as send_telegram
+from alerts import outbox
+from alerts import aggregate
+import optical_history
+import onu_summary
+from db.migrate import ONU_INDEXES
+from db.db import SYNC_DB, get_db
+from db import pg_ingest
 
 # ===============================
 # PATH & DB
@@ -12,7 +20,11 @@ from alerts.telegram import send as send_telegram
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DB_PATH = os.path.join(BASE_DIR, "data", "dashboard.db")
 
-fetch_onu_hioso = scraper_hioso.fetch_onu_hioso
+# HIOSO_FETCH_MODE=sync → fallback ke versi lama (1 PON per request)
+if os.environ.get("HIOSO_FETCH_MODE", "async") == "sync":
+    fetch_onu_hioso = scraper_hioso.fetch_onu_hioso
+else:
+    fetch_onu_hioso = scraper_hioso.fetch_onu_hioso_fast
 fetch_onu_vsol  = scraper_vsol.fetch_onu_vsol
 
 SCRAPER_MAP = {
@@ -20,6 +32,89 @@ SCRAPER_MAP = {
     "vsol": fetch_onu_vsol
 }
 
+# ===============================
+# SYNC INCREMENTAL PER PON
+# ===============================
+# probe murah → hanya PON yang fingerprint-nya berubah di-scrape ulang
+SYNC_INCREMENTAL = os.environ.get("SYNC_INCREMENTAL", "0") == "1"
+# tiap N siklus tetap full refresh (RX bisa berubah tanpa ubah fingerprint)
+# <= 0 → selalu full refresh
+SYNC_FULL_EVERY = int(os.environ.get("SYNC_FULL_EVERY", 12))
+
+# VSOL tidak punya halaman ringkasan: probe = buka halaman status
+# semua PON, hampir semahal full scrape → selalu full sync
+PROBE_MAP = {
+    "hioso": scraper_hioso.probe_pons_hioso,
+}
+
+SYNC_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pon_fingerprint (
+    olt_id INTEGER NOT NULL,
+    pon INTEGER NOT NULL,
+    fingerprint TEXT NOT NULL,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (olt_id, pon)
+);
+
+CREATE TABLE IF NOT EXISTS olt_sync_state (
+    olt_id INTEGER PRIMARY KEY,
+    cycle INTEGER NOT NULL DEFAULT 0,
+    last_full_sync DATETIME
+);
+"""
+
+
+def ensure_schema(conn):
+    # postgres: skema dari db/init.sql
+    if SYNC_DB == "postgres":
+        return
+    conn.executescript(SYNC_SCHEMA)
+    conn.executescript(ONU_INDEXES)
+    outbox.ensure_schema(conn)
+    optical_history.ensure_schema(conn)
+    onu_summary.ensure_schema(conn)
+
+def connect():
+    if SYNC_DB == "postgres":
+        return get_db()
+
+    conn = sqlite3.connect(DB_PATH, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+
+    conn.execute("PRAGMA journal_mode=WAL;")
+    conn.execute("PRAGMA synchronous=NORMAL;")
+    conn.execute("PRAGMA busy_timeout=30000;")
+    ensure_schema(conn)
+    return conn
+
+
+def begin(cur, olt_id):
+    if SYNC_DB == "postgres":
+        cur.execute("BEGIN")
+        # sync OLT yang sama antre, OLT lain tetap paralel
+        cur.execute("SELECT pg_advisory_xact_lock(?)", (olt_id,))
+    else:
+        cur.execute("BEGIN IMMEDIATE")
+
+
+def commit(conn):
+    if SYNC_DB == "postgres":
+        # autocommit + BEGIN manual → conn.commit() psycopg2 no-op
+        conn.execute("COMMIT")
+    else:
+        conn.commit()
+
+
+def rollback(conn):
+    if SYNC_DB == "postgres":
+        # autocommit + BEGIN manual → conn.rollback() psycopg2 no-op
+        try:
+            conn.execute("ROLLBACK")
+        except Exception:
+            pass
+        return
+    conn.rollback()
+
 # ===============================
 # DIAGNOSIS (VENDOR AWARE)
 # ===============================
@@ -87,29 +182,39 @@ def is_recovery(prev_diag: str, curr_diag: str) -> bool:
 # ===============================
 # UPSERT ONU
 # ===============================
-def upsert_onu(cur, olt_id, onu):
-    cur.execute("""
-        INSERT INTO onu_status (
-            olt_id, pon, onu_id,
-            sn, mac, name,
-            status, rx_power, tx_power,
-            diagnosis, last_update
-        )
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-        ON CONFLICT(olt_id, pon, onu_id)
-        DO UPDATE SET
-            sn=excluded.sn,
-            mac=excluded.mac,
-            name=excluded.name,
-            status=excluded.status,
-            rx_power=excluded.rx_power,
-            tx_power=excluded.tx_power,
-            diagnosis=excluded.diagnosis,
-            last_update=CURRENT_TIMESTAMP
-    """, (
+UPSERT_ONU_SQL = """
+    INSERT INTO onu_status (
+        olt_id, pon, onu_id,
+        sn, mac, name,
+        status, rx_power, tx_power,
+        diagnosis, last_update
+    )
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+    ON CONFLICT(olt_id, pon, onu_id)
+    DO UPDATE SET
+        sn=excluded.sn,
+        mac=excluded.mac,
+        name=excluded.name,
+        status=excluded.status,
+        rx_power=excluded.rx_power,
+        tx_power=excluded.tx_power,
+        diagnosis=excluded.diagnosis,
+        last_update=CURRENT_TIMESTAMP
+"""
+
+
+def onu_key(onu):
+    """
+    (pon, onu_id) sebagai integer → sama dengan tipe kolom onu_status
+    """
+    return int(onu.get("pon")), int(onu.get("onu_id"))
+
+
+def onu_params(olt_id, onu):
+    return (
         olt_id,
-        str(onu.get("pon")),
-        str(onu.get("onu_id")),
+        int(onu.get("pon")),
+        int(onu.get("onu_id")),
         onu.get("sn"),
         onu.get("mac"),
         onu.get("name"),
@@ -117,20 +222,192 @@ def upsert_onu(cur, olt_id, onu):
         onu.get("rx_power"),
         onu.get("tx_power"),
         onu.get("diagnosis")
-    ))
+    )
+
+
+def upsert_onu(cur, olt_id, onu):
+    cur.execute(UPSERT_ONU_SQL, onu_params(olt_id, onu))
+
+
+def upsert_onus(cur, olt_id, onus):
+    """
+    Bulk upsert (1x executemany untuk semua ONU)
+    """
+    if onus:
+        cur.executemany(
+            UPSERT_ONU_SQL,
+            [onu_params(olt_id, onu) for onu in onus]
+        )
+
+
+def delete_onus(cur, olt_id, keys):
+    if keys:
+        cur.executemany("""
+            DELETE FROM onu_status
+            WHERE olt_id=? AND pon=? AND onu_id=?
+        """, [
+            (olt_id, pon, onu_id)
+            for pon, onu_id in keys
+        ])
+
+
+# kolom yang dibandingkan untuk change-detection
+CHANGE_FIELDS = (
+    "sn", "mac", "name",
+    "status", "rx_power", "tx_power",
+    "diagnosis"
+)
+
+
+def onu_changed(prev, onu):
+    """
+    True kalau ONU baru / ada kolom yang berubah dibanding baris DB
+    """
+    if prev is None:
+        return True
+    return any(prev[f] != onu.get(f) for f in CHANGE_FIELDS)
+
+
+def touch_olt(cur, olt_id):
+    """
+    Penanda data OLT masih segar (1 baris), pengganti
+    menulis ulang last_update semua ONU yang tidak berubah
+    """
+    cur.execute("""
+        UPDATE olt_devices
+        SET last_seen=CURRENT_TIMESTAMP
+        WHERE id=?
+    """, (olt_id,))
+
+
+def load_onu_state(cur, olt_id):
+    """
+    1 query: kondisi ONU di DB + toggle telegram
+    return: {(pon, onu_id): row}
+    """
+    cur.execute("""
+        SELECT
+            pon, onu_id,
+            sn, mac, name,
+            status, rx_power, tx_power,
+            diagnosis, alert_telegram
+        FROM onu_status
+        WHERE olt_id=?
+    """, (olt_id,))
+
+    return {
+        (int(r["pon"]), int(r["onu_id"])): r
+        for r in cur.fetchall()
+    }
+
+
+def plan_pons(cur, olt):
+    """
+    Tentukan PON yang perlu di-scrape ulang
+    return: (pons, fingerprints, cycle)
+      pons = None → full sync, set kosong → tidak ada yang berubah
+    """
+    probe = PROBE_MAP.get(olt["brand"])
+    if not SYNC_INCREMENTAL or not probe:
+        return None, None, 0
+
+    cur.execute(
+        "SELECT cycle FROM olt_sync_state WHERE olt_id=?",
+        (olt["id"],)
+    )
+    row = cur.fetchone()
+    cycle = row["cycle"] if row else 0
+
+    try:
+        fingerprints = {int(p): fp for p, fp in probe(olt).items()}
+    except Exception as e:
+        print(f"[SYNC] probe gagal ({olt['host']}): {e} → full sync")
+        return None, None, cycle
+
+    if not fingerprints:
+        # halaman PON berubah format / login gagal diam-diam → parser
+        # tidak menemukan PON sama sekali, jangan sampai tak terlihat
+        cur.execute(
+            "SELECT COUNT(*) AS n FROM pon_fingerprint WHERE olt_id=?",
+            (olt["id"],)
+        )
+        if int(olt.get("pon_count") or 0) > 0 or cur.fetchone()["n"]:
+            print(f"[SYNC] WARNING probe {olt['host']}: 0 fingerprint PON "
+                  f"padahal OLT punya PON → full sync")
+
+    if (not fingerprints
+            or SYNC_FULL_EVERY <= 0
+            or cycle % SYNC_FULL_EVERY == 0):
+        return None, fingerprints, cycle
+
+    cur.execute(
+        "SELECT pon, fingerprint FROM pon_fingerprint WHERE olt_id=?",
+        (olt["id"],)
+    )
+    old = {r["pon"]: r["fingerprint"] for r in cur.fetchall()}
+
+    pons = {
+        pon for pon, fp in fingerprints.items()
+        if old.get(pon) != fp
+    }
+    return pons, fingerprints, cycle
+
+
+def save_pon_state(cur, olt_id, fingerprints, cycle, full):
+    if fingerprints is not None:
+        cur.execute("DELETE FROM pon_fingerprint WHERE olt_id=?", (olt_id,))
+        cur.executemany("""
+            INSERT INTO pon_fingerprint (olt_id, pon, fingerprint)
+            VALUES (?, ?, ?)
+        """, [(olt_id, int(pon), fp) for pon, fp in fingerprints.items()])
+
+    cur.execute("""
+        INSERT INTO olt_sync_state (olt_id, cycle, last_full_sync)
+        VALUES (?, ?, CASE WHEN ? = 1 THEN CURRENT_TIMESTAMP END)
+        ON CONFLICT(olt_id) DO UPDATE SET
+            cycle=excluded.cycle,
+            last_full_sync=COALESCE(excluded.last_full_sync, olt_sync_state.last_full_sync)
+    """, (olt_id, cycle + 1, 1 if full else 0))
 
 
 # ===============================
-# SYNC SINGLE OLT
+# PESAN TELEGRAM
 # ===============================
-def sync_single_olt(olt):
-    conn = sqlite3.connect(DB_PATH, timeout=30, isolation_level=None)
-    conn.row_factory = sqlite3.Row
+def recovery_message(olt, onu, pon, onu_id):
+    rx = onu.get("rx_power")
+    rx_text = "-" if rx is None else f"{rx:.2f} dBm"
+
+    return (
+        "✅ <b>ONT RECOVERY</b>\n\n"
+        f"<b>OLT</b>       : {olt['name']}\n"
+        f"<b>PON / ONU</b> : {pon} / {onu_id}\n"
+        f"<b>Nama</b>      : {onu.get('name','-')}\n"
+        f"<b>Status OLT</b>: {onu.get('status')}\n"
+        f"<b>RX Power</b>  : {rx_text}\n"
+        f"<b>Keterangan</b>: ONT kembali normal"
+    )
+
+
+def problem_message(olt, onu, pon, onu_id):
+    rx = onu.get("rx_power")
+    rx_text = "-" if rx is None else f"{rx:.2f} dBm"
+
+    return (
+        "🚨 <b>ONT BERMASALAH</b>\n\n"
+        f"<b>OLT</b>       : {olt['name']}\n"
+        f"<b>PON / ONU</b> : {pon} / {onu_id}\n"
+        f"<b>Nama</b>      : {onu.get('name','-')}\n"
+        f"<b>Status OLT</b>: {onu.get('status')}\n"
+        f"<b>RX Power</b>  : {rx_text}\n"
+        f"<b>Diagnosis</b> : {onu['diagnosis']}"
+    )
 
-    conn.execute("PRAGMA journal_mode=WAL;")
-    conn.execute("PRAGMA synchronous=NORMAL;")
-    conn.execute("PRAGMA busy_timeout=30000;")
 
+# ===============================
+# SYNC SINGLE OLT
+# ===============================
+def sync_single_olt(olt):
+    conn = connect()
     cur = conn.cursor()
 
     scraper = SCRAPER_MAP.get(olt["brand"])
@@ -140,152 +417,225 @@ def sync_single_olt(olt):
 
     try:
         # ===============================
-        # DATA ONU SEBELUM SYNC (ANTI-SPAM)
+        # SCRAPE ONU
         # ===============================
-        cur.execute("""
-            SELECT pon, onu_id, status, rx_power, diagnosis
-            FROM onu_status
-            WHERE olt_id=?
-        """, (olt["id"],))
+        t_start = time.monotonic()
+        pons, fingerprints, cycle = plan_pons(cur, olt)
 
-        old_onu = {
-            (str(r["pon"]), str(r["onu_id"])): r
-            for r in cur.fetchall()
-        }
+        if pons is None:
+            onus = scraper(olt)
+        elif pons:
+            onus = scraper(olt, pons=pons)
+        else:
+            onus = []
+        t_scrape = time.monotonic() - t_start
+
+        begin(cur, olt["id"])
 
         # ===============================
-        # SCRAPE ONU
+        # DATA ONU SEBELUM SYNC (ANTI-SPAM)
         # ===============================
-        onus = scraper(olt)
-
-        cur.execute("BEGIN IMMEDIATE")
+        old_onu = load_onu_state(cur, olt["id"])
+
+        # incremental → rekonsiliasi hanya PON yang di-scrape
+        # + PON yang sudah hilang dari OLT.
+        # PON berubah tapi hasil scrape kosong (mis. timeout halaman)
+        # → ONU-nya tidak dihapus & fingerprint tidak disimpan (diulang
+        # siklus berikutnya; PON yang benar-benar kosong ikut full sync)
+        empty_pons = set()
+        # PON yang tidak di-scrape → RX/TX terakhir di DB jadi sampel
+        # riwayat optik (fingerprint sama = ONU & status sama; RX bisa
+        # bergeser, dikoreksi tiap full sync SYNC_FULL_EVERY siklus)
+        carried = []
+        if pons is not None:
+            empty_pons = set(pons) - {onu_key(onu)[0] for onu in onus}
+            scope = (set(pons) - empty_pons) | {
+                pon for pon, _ in old_onu if pon not in fingerprints
+            }
+            carried = [
+                {
+                    "pon": pon,
+                    "onu_id": onu_id,
+                    "rx_power": r["rx_power"],
+                    "tx_power": r["tx_power"],
+                }
+                for (pon, onu_id), r in old_onu.items()
+                if pon not in scope and pon in fingerprints
+            ]
+            old_onu = {k: r for k, r in old_onu.items() if k[0] in scope}
 
         olt_onu_keys = set()
-        alert_count = 0
-        recovery_count = 0
 
         for onu in onus:
-            pon = str(onu.get("pon"))
-            onu_id = str(onu.get("onu_id"))
-            olt_onu_keys.add((pon, onu_id))
-
-            raw_status = onu.get("status")
-            rx = onu.get("rx_power")
+            olt_onu_keys.add(onu_key(onu))
 
             # STATUS = RAW OLT
-            onu["status"] = raw_status
-
             # DIAGNOSIS = LOGIKA FAMS
             onu["diagnosis"] = map_diagnosis(
                 olt["brand"],
-                raw_status,
-                rx
+                onu.get("status"),
+                onu.get("rx_power")
             )
 
+        # ===============================
+        # SIMPAN ONU (BULK, HANYA YANG BERUBAH)
+        # last_update = waktu terakhir ONU berubah
+        # ===============================
+        to_delete = old_onu.keys() - olt_onu_keys
+
+        if SYNC_DB == "postgres":
+            # COPY → staging → 1x merge set-based (termasuk hapus ONU hilang)
+            changed_count, _ = pg_ingest.merge_onus(
+                cur, olt["id"], onus,
+                pons=None if pons is None else scope
+            )
+        else:
+            changed = [
+                onu for onu in onus
+                if onu_changed(old_onu.get(onu_key(onu)), onu)
+            ]
+            upsert_onus(cur, olt["id"], changed)
+            changed_count = len(changed)
+
+        touch_olt(cur, olt["id"])
+
+        # ONU baru → toggle telegram ikut DEFAULT kolom, baca ulang 1x
+        alert_flags = {k: r["alert_telegram"] for k, r in old_onu.items()}
+        if olt_onu_keys - old_onu.keys():
+            alert_flags = {
+                k: r["alert_telegram"]
+                for k, r in load_onu_state(cur, olt["id"]).items()
+            }
+
+        # ===============================
+        # ALERT & RECOVERY (EVENT PER ONU)
+        # ===============================
+        events = []
+        pon_totals = defaultdict(int)
+
+        for onu in onus:
+            pon, onu_id = onu_key(onu)
+            pon_totals[pon] += 1
+
             prev = old_onu.get((pon, onu_id))
             prev_diag = prev["diagnosis"] if prev else None
+            curr_diag = onu["diagnosis"]
 
-            # SIMPAN ONU
-            upsert_onu(cur, olt["id"], onu)
+            # RECOVERY
+            if prev and is_recovery(prev_diag, curr_diag):
+                kind = "recovery"
 
-            curr_diag = onu["diagnosis"]
+            # BERMASALAH (down / redaman)
+            elif is_problem_diagnosis(curr_diag):
+                # ANTI-SPAM (diagnosis & rx tidak berubah)
+                if prev:
+                    if prev_diag == curr_diag and prev["rx_power"] == onu.get("rx_power"):
+                        continue
+                kind = aggregate.problem_kind(onu)
 
-            # ===============================
-            # CEK TOGGLE TELEGRAM
-            # ===============================
-            cur.execute("""
-                SELECT alert_telegram
-                FROM onu_status
-                WHERE olt_id=? AND pon=? AND onu_id=?
-            """, (olt["id"], pon, onu_id))
-            row = cur.fetchone()
-            if not row or not row["alert_telegram"]:
+            else:
                 continue
 
-            # ===============================
-            # RECOVERY ALERT
-            # ===============================
-            if prev and is_recovery(prev_diag, curr_diag):
-                rx_text = "-" if rx is None else f"{rx:.2f} dBm"
-
-                msg = (
-                    "✅ <b>ONT RECOVERY</b>\n\n"
-                    f"<b>OLT</b>       : {olt['name']}\n"
-                    f"<b>PON / ONU</b> : {pon} / {onu_id}\n"
-                    f"<b>Nama</b>      : {onu.get('name','-')}\n"
-                    f"<b>Status OLT</b>: {raw_status}\n"
-                    f"<b>RX Power</b>  : {rx_text}\n"
-                    f"<b>Keterangan</b>: ONT kembali normal"
+            events.append({
+                "kind": kind,
+                "pon": pon,
+                "onu_id": onu_id,
+                "onu": onu,
+                # CEK TOGGLE TELEGRAM
+                "alert": bool(alert_flags.get((pon, onu_id))),
+                # hanya perubahan status / diagnosis yang boleh diringkas
+                # per PON (RX yang bergeser tetap alert per ONU)
+                "transition": (
+                    prev is None
+                    or prev_diag != curr_diag
+                    or prev["status"] != onu.get("status")
                 )
+            })
 
-                send_telegram(msg)
-                recovery_count += 1
-                continue
+        # ===============================
+        # AGREGASI: PON DOWN MASSAL → 1 PESAN
+        # (dihitung dari semua ONU, toggle hanya menentukan kirim / tidak)
+        # ===============================
+        groups, singles = aggregate.group_events(events, pon_totals)
 
-            # ===============================
-            # ALERT BERMASALAH
-            # ===============================
-            if not is_problem_diagnosis(curr_diag):
+        alerts = []
+        alert_count = 0
+        recovery_count = 0
+
+        for kind, pon, evs in groups:
+            if not any(ev["alert"] for ev in evs):
                 continue
+            alerts.append(aggregate.group_message(
+                olt, kind, pon, evs, pon_totals[pon]
+            ))
 
-            # ANTI-SPAM (diagnosis & rx tidak berubah)
-            if prev:
-                if prev_diag == curr_diag and prev["rx_power"] == rx:
-                    continue
-
-            rx_text = "-" if rx is None else f"{rx:.2f} dBm"
-
-            msg = (
-                "🚨 <b>ONT BERMASALAH</b>\n\n"
-                f"<b>OLT</b>       : {olt['name']}\n"
-                f"<b>PON / ONU</b> : {pon} / {onu_id}\n"
-                f"<b>Nama</b>      : {onu.get('name','-')}\n"
-                f"<b>Status OLT</b>: {raw_status}\n"
-                f"<b>RX Power</b>  : {rx_text}\n"
-                f"<b>Diagnosis</b> : {curr_diag}"
-            )
+        for ev in singles:
+            if not ev["alert"]:
+                continue
 
-            send_telegram(msg)
-            alert_count += 1
+            if ev["kind"] == "recovery":
+                alerts.append(recovery_message(olt, ev["onu"], ev["pon"], ev["onu_id"]))
+                recovery_count += 1
+            else:
+                alerts.append(problem_message(olt, ev["onu"], ev["pon"], ev["onu_id"]))
+                alert_count += 1
 
         # ===============================
         # HAPUS ONU SUDAH TIDAK ADA
+        # (postgres: sudah ikut merge_onus)
         # ===============================
-        cur.execute("""
-            SELECT pon, onu_id
-            FROM onu_status
-            WHERE olt_id=?
-        """, (olt["id"],))
-
-        db_onu_keys = {
-            (str(r["pon"]), str(r["onu_id"]))
-            for r in cur.fetchall()
-        }
-
-        to_delete = db_onu_keys - olt_onu_keys
-        if to_delete:
-            cur.executemany("""
-                DELETE FROM onu_status
-                WHERE olt_id=? AND pon=? AND onu_id=?
-            """, [
-                (olt["id"], pon, onu_id)
-                for pon, onu_id in to_delete
-            ])
+        if SYNC_DB != "postgres":
+            delete_onus(cur, olt["id"], to_delete)
 
-        conn.commit()
+        # ===============================
+        # RINGKASAN PER PON / OLT / GLOBAL (DIBACA DASHBOARD)
+        # ===============================
+        onu_summary.refresh_olt(cur, olt["id"])
+
+        # ===============================
+        # ALERT → OUTBOX (1 TRANSAKSI)
+        # dikirim alerts.dispatcher di luar lock DB
+        # ===============================
+        outbox.enqueue(cur, alerts, olt_id=olt["id"])
+
+        # ===============================
+        # RIWAYAT OPTIK (RAW + ROLLUP 5m/1h/1d)
+        # ===============================
+        optical_history.record_samples(cur, olt["id"], onus + carried)
+        optical_history.prune(cur)
+
+        if SYNC_INCREMENTAL:
+            saved = fingerprints
+            if empty_pons:
+                saved = {
+                    pon: fp for pon, fp in fingerprints.items()
+                    if pon not in empty_pons
+                }
+            save_pon_state(cur, olt["id"], saved, cycle, pons is None)
+
+        commit(conn)
+        t_db = time.monotonic() - t_start - t_scrape
 
         msg = (
-            f"Sync OK ({len(onus)} ONT)"
+            f"Sync OK ({len(onus)} ONT, {changed_count} berubah)"
             f", Alert: {alert_count}"
             f", Recovery: {recovery_count}"
         )
+        if pons is not None:
+            msg += f", PON refresh: {len(pons)}/{len(fingerprints)}"
+        if empty_pons:
+            msg += f", PON kosong (diulang): {sorted(empty_pons)}"
+        if groups:
+            msg += f", Ringkasan PON: {len(groups)}"
         if to_delete:
             msg += f", {len(to_delete)} ONU dihapus"
+        msg += f" | scrape {t_scrape:.1f}s, db {t_db * 1000:.0f}ms"
 
         return True, msg
 
     except Exception as e:
-        conn.rollback()
+        rollback(conn)
+        optical_history.forget_samples(olt["id"])
         return False, str(e)
 
     finally:
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+import os
+import threading
+import time
+from concurrent.futures import (
+    ThreadPoolExecutor,
+    ProcessPoolExecutor,
+    as_completed
+)
+
+from sync_core import connect, sync_single_olt
+from alerts import dispatcher
+
+# ===============================
+# CONFIG
+# ===============================
+# thread  → cocok untuk HIOSO (requests, I/O bound)
+# process → isolasi penuh per OLT (Selenium / VSOL berat)
+SYNC_MODE = os.environ.get("SYNC_MODE", "thread")
+SYNC_WORKERS = int(os.environ.get("SYNC_WORKERS", 8))
+
+# batas paralel per brand (VSOL = Chrome, jauh lebih berat)
+BRAND_LIMITS = {
+    "hioso": int(os.environ.get("SYNC_LIMIT_HIOSO", 8)),
+    "vsol": int(os.environ.get("SYNC_LIMIT_VSOL", 2)),
+}
+DEFAULT_BRAND_LIMIT = 2
+
+
+# ===============================
+# AMBIL OLT AKTIF
+# ===============================
+def get_active_olts():
+    conn = connect()
+
+    rows = conn.execute("""
+        SELECT *
+        FROM olt_devices
+        WHERE is_active=1
+        ORDER BY id
+    """).fetchall()
+
+    conn.close()
+    return [dict(r) for r in rows]
+
+
+# ===============================
+# WORKER 1 OLT
+# ===============================
+def _sync_one(olt):
+    """
+    Jalan di worker (thread / process)
+    return: (olt_id, ok, msg, durasi detik)
+    """
+    start = time.monotonic()
+    try:
+        ok, msg = sync_single_olt(olt)
+    except Exception as e:
+        ok, msg = False, str(e)
+    return olt["id"], ok, msg, time.monotonic() - start
+
+
+def _brand_of(olt):
+    return (olt.get("brand") or "").lower()
+
+
+# ===============================
+# SYNC SEMUA OLT (PARALEL)
+# ===============================
+def run_all(olts=None, mode=None, workers=None, brand_limits=None,
+            on_result=None):
+    """
+    Sync banyak OLT secara paralel.
+
+    - workers      : total worker maksimal (semua brand)
+    - brand_limits : batas paralel per brand, mis. {"vsol": 2}
+    - on_result    : callback(olt, ok, msg, durasi) tiap OLT selesai
+
+    return: dict ringkasan (ok, error, wall_time, results)
+    """
+    if olts is None:
+        olts = get_active_olts()
+
+    mode = mode or SYNC_MODE
+    workers = workers or SYNC_WORKERS
+    limits = dict(BRAND_LIMITS)
+    limits.update(brand_limits or {})
+
+    if mode == "process":
+        executor_cls = ProcessPoolExecutor
+    elif mode == "thread":
+        executor_cls = ThreadPoolExecutor
+    else:
+        raise ValueError(f"SYNC_MODE tidak dikenal: {mode}")
+
+    # semaphore per brand → OLT berat tidak menghabiskan worker
+    brand_sem = {}
+    for olt in olts:
+        brand = _brand_of(olt)
+        if brand not in brand_sem:
+            brand_sem[brand] = threading.BoundedSemaphore(
+                max(1, limits.get(brand, DEFAULT_BRAND_LIMIT))
+            )
+
+    by_id = {olt["id"]: olt for olt in olts}
+    results = []
+    start = time.monotonic()
+
+    with executor_cls(max_workers=max(1, workers)) as pool, \
+         ThreadPoolExecutor(max_workers=max(1, len(olts))) as dispatch:
+
+        def submit(olt):
+            # tunggu slot brand, lalu kirim ke pool utama
+            sem = brand_sem[_brand_of(olt)]
+            sem.acquire()
+            try:
+                return pool.submit(_sync_one, olt).result()
+            finally:
+                sem.release()
+
+        futures = [dispatch.submit(submit, olt) for olt in olts]
+
+        for fut in as_completed(futures):
+            olt_id, ok, msg, elapsed = fut.result()
+            olt = by_id[olt_id]
+            results.append((olt, ok, msg, elapsed))
+
+            if on_result:
+                on_result(olt, ok, msg, elapsed)
+
+    wall_time = time.monotonic() - start
+    ok_count = sum(1 for _, ok, _, _ in results if ok)
+
+    return {
+        "total": len(olts),
+        "ok": ok_count,
+        "error": len(olts) - ok_count,
+        "wall_time": wall_time,
+        # jumlah waktu semua OLT kalau dijalankan berurutan
+        "serial_time": sum(r[3] for r in results),
+        "results": results
+    }
+
+
+# ===============================
+# MAIN
+# ===============================
+def print_result(olt, ok, msg, elapsed):
+    tag = "OK" if ok else "ERR"
+    print(f"[{tag}] {olt['name']} ({olt['host']}) {elapsed:.1f}s → {msg}")
+
+
+def main():
+    olts = get_active_olts()
+
+    if not olts:
+        print("⚠️ Tidak ada OLT aktif")
+        return
+
+    print(
+        f"🚀 Sync {len(olts)} OLT "
+        f"(mode={SYNC_MODE}, workers={SYNC_WORKERS}, limit={BRAND_LIMITS})"
+    )
+
+    summary = run_all(olts, on_result=print_result)
+
+    print(
+        f"\n✅ Selesai: {summary['ok']} OK, {summary['error']} gagal | "
+        f"wall {summary['wall_time']:.1f}s "
+        f"(serial {summary['serial_time']:.1f}s)"
+    )
+
+    # kirim alert yang masuk outbox selama pass ini
+    # (kalau pengirimnya bukan service alert-dispatcher)
+    if dispatcher.ALERT_DISPATCHER == "sync_runner":
+        dispatcher.drain()
+
+
+if __name__ == "__main__":
+    main()